@@ -0,0 +1,119 @@
+import logging
+import time
+from email.utils import parsedate_to_datetime
+
+from scrapy import signals
+from scrapy.exceptions import NotConfigured
+
+logger = logging.getLogger(__name__)
+
+
+class AIMDThrottleMiddleware:
+    """
+    Downloader middleware that adapts each download slot's request rate with AIMD.
+
+    Every successful response adds AIMD_INCREASE requests/second to the slot's rate (up to
+    1 / AIMD_MIN_DELAY); a throttling response (429/403/503 by default) multiplies it by
+    AIMD_DECREASE_FACTOR (down to 1 / AIMD_MAX_DELAY), holds the slot for at least the
+    Retry-After the server asked for, and re-queues the request. The slot's delay is always
+    1 / rate, so the crawl settles just under the fastest rate the site tolerates.
+
+    Enable with:
+        DOWNLOADER_MIDDLEWARES = {'adaptive_throttle.AIMDThrottleMiddleware': 560}
+    (above RetryMiddleware's 550, so throttled responses are handled here first).
+
+    The current rate per slot is exposed through effective_rate() and the
+    'aimd/<slot>/rate_per_min' stat.
+    """
+
+    def __init__(self, crawler):
+        settings = crawler.settings
+        if not settings.getbool("AIMD_ENABLED", True):
+            raise NotConfigured
+        self.crawler = crawler
+        self.start_delay = settings.getfloat("AIMD_START_DELAY", settings.getfloat("DOWNLOAD_DELAY", 3.16) or 3.16)
+        self.min_delay = settings.getfloat("AIMD_MIN_DELAY", 1.0)
+        self.max_delay = settings.getfloat("AIMD_MAX_DELAY", 120.0)
+        self.increase = settings.getfloat("AIMD_INCREASE", 0.01)  # requests/second added per success
+        self.decrease_factor = settings.getfloat("AIMD_DECREASE_FACTOR", 0.5)
+        self.throttle_codes = set(settings.getlist("AIMD_THROTTLE_CODES", [429, 403, 503]))
+        self.throttle_codes = {int(code) for code in self.throttle_codes}
+        self.max_retries = settings.getint("AIMD_MAX_RETRIES", 5)
+        self.rates = {}
+        self.held_until = {}
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        middleware = cls(crawler)
+        crawler.signals.connect(middleware.spider_closed, signal=signals.spider_closed)
+        return middleware
+
+    def effective_rate(self, key):
+        """Current requests/second for a download slot."""
+        return self.rates.get(key, 1.0 / self.start_delay)
+
+    def _get_slot(self, request):
+        key = request.meta.get("download_slot")
+        return key, self.crawler.engine.downloader.slots.get(key)
+
+    def _apply(self, key, slot, retry_after=0.0):
+        rate = self.rates[key]
+        delay = 1.0 / rate
+        now = time.monotonic()
+        if retry_after:
+            self.held_until[key] = now + retry_after
+        # Until Retry-After has passed the slot waits at least that long between requests
+        held = self.held_until.get(key, 0.0) - now
+        if slot is not None:
+            slot.delay = max(delay, held)
+        self.crawler.stats.set_value(f"aimd/{key}/rate_per_min", round(rate * 60, 2))
+
+    def process_response(self, request, response, spider=None):
+        key, slot = self._get_slot(request)
+        rate = self.effective_rate(key)
+
+        if response.status in self.throttle_codes:
+            self.rates[key] = max(1.0 / self.max_delay, rate * self.decrease_factor)
+            retry_after = self._retry_after(response)
+            self._apply(key, slot, retry_after)
+            self.crawler.stats.inc_value("aimd/throttled")
+            logger.warning(
+                f"{response.status} from {key}: rate {rate * 60:.1f} -> {self.rates[key] * 60:.1f} req/min"
+                + (f", holding {retry_after:.0f}s for Retry-After" if retry_after else "")
+            )
+            retries = request.meta.get("aimd_retries", 0)
+            if retries < self.max_retries:
+                retry = request.replace(dont_filter=True)
+                retry.meta["aimd_retries"] = retries + 1
+                return retry
+            # RetryMiddleware sees this response next; without dont_retry it would retry it again
+            # RETRY_TIMES more times with no backoff at all
+            request.meta["dont_retry"] = True
+            self.crawler.stats.inc_value("aimd/gave_up")
+            logger.error(f"Giving up on {request.url} after {retries} throttled retries")
+            return response
+
+        if response.status < 400:
+            self.rates[key] = min(1.0 / self.min_delay, rate + self.increase)
+            self._apply(key, slot)
+        return response
+
+    @staticmethod
+    def _retry_after(response):
+        """Seconds from a Retry-After header given as delta-seconds or an HTTP date; 0 if absent."""
+        value = response.headers.get("Retry-After")
+        if not value:
+            return 0.0
+        value = value.decode("latin-1").strip()
+        try:
+            return max(0.0, float(value))
+        except ValueError:
+            pass
+        try:
+            return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+        except (TypeError, ValueError):
+            return 0.0
+
+    def spider_closed(self, spider=None):
+        for key, rate in self.rates.items():
+            logger.info(f"AIMD final rate for {key}: {rate * 60:.1f} req/min")
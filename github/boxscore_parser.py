@@ -0,0 +1,380 @@
+import logging
+import re
+import sys
+import time
+from datetime import datetime
+
+import lxml.html
+import pandas as pd
+from bs4 import BeautifulSoup, Comment
+from lxml import etree
+
+# ✅ Box score tables we read team totals from, e.g. box-BOS-game-basic / box-BOS-game-advanced
+BOX_TABLE_ID = re.compile(r"^box-([^-]+)-game-(basic|advanced)$")
+
+# ✅ Output columns: (column name, source, data-stat)
+STAT_COLUMNS = [
+    # Basic Stats
+    ("FG", "basic", "fg"),
+    ("FGA", "basic", "fga"),
+    ("FG%", "basic", "fg_pct"),
+    ("3P", "basic", "fg3"),
+    ("3PA", "basic", "fg3a"),
+    ("3P%", "basic", "fg3_pct"),
+    ("FT", "basic", "ft"),
+    ("FTA", "basic", "fta"),
+    ("FT%", "basic", "ft_pct"),
+    ("ORB", "basic", "orb"),
+    ("DRB", "basic", "drb"),
+    ("TRB", "basic", "trb"),
+    ("AST", "basic", "ast"),
+    ("STL", "basic", "stl"),
+    ("BLK", "basic", "blk"),
+    ("TOV", "basic", "tov"),
+    ("PF", "basic", "pf"),
+    ("PTS", "basic", "pts"),
+    # Advanced Stats
+    ("TS%", "advanced", "ts_pct"),
+    ("eFG%", "advanced", "efg_pct"),
+    ("3PAr", "advanced", "fg3a_per_fga_pct"),
+    ("FTr", "advanced", "fta_per_fga_pct"),
+    ("ORB%", "advanced", "orb_pct"),
+    ("DRB%", "advanced", "drb_pct"),
+    ("TRB%", "advanced", "trb_pct"),
+    ("AST%", "advanced", "ast_pct"),
+    ("STL%", "advanced", "stl_pct"),
+    ("BLK%", "advanced", "blk_pct"),
+    ("TOV%", "advanced", "tov_pct"),
+    ("USG%", "advanced", "usg_pct"),
+    ("ORtg", "advanced", "off_rtg"),
+    ("DRtg", "advanced", "def_rtg"),
+    # Four Factors
+    ("Pace", "four_factors", "pace"),
+    ("eFG% (FF)", "four_factors", "efg_pct"),
+    ("TOV% (FF)", "four_factors", "tov_pct"),
+    ("ORB% (FF)", "four_factors", "orb_pct"),
+    ("FT/FGA", "four_factors", "ft_rate"),
+    ("ORtg (FF)", "four_factors", "off_rtg"),
+    # Points Per Quarter
+    ("Q1 Points", "line_score", "Q1"),
+    ("Q2 Points", "line_score", "Q2"),
+    ("Q3 Points", "line_score", "Q3"),
+    ("Q4 Points", "line_score", "Q4"),
+    ("Total Points", "line_score", "Total"),
+]
+
+META_COLUMNS = ["Game URL", "Game Date", "NBA Season", "Home Team", "Away Team", "Team"]
+COLUMNS = META_COLUMNS + [name for name, _, _ in STAT_COLUMNS]
+
+# ✅ Player lines: (column name, source, data-stat), from the tbody rows of the same box score tables
+PLAYER_STAT_COLUMNS = [
+    ("MP", "basic", "mp"),
+    ("FG", "basic", "fg"),
+    ("FGA", "basic", "fga"),
+    ("FG%", "basic", "fg_pct"),
+    ("3P", "basic", "fg3"),
+    ("3PA", "basic", "fg3a"),
+    ("3P%", "basic", "fg3_pct"),
+    ("FT", "basic", "ft"),
+    ("FTA", "basic", "fta"),
+    ("FT%", "basic", "ft_pct"),
+    ("ORB", "basic", "orb"),
+    ("DRB", "basic", "drb"),
+    ("TRB", "basic", "trb"),
+    ("AST", "basic", "ast"),
+    ("STL", "basic", "stl"),
+    ("BLK", "basic", "blk"),
+    ("TOV", "basic", "tov"),
+    ("PF", "basic", "pf"),
+    ("PTS", "basic", "pts"),
+    ("+/-", "basic", "plus_minus"),
+    ("TS%", "advanced", "ts_pct"),
+    ("eFG%", "advanced", "efg_pct"),
+    ("3PAr", "advanced", "fg3a_per_fga_pct"),
+    ("FTr", "advanced", "fta_per_fga_pct"),
+    ("ORB%", "advanced", "orb_pct"),
+    ("DRB%", "advanced", "drb_pct"),
+    ("TRB%", "advanced", "trb_pct"),
+    ("AST%", "advanced", "ast_pct"),
+    ("STL%", "advanced", "stl_pct"),
+    ("BLK%", "advanced", "blk_pct"),
+    ("TOV%", "advanced", "tov_pct"),
+    ("USG%", "advanced", "usg_pct"),
+    ("ORtg", "advanced", "off_rtg"),
+    ("DRtg", "advanced", "def_rtg"),
+    ("BPM", "advanced", "bpm"),
+]
+
+# Player ID is the site's own id (data-append-csv, e.g. "jamesle01"), stable across seasons and teams.
+# Status holds the reason a player has no line ("Did Not Play", "Not With Team"...), blank otherwise.
+PLAYER_META_COLUMNS = ["Game URL", "Game Date", "NBA Season", "Team", "Player ID", "Player", "Starter", "Status"]
+PLAYER_COLUMNS = PLAYER_META_COLUMNS + [name for name, _, _ in PLAYER_STAT_COLUMNS]
+
+
+def parse_game_date(game_date_text):
+    """Turn the scorebox_meta text ("7:30 PM, October 22, 2024") into (YYYY-MM-DD, season)."""
+    try:
+        game_date_cleaned = game_date_text.split(", ", 1)[-1]
+        game_date_obj = datetime.strptime(game_date_cleaned, "%B %d, %Y")
+    except ValueError:
+        logging.warning(f"⚠️ Unexpected date format: '{game_date_text}', defaulting to 'N/A'")
+        return "N/A", "N/A"
+    return game_date_obj.strftime("%Y-%m-%d"), season_for(game_date_obj)
+
+
+def season_for(day):
+    """NBA season label ("2024-2025") for a date; seasons start in October."""
+    if day.month >= 10:
+        return f"{day.year}-{day.year + 1}"
+    return f"{day.year - 1}-{day.year}"
+
+
+def build_rows(url, game_date, season, home_team, away_team, tables):
+    """Assemble one output row per team from the per-source stat dicts."""
+    game_data = []
+    for team_id in tables["basic"].keys():
+        row = {
+            "Game URL": url,
+            "Game Date": game_date,
+            "NBA Season": season,
+            "Home Team": home_team,
+            "Away Team": away_team,
+            "Team": team_id,
+        }
+        for name, source, data_stat in STAT_COLUMNS:
+            row[name] = tables[source].get(team_id, {}).get(data_stat, "N/A")
+        game_data.append(row)
+    return game_data
+
+
+def build_player_columns(url, game_date, season, player_tables):
+    """
+    Assemble the player lines of one game as columns ({column: [values]}), basic and advanced
+    lines joined on player ID. Players keep the page order: away team first, starters first.
+    """
+    columns = {name: [] for name in PLAYER_COLUMNS}
+    for team_id, kinds in player_tables.items():
+        advanced = {player_id: stats for player_id, _, _, _, stats in kinds.get("advanced", [])}
+        for player_id, player, starter, status, stats in kinds.get("basic", []):
+            sources = {"basic": stats, "advanced": advanced.get(player_id, {})}
+            for name, value in zip(PLAYER_META_COLUMNS, (url, game_date, season, team_id, player_id, player, starter, status)):
+                columns[name].append(value)
+            for name, source, data_stat in PLAYER_STAT_COLUMNS:
+                columns[name].append(sources[source].get(data_stat, "N/A"))
+    return columns
+
+
+def _parse_player_rows(table):
+    """(player ID, name, starter, status, {data-stat: text}) for each player row of a box score table."""
+    players = []
+    starter = True
+    for tbody in table.iter("tbody"):
+        for row in tbody.iter("tr"):
+            if "thead" in (row.get("class") or "").split():
+                starter = False  # The "Reserves" header row separates the starting five from the bench
+                continue
+            th = next((th for th in row.iter("th") if th.get("data-stat") == "player"), None)
+            if th is None:
+                continue
+            stats = {}
+            status = ""
+            for td in row.iter("td"):
+                if td.get("data-stat") == "reason":
+                    status = td.text_content().strip()
+                else:
+                    stats[td.get("data-stat")] = td.text_content()
+            players.append((th.get("data-append-csv"), th.text_content().strip(), starter, status, stats))
+    return players
+
+
+def _parse_four_factors(table):
+    four_factors = {}
+    for row in table.xpath(".//tbody//tr"):
+        th = next(row.iter("th"), None)
+        team_name_element = next(th.iter("a"), None) if th is not None else None
+        team_id = team_name_element.text_content().strip() if team_name_element is not None else "Unknown"
+        four_factors[team_id] = {td.get("data-stat"): td.text_content().strip() for td in row.iter("td")}
+    return four_factors
+
+
+def _parse_line_score(table):
+    points_per_quarter = {}
+    for row in table.iter("tr"):
+        team_element = next((th for th in row.iter("th") if th.get("data-stat") == "team"), None)
+        cols = list(row.iter("td"))
+        if team_element is not None and len(cols) >= 5:
+            team = team_element.text_content().strip()
+            points_per_quarter[team] = {f"Q{i+1}": cols[i].text_content().strip() for i in range(4)}
+            points_per_quarter[team]["Total"] = cols[4].text_content().strip()
+    return points_per_quarter
+
+
+def _find_commented_table(comment_text, table_id):
+    fragment = lxml.html.fragment_fromstring(comment_text, create_parent="div")
+    return next((t for t in fragment.iter("table") if t.get("id") == table_id), None)
+
+
+def parse_game(html, url):
+    """
+    Extract one row per team in a single walk over the document with lxml.
+
+    Scorebox, box score tfoot rows and the commented-out four_factors / line_score
+    tables are all picked up in the same pass; only the two small comments that hold
+    hidden tables are parsed a second time.
+    """
+    return _parse_page(html, url, with_players=False)[0]
+
+
+def parse_game_with_players(html, url):
+    """Team rows plus every player line ({column: [values]}), from the same single pass as parse_game."""
+    return _parse_page(html, url, with_players=True)
+
+
+def _parse_page(html, url, with_players):
+    root = lxml.html.fromstring(html)
+
+    teams = None
+    game_date_text = None
+    ff_comment = None
+    ls_comment = None
+    tables = {"basic": {}, "advanced": {}, "four_factors": {}, "line_score": {}}
+    player_tables = {}
+
+    for el in root.iter("div", "table", etree.Comment):
+        if el.tag is etree.Comment:
+            text = el.text or ""
+            if ff_comment is None and "four_factors" in text:
+                ff_comment = text
+            if ls_comment is None and "line_score" in text:
+                ls_comment = text
+        elif el.tag == "div":
+            classes = (el.get("class") or "").split()
+            if teams is None and "scorebox" in classes:
+                teams = [a.text_content().strip() for a in el.xpath(".//strong//a")]
+            elif game_date_text is None and "scorebox_meta" in classes:
+                first_div = next(el.iterdescendants("div"), None)
+                if first_div is not None:
+                    game_date_text = first_div.text_content().strip()
+        else:
+            match = BOX_TABLE_ID.match(el.get("id") or "")
+            if match:
+                team_id = match.group(1).upper()
+                row = next((tr for tfoot in el.iter("tfoot") for tr in tfoot.iter("tr")), None)
+                if row is not None:
+                    tables[match.group(2)][team_id] = {td.get("data-stat"): td.text_content() for td in row.iter("td")}
+                if with_players:
+                    player_tables.setdefault(team_id, {})[match.group(2)] = _parse_player_rows(el)
+
+    away_team = teams[0] if teams else "N/A"
+    home_team = teams[1] if teams else "N/A"
+
+    if game_date_text is not None:
+        game_date, season = parse_game_date(game_date_text)
+    else:
+        logging.warning("⚠️ Game Date Not Found")
+        game_date, season = "N/A", "N/A"
+
+    if ff_comment is not None:
+        ff_table = _find_commented_table(ff_comment, "four_factors")
+        if ff_table is not None:
+            tables["four_factors"] = _parse_four_factors(ff_table)
+
+    # Matches the legacy behaviour: without a line_score comment, look in the four_factors one
+    ls_source = ls_comment if ls_comment is not None else ff_comment
+    if ls_source is not None:
+        ls_table = _find_commented_table(ls_source, "line_score")
+        if ls_table is not None:
+            tables["line_score"] = _parse_line_score(ls_table)
+
+    rows = build_rows(url, game_date, season, home_team, away_team, tables)
+    return rows, build_player_columns(url, game_date, season, player_tables) if with_players else None
+
+
+def extract_nba_stats(html, url):
+    """Extract Game Metadata, Basic, Advanced, Four Factors, and Points Per Quarter."""
+    return pd.DataFrame(parse_game(html, url), columns=COLUMNS)
+
+
+def extract_player_stats(html, url):
+    """Extract every player's basic and advanced line, one row per player."""
+    return pd.DataFrame(parse_game_with_players(html, url)[1], columns=PLAYER_COLUMNS)
+
+
+# ✅ Reference implementation: the original BeautifulSoup/html.parser extraction
+def extract_nba_stats_soup(soup, url):
+    """Legacy extractor kept for output comparison and CPU benchmarks."""
+    teams = soup.select("div.scorebox strong a")
+    away_team = teams[0].text.strip() if teams else "N/A"
+    home_team = teams[1].text.strip() if teams else "N/A"
+
+    game_date_element = soup.select_one("div.scorebox_meta div")
+    if game_date_element:
+        game_date, season = parse_game_date(game_date_element.text.strip())
+    else:
+        logging.warning("⚠️ Game Date Not Found")
+        game_date, season = "N/A", "N/A"
+
+    tables = {"basic": {}, "advanced": {}, "four_factors": {}, "line_score": {}}
+    for kind in ("basic", "advanced"):
+        for table in soup.select(f"table[id^='box-'][id$='-game-{kind}']"):
+            team_id = table['id'].split('-')[1].upper()
+            row = table.select_one("tfoot tr")
+            if row:
+                tables[kind][team_id] = {td["data-stat"]: td.text for td in row.find_all("td")}
+
+    comments = soup.find_all(string=lambda text: isinstance(text, Comment))
+    hidden_soup = None
+    for comment in comments:
+        if "four_factors" in comment:
+            hidden_soup = BeautifulSoup(comment, "html.parser")
+            break
+    if hidden_soup:
+        ff_table = hidden_soup.find("table", {"id": "four_factors"})
+        if ff_table:
+            for row in ff_table.select("tbody tr"):
+                team_name_element = row.find("th").find("a")
+                team_id = team_name_element.text.strip() if team_name_element else "Unknown"
+                tables["four_factors"][team_id] = {td["data-stat"]: td.text.strip() for td in row.find_all("td")}
+
+    for comment in comments:
+        if "line_score" in comment:
+            hidden_soup = BeautifulSoup(comment, "html.parser")
+            break
+    line_score_table = hidden_soup.find("table", {"id": "line_score"}) if hidden_soup else None
+    if line_score_table:
+        for row in line_score_table.find_all("tr"):
+            team_element = row.find("th", {"data-stat": "team"})
+            cols = row.find_all("td")
+            if team_element and len(cols) >= 5:
+                team = team_element.text.strip()
+                tables["line_score"][team] = {f"Q{i+1}": cols[i].text.strip() for i in range(4)}
+                tables["line_score"][team]["Total"] = cols[4].text.strip()
+
+    return pd.DataFrame(build_rows(url, game_date, season, home_team, away_team, tables), columns=COLUMNS)
+
+
+def compare_backends(paths, repeat=3):
+    """Time both extractors on saved pages (CPU seconds per page) and check the outputs match."""
+    for path in paths:
+        with open(path, "r", encoding="utf-8") as file:
+            html = file.read()
+        url = path
+
+        start = time.process_time()
+        for _ in range(repeat):
+            legacy = extract_nba_stats_soup(BeautifulSoup(html, "html.parser"), url)
+        legacy_cpu = (time.process_time() - start) / repeat
+
+        start = time.process_time()
+        for _ in range(repeat):
+            fast = extract_nba_stats(html, url)
+        fast_cpu = (time.process_time() - start) / repeat
+
+        status = "match" if legacy.equals(fast) else "MISMATCH"
+        print(f"{path}: html.parser {legacy_cpu * 1000:.1f} ms, lxml single-pass {fast_cpu * 1000:.1f} ms "
+              f"({legacy_cpu / fast_cpu:.1f}x), output {status}")
+
+
+if __name__ == "__main__":
+    # Usage: python boxscore_parser.py saved_page.html [saved_page.html ...]
+    compare_backends(sys.argv[1:])
@@ -1,7 +1,9 @@
 import scrapy
+import json
+import os
+from datetime import date, datetime, timedelta
 from urllib.parse import urljoin
 from scrapy.crawler import CrawlerProcess
-from twisted.internet import reactor, defer
 import logging
 import re
 
@@ -19,16 +21,117 @@ START_YEAR = 1977  # Only keep seasons from 1977 onward
 YEAR_PATTERN = re.compile(r"(NBA|ABA)_(\d{4})\.html")  # Regex to match NBA and ABA seasons
 OUTPUT_FILE = "links.txt"
 BOXSCORE_FILE = "boxscore_urls.txt"
+STATE_FILE = "crawl_state.json"  # Which schedule pages are final, plus their ETag/Last-Modified
+SEASON_STATE_FILE = "season_state.json"  # Same for season pages, plus the month pages each one lists
+SCHEDULE_PATTERN = re.compile(r"(NBA|ABA)_(\d{4})_games")  # Season end year of a schedule page
+MONTH_GRACE_DAYS = 2  # A month page is final this long after its last game, once the month is over
+BLIND_MONTHS = ['october', 'november', 'december', 'january', 'february', 'march', 'april', 'may', 'june']
+# Per-slot AIMD rate control; handles 429/403 before RetryMiddleware (550) sees them
+THROTTLE_MIDDLEWARES = {'adaptive_throttle.AIMDThrottleMiddleware': 560}
+
+
+def season_is_complete(end_year, today=None):
+    """A season ending in `end_year` is over once that year's June has passed."""
+    today = today or date.today()
+    return end_year < today.year or (end_year == today.year and today.month >= 7)
+
+
+def page_is_complete(end_year, last_game=None, today=None):
+    """
+    A schedule page is final once its season is over, or once the month of the last game it
+    lists has passed (with a few days' grace for late box scores): nothing more gets added to it.
+    """
+    today = today or date.today()
+    if season_is_complete(end_year, today):
+        return True
+    return (last_game is not None and (last_game.year, last_game.month) < (today.year, today.month)
+            and today - last_game > timedelta(days=MONTH_GRACE_DAYS))
+
+
+def last_game_date(response):
+    """Latest game date listed on a schedule page (cells read like 'Tue, Oct 22, 2024'), or None."""
+    days = []
+    for text in response.xpath("//th[@data-stat='date_game']//text()").extract():
+        try:
+            days.append(datetime.strptime(text.strip(), "%a, %b %d, %Y").date())
+        except ValueError:
+            continue
+    return max(days, default=None)
+
+
+class CrawlState:
+    """
+    Persistent record of schedule pages already crawled.
+
+    Pages from completed seasons, and month pages whose month is over, are marked final and
+    never requested again. Other pages keep their ETag / Last-Modified so the next run can
+    send a conditional request and skip parsing on 304 Not Modified; finality is checked
+    again on every response, 304s included, so a page that stops changing still retires.
+    """
+
+    def __init__(self, path=STATE_FILE):
+        self.path = path
+        try:
+            with open(path, "r") as file:
+                self.pages = json.load(file)
+        except FileNotFoundError:
+            self.pages = {}
+
+    def is_final(self, url):
+        return self.pages.get(url, {}).get("final", False)
+
+    def conditional_headers(self, url):
+        page = self.pages.get(url, {})
+        headers = {}
+        if page.get("etag"):
+            headers["If-None-Match"] = page["etag"]
+        if page.get("last_modified"):
+            headers["If-Modified-Since"] = page["last_modified"]
+        return headers
+
+    def record(self, response, last_game=None, today=None):
+        """
+        Update a page's entry from a 200 or 304 response. `last_game` is the latest game date
+        a 200 page lists; on a 304 the one stored from the last 200 is used.
+        """
+        match = SCHEDULE_PATTERN.search(response.url)
+        page = self.pages.setdefault(response.url, {})
+        if response.status == 200:
+            etag = response.headers.get("ETag")
+            last_modified = response.headers.get("Last-Modified")
+            page["etag"] = etag.decode() if etag else None
+            page["last_modified"] = last_modified.decode() if last_modified else None
+            page["last_game"] = last_game.isoformat() if last_game else None
+        if response.status in (200, 304):
+            stored = page.get("last_game")
+            page["final"] = bool(match) and page_is_complete(
+                int(match.group(2)), date.fromisoformat(stored) if stored else None, today)
+        page["fetched_at"] = datetime.now().isoformat(timespec="seconds")
+
+    def save(self):
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w") as file:
+            json.dump(self.pages, file, indent=1, sort_keys=True)
+        os.replace(tmp_path, self.path)
 
 class LinksSpider(scrapy.Spider):
     name = "links_spider"
+    handle_httpstatus_list = [304]  # Season pages are requested conditionally too; let 304s reach parse_season
     custom_settings = {
         'DOWNLOAD_DELAY': 3.16,  # 19 requests per minute
         'CONCURRENT_REQUESTS_PER_DOMAIN': 1,  # Ensure only one request at a time
+        'DOWNLOADER_MIDDLEWARES': THROTTLE_MIDDLEWARES,
     }
 
     start_urls = [f"{BASE_URL}/leagues/"]
 
+    def __init__(self, *args, **kwargs):
+        super(LinksSpider, self).__init__(*args, **kwargs)
+        self.state = CrawlState(SEASON_STATE_FILE)
+        self.month_links = {}
+        self.requested_seasons = []
+        self.discovery_requests = 0
+
     def parse(self, response):
         logger.info("Parsing season links...")
 
@@ -48,33 +151,90 @@ class LinksSpider(scrapy.Spider):
         if not filtered_links:
             logger.error("ERROR: No valid season links found. Check XPath structure.")
 
-        # Write game URLs with monthly variations
-        with open(OUTPUT_FILE, 'w') as file:
-            buffer = []
-            for link in filtered_links:
-                for month in ['october', 'november', 'december', 'january', 'february', 'march', 'april', 'may', 'june']:
-                    modified_url = link[:-5] + '-' + month + '.html'  # Append month to URL
-                    buffer.append(modified_url + '\n')
-                if len(buffer) > 1000:  # Write in batches of 1000 for efficiency
-                    file.writelines(buffer)
-                    buffer = []
-            if buffer:  # Write remaining lines
-                file.writelines(buffer)
+        # Read each season's real month pages from its schedule page instead of guessing nine months.
+        # Completed seasons discovered on an earlier run are reused without a request.
+        for games_url in filtered_links:
+            known = self.state.pages.get(games_url, {})
+            if known.get("final") and known.get("months"):
+                self.month_links[games_url] = known["months"]
+            else:
+                self.requested_seasons.append(games_url)
+                yield scrapy.Request(games_url, callback=self.parse_season,
+                                     headers=self.state.conditional_headers(games_url))
 
         logger.info(f"Collected {len(filtered_links)} valid season links from {START_YEAR} onward.")
-        logger.info(f"Links written to {OUTPUT_FILE}")
+
+    def parse_season(self, response):
+        self.discovery_requests += 1
+        self.state.record(response)
+        page = self.state.pages[response.url]
+        if response.status == 304:
+            self.month_links[response.url] = page.get("months", [])
+            return
+
+        hrefs = response.xpath("//div[contains(@class, 'filter')]//a[contains(@href, '_games-')]/@href").extract()
+        months = list(dict.fromkeys(urljoin(BASE_URL, href) for href in hrefs))
+        if not months:
+            # Seasons with a single schedule page list their games on the _games.html page itself
+            months = [response.url]
+        page["months"] = months
+        self.month_links[response.url] = months
+
+    def closed(self, reason):
+        # A season request that failed (error, 5xx after retries, throttled out) never reached
+        # parse_season; fall back to the months saved on an earlier run rather than dropping the season
+        stale, missing = [], []
+        for games_url in self.requested_seasons:
+            if games_url in self.month_links:
+                continue
+            saved_months = self.state.pages.get(games_url, {}).get("months")
+            if saved_months:
+                self.month_links[games_url] = saved_months
+                stale.append(games_url)
+            else:
+                missing.append(games_url)
+        if stale:
+            logger.warning(f"Season requests failed; reusing saved month pages for: {', '.join(stale)}")
+        if missing:
+            logger.error(f"Season requests failed with no saved month pages; these seasons are not in "
+                         f"{OUTPUT_FILE}: {', '.join(missing)}")
+
+        # Write month URLs season by season, in the order the site lists them
+        with open(OUTPUT_FILE, 'w') as file:
+            for games_url in sorted(self.month_links):
+                file.writelines(url + '\n' for url in self.month_links[games_url])
+        self.state.save()
+
+        months = sum(len(urls) for urls in self.month_links.values())
+        blind = len(self.month_links) * len(BLIND_MONTHS)
+        saved = blind - months - self.discovery_requests
+        logger.info(f"Links written to {OUTPUT_FILE}: {months} month pages for {len(self.month_links)} seasons "
+                    f"({self.discovery_requests} discovery requests). Blind expansion would queue {blind}; "
+                    f"{saved} requests saved.")
 
 class BoxscoreSpider(scrapy.Spider):
     name = "boxscore_spider"
+    handle_httpstatus_list = [304]  # Conditional requests: unchanged pages come back empty
     custom_settings = {
-        'DOWNLOAD_DELAY': 3.16,  # 19 requests per minute
+        'DOWNLOAD_DELAY': 3.16,  # Starting pace (19 requests per minute); AIMD adjusts it from there
         'CONCURRENT_REQUESTS_PER_DOMAIN': 1,
-        'AUTOTHROTTLE_ENABLED': False,  # Disable auto-throttle since we're setting a fixed delay
+        'AUTOTHROTTLE_ENABLED': False,  # AIMD owns the slot delay; AutoThrottle would fight it
+        'DOWNLOADER_MIDDLEWARES': THROTTLE_MIDDLEWARES,
     }
 
     def __init__(self, *args, **kwargs):
         super(BoxscoreSpider, self).__init__(*args, **kwargs)
-        self.backoff_factor = 1
+        self.state = CrawlState()
+        try:
+            with open(BOXSCORE_FILE, "r") as file:
+                self.known_boxscores = {line.strip() for line in file if line.strip()}
+        except FileNotFoundError:
+            self.known_boxscores = set()
+
+    async def start(self):
+        # Scrapy 2.13+ calls start() and no longer falls back to start_requests()
+        for request in self.start_requests():
+            yield request
 
     def start_requests(self):
         logger.info("Starting requests for box score links...")
@@ -86,42 +246,48 @@ class BoxscoreSpider(scrapy.Spider):
             logger.error(f"File {OUTPUT_FILE} not found. Ensure the first spider ran successfully.")
             return
 
+        skipped = 0
         for url in modified_urls:
-            yield scrapy.Request(url.strip(), callback=self.parse)
+            url = url.strip()
+            if not url:
+                continue
+            if self.state.is_final(url):
+                skipped += 1
+                continue
+            yield scrapy.Request(url, callback=self.parse, headers=self.state.conditional_headers(url))
+        logger.info(f"Skipped {skipped} schedule pages from completed seasons.")
 
     def parse(self, response):
         logger.info(f"Parsing Box Score Links from {response.url}")
+        self.state.record(response, last_game_date(response) if response.status == 200 else None)
 
-        # Handle rate-limiting (429 Too Many Requests or 403 Forbidden)
-        if response.status in [429, 403]:
-            logger.warning(f"Received {response.status} status code. Increasing backoff factor.")
-            self.backoff_factor *= 2  # Exponential backoff
-            return defer.Deferred(lambda: self.crawler.engine.pause())
+        if response.status == 304:
+            logger.info(f"{response.url} not modified since last crawl.")
+            return
 
         # Extract box score links
         boxscore_urls = response.xpath("//a[contains(text(),'Box Score')]/@href").extract()
 
-        # Write to file efficiently
-        with open(BOXSCORE_FILE, "a") as file:
-            buffer = [urljoin(BASE_URL, boxscore_url) + "\n" for boxscore_url in boxscore_urls]
-            if buffer:
-                file.writelines(buffer)
+        # Write only box scores we haven't recorded before
+        new_urls = [url for url in dict.fromkeys(urljoin(BASE_URL, u) for u in boxscore_urls) if url not in self.known_boxscores]
+        if new_urls:
+            self.known_boxscores.update(new_urls)
+            with open(BOXSCORE_FILE, "a") as file:
+                file.writelines(url + "\n" for url in new_urls)
 
-        # Adjust the delay for the next request based on backoff factor
-        delay = self.custom_settings['DOWNLOAD_DELAY'] * self.backoff_factor
-        defer.Deferred(lambda: self.crawler.engine.downloader.slots[response.url].delay(delay))
+    def closed(self, reason):
+        self.state.save()
+        logger.info(f"Crawl state saved to {STATE_FILE}")
 
 def start_scraping():
     process = CrawlerProcess({
         'USER_AGENT': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64)',
     })
     
-    process.crawl(LinksSpider)
-    process.crawl(BoxscoreSpider)
-    
-    d = process.join()
-    d.addBoth(lambda _: reactor.stop())
-    reactor.run()
+    # BoxscoreSpider reads the links.txt that LinksSpider writes when it closes, so run them in turn
+    d = process.crawl(LinksSpider)
+    d.addCallback(lambda _: process.crawl(BoxscoreSpider))
+    process.start()  # Runs the reactor until both crawls have finished
 
 if __name__ == "__main__":
     start_scraping()
@@ -1,21 +1,146 @@
+import argparse
+import os
+import tempfile
+import time
+
 import pandas as pd
-from sqlalchemy import create_engine
+import pyarrow.dataset as ds
+from sqlalchemy import create_engine, inspect
 import urllib.parse
 
+from boxscore_parser import COLUMNS as GAME_COLUMNS
+from game_schema import csv_options, to_typed_frame
+
 # Database connection
 DB_HOST = ""
 DB_NAME = ""
 DB_USER = ""
-DB_PASSWORD = "" 
+DB_PASSWORD = ""
 TABLE_NAME = ""
 db_driver = "ODBC Driver 17 for SQL Server"
 
 # conn_str = f"mssql+pyodbc://{DB_USER}:{DB_PASSWORD}@{DB_HOST}/{DB_NAME}?driver={urllib.parse.quote_plus(db_driver)}"
 
 conn_str = f"mssql+pymssql://{DB_USER}:{DB_PASSWORD}@{DB_HOST}/{DB_NAME}"
-db_engine = create_engine(conn_str)
 
-# Load CSV and insert into RDS
-df = pd.read_csv("/mnt/data/merged_data.csv")
-df.to_sql(TABLE_NAME, db_engine, schema="nba",  if_exists="append", index=False, chunksize=1000)
-print("Data inserted successfully!")
+INPUT_PATH = "/mnt/data/merged_data.csv"  # CSV, Parquet file, or the season-partitioned Parquet directory
+CHUNK_ROWS = 20000  # Rows read and inserted per round; bounds memory regardless of input size
+MAX_STATEMENT_PARAMS = 2000  # SQL Server rejects statements with more than 2100 parameters
+PLACEHOLDERS = {"qmark": "?", "format": "%s", "pyformat": "%s"}
+
+
+def iter_chunks(path, chunk_rows=CHUNK_ROWS):
+    """Stream the input as DataFrames of at most chunk_rows rows, without loading the whole file."""
+    if path.endswith(".csv"):
+        if set(GAME_COLUMNS) <= set(pd.read_csv(path, nrows=0).columns):
+            # Game rows get the declared schema (SMALLINT/REAL columns, real NULLs) once per chunk
+            for chunk in pd.read_csv(path, chunksize=chunk_rows, **csv_options()):
+                yield to_typed_frame(chunk)
+        else:
+            yield from pd.read_csv(path, chunksize=chunk_rows)
+        return
+    for batch in ds.dataset(path, format="parquet").to_batches(batch_size=chunk_rows):
+        if batch.num_rows:
+            yield batch.to_pandas()
+
+
+def _rows(df):
+    """Plain Python tuples with NaN/NA turned into None, which every driver binds as NULL."""
+    df = df.copy()
+    for column in df.columns:
+        if pd.api.types.is_datetime64_any_dtype(df[column]):
+            df[column] = pd.Series(df[column].dt.to_pydatetime(), index=df.index, dtype=object)  # Not every driver binds Timestamp
+    return list(df.astype(object).where(df.notna(), None).itertuples(index=False, name=None))
+
+
+def _insert_chunk(conn, cursor, dialect, table_sql, columns_sql, df):
+    placeholder = PLACEHOLDERS[dialect.paramstyle]
+    row_sql = "(" + ", ".join([placeholder] * len(df.columns)) + ")"
+    rows = _rows(df)
+
+    if hasattr(cursor, "fast_executemany") or dialect.name == "sqlite":
+        # pyodbc sends the whole array in one round trip; sqlite3's executemany loops in C
+        cursor.executemany(f"INSERT INTO {table_sql} ({columns_sql}) VALUES {row_sql}", rows)
+    else:
+        # Drivers without array binding (pymssql): multi-row VALUES, as many rows as the parameter cap allows
+        per_statement = max(1, min(1000, MAX_STATEMENT_PARAMS // len(df.columns)))
+        for i in range(0, len(rows), per_statement):
+            batch = rows[i:i + per_statement]
+            values_sql = ", ".join([row_sql] * len(batch))
+            cursor.execute(
+                f"INSERT INTO {table_sql} ({columns_sql}) VALUES {values_sql}",
+                tuple(value for row in batch for value in row),
+            )
+    conn.commit()
+
+
+def bulk_load(engine, table, path, schema="nba", chunk_rows=CHUNK_ROWS):
+    """
+    Stream `path` into `table` chunk by chunk over one raw DBAPI connection using the fastest
+    insert path the driver has. Returns (rows, seconds).
+    """
+    preparer = engine.dialect.identifier_preparer
+    table_sql = f"{preparer.quote(schema)}.{preparer.quote(table)}" if schema else preparer.quote(table)
+    start = time.perf_counter()
+    total = 0
+
+    conn = engine.raw_connection()
+    try:
+        cursor = conn.cursor()
+        if hasattr(cursor, "fast_executemany"):
+            cursor.fast_executemany = True
+        for df in iter_chunks(path, chunk_rows):
+            if total == 0 and not inspect(engine).has_table(table, schema=schema):
+                df.head(0).to_sql(table, engine, schema=schema, index=False)
+            columns_sql = ", ".join(preparer.quote(column) for column in df.columns)
+            _insert_chunk(conn, cursor, engine.dialect, table_sql, columns_sql, df)
+            total += len(df)
+            elapsed = time.perf_counter() - start
+            print(f"{total} rows loaded, {total / elapsed:,.0f} rows/sec")
+    finally:
+        conn.close()
+    return total, time.perf_counter() - start
+
+
+def to_sql_load(engine, table, path, schema="nba"):
+    """The original path: read everything into pandas, then DataFrame.to_sql."""
+    start = time.perf_counter()
+    df = pd.read_csv(path) if path.endswith(".csv") else ds.dataset(path, format="parquet").to_table().to_pandas()
+    df.to_sql(table, engine, schema=schema, if_exists="append", index=False, chunksize=1000)
+    return len(df), time.perf_counter() - start
+
+
+def benchmark(path):
+    """Load `path` into throwaway SQLite databases with both paths and compare rows/sec."""
+    with tempfile.TemporaryDirectory() as tmp:
+        results = {}
+        for name, load in (("to_sql", to_sql_load), ("bulk", bulk_load)):
+            engine = create_engine(f"sqlite:///{os.path.join(tmp, name + '.db')}")
+            rows, seconds = load(engine, "games", path, schema=None)
+            results[name] = rows / seconds
+            print(f"{name}: {rows} rows in {seconds:.2f}s, {rows / seconds:,.0f} rows/sec")
+            engine.dispose()
+        print(f"bulk is {results['bulk'] / results['to_sql']:.1f}x to_sql")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load scraped game rows into RDS.")
+    parser.add_argument("--input", default=INPUT_PATH)
+    parser.add_argument("--mode", choices=["bulk", "to_sql"], default="bulk")
+    parser.add_argument("--benchmark", action="store_true", help="Compare both paths against local SQLite instead of loading RDS")
+    args = parser.parse_args()
+
+    if args.benchmark:
+        benchmark(args.input)
+        return
+
+    db_engine = create_engine(conn_str)
+    if args.mode == "bulk":
+        rows, seconds = bulk_load(db_engine, TABLE_NAME, args.input)
+    else:
+        rows, seconds = to_sql_load(db_engine, TABLE_NAME, args.input)
+    print(f"Data inserted successfully! {rows} rows in {seconds:.1f}s ({rows / seconds:,.0f} rows/sec)")
+
+
+if __name__ == "__main__":
+    main()
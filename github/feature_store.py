@@ -0,0 +1,312 @@
+import argparse
+import bisect
+import logging
+import os
+import pickle
+from collections import deque
+from datetime import date
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from boxscore_parser import season_for
+from game_schema import concat, to_typed_frame
+from parquet_sink import read_season, seasons
+
+# ✅ Feature Settings
+STATS = ["PTS", "Opp PTS", "Margin", "Win", "FG%", "3P%", "FT%", "TRB", "AST", "TOV",
+         "eFG%", "TOV%", "ORB%", "FT/FGA", "ORtg", "DRtg", "Pace"]
+DERIVED_STATS = ["Opp PTS", "Margin", "Win"]  # Filled in from the other team's row of the same game
+WINDOWS = [5, 10]  # Last-N-games averages
+EWM_HALFLIFE = 10  # Games for a game's weight in the exponentially weighted average to halve
+MAX_REST_DAYS = 10  # Longer layoffs (the off-season, the All-Star break) count as fully rested
+STATE_FILE = "feature_store.pkl"
+GAMES_DIR = "/mnt/efs/games"
+GAME_ROW_COLUMNS = ["Game URL", "Game Date", "NBA Season", "Team"] + [name for name in STATS if name not in DERIVED_STATS]
+
+FEATURE_COLUMNS = (
+    [f"{stat}_last{n}" for n in WINDOWS for stat in STATS]
+    + [f"{stat}_ewm" for stat in STATS]
+    + [f"{stat}_season" for stat in STATS]
+    + ["games_season", "rest_days"]
+)
+_SEASON_BLOCK = slice((len(WINDOWS) + 1) * len(STATS), (len(WINDOWS) + 2) * len(STATS))
+_GAMES, _REST = len(FEATURE_COLUMNS) - 2, len(FEATURE_COLUMNS) - 1
+_DECAY = 0.5 ** (1 / EWM_HALFLIFE)
+
+
+def _to_date(value) -> date:
+    return value if type(value) is date else pd.Timestamp(value).date()
+
+
+def _mean(sums: np.ndarray, counts: np.ndarray) -> np.ndarray:
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.where(counts > 0, sums / counts, np.nan)
+
+
+def game_stats(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    STATS for each team row of a typed game frame as float64, aligned to its index. The
+    DERIVED_STATS come from the other row of the same game; they're NaN when it's missing.
+    """
+    points = df["PTS"].astype("float64")
+    by_game = points.groupby(df["Game URL"], observed=True)
+    paired = by_game.transform("count") == 2
+    stats = pd.DataFrame({name: df[name].astype("float64") for name in STATS if name not in DERIVED_STATS})
+    stats["Opp PTS"] = (by_game.transform("sum") - points).where(paired)
+    stats["Margin"] = points - stats["Opp PTS"]
+    stats["Win"] = (stats["Margin"] > 0).astype("float64").where(stats["Margin"].notna())
+    return stats[STATS]
+
+
+class _TeamState:
+    """Running sums for one team; every update touches a fixed number of arrays, whatever the history length."""
+
+    def __init__(self):
+        width = len(STATS)
+        self.windows = {n: (deque(maxlen=n), np.zeros(width), np.zeros(width)) for n in WINDOWS}
+        self.ewm_num, self.ewm_den = np.zeros(width), np.zeros(width)
+        self.season = None
+        self.season_sums, self.season_counts = np.zeros(width), np.zeros(width)
+        self.season_games = 0
+        # One entry per game played: the date, game URL, season and the features *after* that game
+        self.dates: List[date] = []
+        self.urls: List[str] = []
+        self.seasons: List[str] = []
+        self.snapshots: List[np.ndarray] = []
+
+    def add(self, day: date, url: str, season: str, values: np.ndarray) -> None:
+        valid = ~np.isnan(values)
+        filled = np.where(valid, values, 0.0)
+        for n, (recent, sums, counts) in self.windows.items():
+            if len(recent) == n:  # The deque drops this one on append; take it out of the sums first
+                old_filled, old_valid = recent[0]
+                sums -= old_filled
+                counts -= old_valid
+            recent.append((filled, valid))
+            sums += filled
+            counts += valid
+        self.ewm_num = np.where(valid, _DECAY * self.ewm_num + filled, self.ewm_num)
+        self.ewm_den = np.where(valid, _DECAY * self.ewm_den + 1.0, self.ewm_den)
+        if season != self.season:
+            self.season = season
+            self.season_sums[:], self.season_counts[:], self.season_games = 0.0, 0.0, 0
+        self.season_sums += filled
+        self.season_counts += valid
+        self.season_games += 1
+
+        snapshot = np.concatenate(
+            [_mean(sums, counts) for _, sums, counts in self.windows.values()]
+            + [_mean(self.ewm_num, self.ewm_den), _mean(self.season_sums, self.season_counts),
+               [self.season_games, np.nan]]
+        ).astype(np.float32)
+        self.dates.append(day)
+        self.urls.append(url)
+        self.seasons.append(season)
+        self.snapshots.append(snapshot)
+
+
+class FeatureStore:
+    """
+    Pre-game team features built incrementally from the per-game team rows.
+
+    For every team it keeps last-N-games averages, an exponentially weighted average and
+    season-to-date averages of STATS as running sums, so adding a game costs the same
+    however much history there is. After each game the team's feature vector is kept
+    against the game date, and as_of(team, day) finds the latest one strictly before
+    `day` by bisection: features for a game never include that game, so the same call
+    serves training rows and today's predictions.
+
+    Games must arrive in date order (update() sorts each batch); games already seen are skipped.
+    """
+
+    def __init__(self):
+        self._teams: Dict[str, _TeamState] = {}
+        self._seen = set()
+        self.last_date: Optional[date] = None
+
+    def update(self, rows) -> int:
+        """Add a DataFrame of team game rows (game_schema layout, typed or raw). Returns the rows added."""
+        df = to_typed_frame(rows if isinstance(rows, pd.DataFrame) else pd.DataFrame(rows))
+        df = df[df["Game Date"].notna()].drop_duplicates(["Game URL", "Team"], keep="last")
+        df = df[[(url, team) not in self._seen for url, team in zip(df["Game URL"], df["Team"])]]
+        if df.empty:
+            return 0
+
+        stats = game_stats(df)
+        order = np.lexsort((df["Team"].astype(str).to_numpy(), df["Game URL"].astype(str).to_numpy(),
+                            df["Game Date"].to_numpy()))
+        values = stats[STATS].to_numpy()
+        dates = [day.date() for day in df["Game Date"]]
+        urls, teams, labels = list(df["Game URL"].astype(str)), list(df["Team"].astype(str)), list(df["NBA Season"].astype(str))
+
+        if self.last_date is not None and dates[order[0]] < self.last_date:
+            raise ValueError(f"Games from {dates[order[0]]} arrived after {self.last_date}; rebuild the store from scratch")
+        for i in order:
+            state = self._teams.get(teams[i])
+            if state is None:
+                state = self._teams[teams[i]] = _TeamState()
+            state.add(dates[i], urls[i], labels[i], values[i])
+            self._seen.add((urls[i], teams[i]))
+        self.last_date = dates[order[-1]]
+        return len(order)
+
+    def late_rows(self, df: pd.DataFrame) -> np.ndarray:
+        """
+        Mask of the rows in a typed game frame that update() can't take: not seen yet, but dated
+        before last_date (e.g. a game re-scraped after a failed run). See rebuild_teams().
+        """
+        if self.last_date is None:
+            return np.zeros(len(df), dtype=bool)
+        late = np.array(df["Game Date"] < pd.Timestamp(self.last_date), dtype=bool)
+        late[late] = [(url, team) not in self._seen
+                      for url, team in zip(df["Game URL"][late].astype(str), df["Team"][late].astype(str))]
+        return late
+
+    def rebuild_teams(self, teams, rows) -> int:
+        """
+        Replace the state of `teams` with state built from `rows`, which must hold every game
+        those teams played (both rows of each, so opponent points can be derived), in any
+        order. Other teams are untouched. Returns the team games added that weren't seen before.
+        """
+        teams = set(teams)
+        fresh = FeatureStore()
+        fresh.update(rows)
+        seen = {pair for pair in self._seen if pair[1] not in teams} | {pair for pair in fresh._seen if pair[1] in teams}
+        added = len(seen) - len(self._seen)
+        for team in teams:
+            if team in fresh._teams:
+                self._teams[team] = fresh._teams[team]
+        self._seen = seen
+        self.last_date = max(filter(None, [self.last_date, fresh.last_date]), default=None)
+        return added
+
+    def as_of(self, team: str, day) -> Dict[str, float]:
+        """Features for `team` going into a game on `day`, from its games strictly before that date."""
+        return dict(zip(FEATURE_COLUMNS, self.as_of_vector(team, day).tolist()))
+
+    def as_of_vector(self, team: str, day) -> np.ndarray:
+        """as_of() as a float32 array in FEATURE_COLUMNS order."""
+        day = _to_date(day)
+        state = self._teams.get(team)
+        played = bisect.bisect_left(state.dates, day) if state else 0
+        if not played:
+            vector = np.full(len(FEATURE_COLUMNS), np.nan, dtype=np.float32)
+            vector[_GAMES] = 0
+            return vector
+        vector = state.snapshots[played - 1].copy()
+        if state.seasons[played - 1] != season_for(day):  # First game of a new season: nothing to date yet
+            vector[_SEASON_BLOCK] = np.nan
+            vector[_GAMES] = 0
+        vector[_REST] = min((day - state.dates[played - 1]).days, MAX_REST_DAYS)
+        return vector
+
+    def pregame_frame(self) -> pd.DataFrame:
+        """Every game seen so far with each team's pre-game features, for training."""
+        frames = []
+        for team, state in sorted(self._teams.items()):
+            if not state.snapshots:
+                continue
+            after = np.vstack(state.snapshots)
+            before = np.vstack([np.full((1, after.shape[1]), np.nan, dtype=np.float32), after[:-1]])
+            new_season = np.array([True] + [a != b for a, b in zip(state.seasons[1:], state.seasons[:-1])])
+            before[new_season, _SEASON_BLOCK] = np.nan
+            before[new_season, _GAMES] = 0
+            dates = np.array(state.dates, dtype="datetime64[D]")
+            before[1:, _REST] = np.minimum((dates[1:] - dates[:-1]).astype(np.float32), MAX_REST_DAYS)
+            frame = pd.DataFrame(before, columns=FEATURE_COLUMNS)
+            frame.insert(0, "Game URL", state.urls)
+            frame.insert(1, "Game Date", pd.to_datetime(dates))
+            frame.insert(2, "NBA Season", state.seasons)
+            frame.insert(3, "Team", team)
+            frames.append(frame)
+        if not frames:
+            return pd.DataFrame(columns=["Game URL", "Game Date", "NBA Season", "Team"] + FEATURE_COLUMNS)
+        df = pd.concat(frames, ignore_index=True)
+        return df.sort_values(["Game Date", "Game URL", "Team"], kind="stable").reset_index(drop=True)
+
+    def teams(self) -> List[str]:
+        return sorted(self._teams)
+
+    def save(self, path: str = STATE_FILE) -> None:
+        """Pickle the state as plain containers, so it loads whether this module ran as a script or was imported."""
+        state = {
+            "stats": STATS, "windows": WINDOWS, "halflife": EWM_HALFLIFE,
+            "teams": {team: vars(team_state) for team, team_state in self._teams.items()},
+            "seen": self._seen, "last_date": self.last_date,
+        }
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "wb") as file:
+            pickle.dump(state, file, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str = STATE_FILE) -> "FeatureStore":
+        with open(path, "rb") as file:
+            state = pickle.load(file)
+        if (state["stats"], state["windows"], state["halflife"]) != (STATS, WINDOWS, EWM_HALFLIFE):
+            raise ValueError(f"{path} was built with different feature settings; rebuild it")
+        store = cls()
+        for team, attributes in state["teams"].items():
+            team_state = store._teams[team] = _TeamState()
+            vars(team_state).update(attributes)
+        store._seen, store.last_date = state["seen"], state["last_date"]
+        return store
+
+
+def update_from_dataset(store: FeatureStore, root: str = GAMES_DIR) -> int:
+    """
+    Feed the store every game in the Parquet dataset it hasn't seen, season by season. Unseen
+    games older than the store's latest (re-scraped after a failure, say) can't be appended in
+    date order; they are counted, logged, and the teams that played them are rebuilt from the
+    whole dataset.
+    """
+    added = 0
+    late_teams, late_rows = set(), 0
+    for season in seasons(root):
+        df = read_season(root, season, GAME_ROW_COLUMNS)
+        df = df[df["Game Date"].notna()]
+        late = store.late_rows(df)
+        if late.any():
+            late_teams.update(df["Team"][late].astype(str))
+            late_rows += int(late.sum())
+            df = df[~late]
+        added += store.update(df)
+
+    if late_teams:
+        logging.warning(f"⚠️ {late_rows} team games arrived after the store had moved past their date; "
+                        f"rebuilding {len(late_teams)} teams: {', '.join(sorted(late_teams))}")
+        frames = []
+        for season in seasons(root):
+            df = read_season(root, season, GAME_ROW_COLUMNS)
+            played = df.loc[df["Team"].astype(str).isin(late_teams), "Game URL"].unique()
+            frames.append(df[df["Game URL"].isin(played)])  # Opponents' rows too, for Opp PTS
+        added += store.rebuild_teams(late_teams, concat(frames))
+    return added
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build or update the rolling team-feature store from the game rows.")
+    parser.add_argument("--games", default=GAMES_DIR, help="Parquet dataset written by ParquetSink")
+    parser.add_argument("--state", default=STATE_FILE, help="Store to update in place (created if missing)")
+    parser.add_argument("--pregame", help="Also write every game's pre-game features to this Parquet file")
+    parser.add_argument("--team", help="Print this team's features...")
+    parser.add_argument("--date", default=date.today().isoformat(), help="...going into a game on this date")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+    store = FeatureStore.load(args.state) if os.path.exists(args.state) else FeatureStore()
+    added = update_from_dataset(store, args.games)
+    store.save(args.state)
+    logging.info(f"✅ Added {added} team games; {len(store.teams())} teams, latest game {store.last_date}")
+
+    if args.pregame:
+        store.pregame_frame().to_parquet(args.pregame, index=False)
+    if args.team:
+        for name, value in store.as_of(args.team, args.date).items():
+            print(f"{name:<20}{value:>10.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+import sys
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from boxscore_parser import COLUMNS, PLAYER_COLUMNS, PLAYER_STAT_COLUMNS, STAT_COLUMNS
+
+# ✅ Declared types for the team game rows extract_nba_stats produces
+SCHEMA_VERSION = "1"  # Stored in each Parquet part's metadata; bump when a dtype below changes
+MISSING_VALUES = ["N/A", ""]
+
+TEXT_COLUMNS = ["Game URL"]
+DATE_COLUMNS = ["Game Date"]
+CATEGORY_COLUMNS = ["NBA Season", "Home Team", "Away Team", "Team"]  # A few dozen distinct values each
+
+
+def _is_count(source, data_stat):
+    """Counts (makes, attempts, rebounds, points, +/-...) fit in int16; rates, percentages and ratings are float32."""
+    return source == "line_score" or (source == "basic" and not data_stat.endswith("_pct") and data_stat != "mp")
+
+
+COUNT_COLUMNS = [name for name, source, data_stat in STAT_COLUMNS if _is_count(source, data_stat)]
+RATE_COLUMNS = [name for name, _, _ in STAT_COLUMNS if name not in COUNT_COLUMNS]
+
+DTYPES = {
+    **{name: "str" for name in TEXT_COLUMNS},  # Arrow-backed strings on pandas 3, object before
+    **{name: "datetime64[ns]" for name in DATE_COLUMNS},
+    **{name: "category" for name in CATEGORY_COLUMNS},
+    **{name: "Int16" for name in COUNT_COLUMNS},  # Nullable, so a missing stat is <NA> rather than a sentinel
+    **{name: "float32" for name in RATE_COLUMNS},
+}
+assert set(DTYPES) == set(COLUMNS), "every output column needs a declared dtype"
+
+# ✅ Declared types for the player lines parse_game_with_players produces
+MINUTES_COLUMNS = ["MP"]  # "34:12" on the page, decimal minutes (34.2) once typed
+PLAYER_DTYPES = {
+    "Game URL": "str",
+    "Game Date": "datetime64[ns]",
+    "NBA Season": "category",
+    "Team": "category",
+    "Player ID": "category",  # A few hundred players a season, each repeated every game
+    "Player": "category",
+    "Starter": "boolean",
+    "Status": "category",
+    **{name: "float32" if name in MINUTES_COLUMNS or not _is_count(source, data_stat) else "Int16"
+       for name, source, data_stat in PLAYER_STAT_COLUMNS},
+}
+assert set(PLAYER_DTYPES) == set(PLAYER_COLUMNS), "every player column needs a declared dtype"
+
+
+def empty_frame(columns: Optional[List[str]] = None, dtypes: Dict[str, str] = DTYPES) -> pd.DataFrame:
+    return pd.DataFrame({name: pd.Series(dtype=dtypes[name]) for name in columns or list(dtypes)})
+
+
+def to_typed_frame(rows, dtypes: Dict[str, str] = DTYPES) -> pd.DataFrame:
+    """
+    Convert raw extracted rows (a DataFrame, list of row dicts or dict of columns, cells as
+    page text) to the declared dtypes in one vectorized pass per column. 'N/A' and blank cells
+    become nulls. Columns already in their declared dtype are left alone, so typed frames pass
+    straight through.
+    """
+    df = rows if isinstance(rows, pd.DataFrame) else pd.DataFrame(rows, columns=list(dtypes))
+    typed = {}
+    for name in df.columns:
+        column = df[name]
+        dtype = dtypes.get(name)
+        if dtype is None or _is_typed(column, dtype):
+            typed[name] = column
+        elif dtype == "str":
+            typed[name] = column.astype(dtype)
+        elif dtype.startswith("datetime64"):
+            typed[name] = pd.to_datetime(column.replace(MISSING_VALUES, np.nan), format="%Y-%m-%d", errors="coerce")
+        elif dtype in ("category", "boolean"):
+            typed[name] = column.replace(MISSING_VALUES, np.nan).astype(dtype)
+        elif name in MINUTES_COLUMNS and not pd.api.types.is_numeric_dtype(column.dtype):
+            parts = column.astype("str").str.extract(r"^(\d+):(\d+)$").astype("float64")
+            typed[name] = (parts[0] + parts[1] / 60).astype(dtype)
+        else:
+            values = column if pd.api.types.is_numeric_dtype(column.dtype) else \
+                pd.to_numeric(column.replace(MISSING_VALUES, np.nan), errors="coerce")
+            if dtype == "Int16":
+                values = values.round().astype("Int16")
+            typed[name] = values.astype(dtype)
+    return pd.DataFrame(typed, index=df.index)
+
+
+def csv_options(dtypes: Dict[str, str] = DTYPES) -> dict:
+    """
+    pd.read_csv keyword arguments for a CSV of game rows: stat columns are parsed to numbers by
+    the C parser as the file is read, so to_typed_frame afterwards only has cheap casts left.
+    """
+    numeric = {name for name, dtype in dtypes.items() if dtype in ("Int16", "float32") and name not in MINUTES_COLUMNS}
+    return {
+        "dtype": {name: "float64" if name in numeric else "str" for name in dtypes},
+        "na_values": MISSING_VALUES,
+        "keep_default_na": False,
+    }
+
+
+def _is_typed(column: pd.Series, dtype: str) -> bool:
+    if dtype == "str":
+        return pd.api.types.is_string_dtype(column.dtype)
+    if dtype.startswith("datetime64"):
+        return pd.api.types.is_datetime64_any_dtype(column.dtype)  # Any unit
+    if dtype == "category":
+        return isinstance(column.dtype, pd.CategoricalDtype)
+    return str(column.dtype) == dtype
+
+
+def concat(frames: Iterable[pd.DataFrame]) -> pd.DataFrame:
+    """pd.concat for typed frames; categoricals with different categories come back as categoricals, not object."""
+    df = pd.concat(list(frames), ignore_index=True)
+    for name in df.columns:
+        if (DTYPES.get(name) == "category" or PLAYER_DTYPES.get(name) == "category") and df[name].dtype != "category":
+            df[name] = df[name].astype("category")
+    return df
+
+
+def bytes_per_row(df: pd.DataFrame) -> float:
+    return df.memory_usage(deep=True, index=False).sum() / max(len(df), 1)
+
+
+if __name__ == "__main__":
+    # Usage: python game_schema.py saved_page.html [saved_page.html ...]
+    # Compares in-memory size of the raw string rows against the typed frame
+    from boxscore_parser import extract_nba_stats
+
+    frames = []
+    for path in sys.argv[1:]:
+        with open(path, "r", encoding="utf-8") as file:
+            frames.append(extract_nba_stats(file.read(), path))
+    raw = pd.concat(frames, ignore_index=True)
+    typed = to_typed_frame(raw)
+    typed_size = bytes_per_row(typed)
+    for label, frame in (("object strings", raw.astype(object)), (f"{raw.dtypes.iloc[-1]} strings", raw)):
+        print(f"{len(raw)} rows as {label}: {bytes_per_row(frame):,.0f} bytes/row; typed {typed_size:,.0f} bytes/row "
+              f"({bytes_per_row(frame) / typed_size:.1f}x smaller)")
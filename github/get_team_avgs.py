@@ -1,8 +1,28 @@
+import argparse
 import os
+import time
+from datetime import date
 import requests
 import pandas as pd
 from bs4 import BeautifulSoup
-from sqlalchemy import create_engine
+from sqlalchemy import Boolean, create_engine, inspect, text
+
+from boxscore_parser import season_for
+from page_cache import PageCache
+from rate_limiter import per_interval
+
+# ✅ Settings
+LEAGUE_URL = "https://www.basketball-reference.com/leagues/NBA_{year}.html"
+TABLE_IDS = ["per_game-team", "advanced-team"]
+CACHE_DIR = "page_cache"
+CACHE_TTL = 6 * 3600  # Seconds before the current season's page is fetched again; finished seasons never expire
+SLEEP_BETWEEN_REQUESTS = 3.5  # Same pace as the box score scrapers
+RETRY_LIMIT = 3
+TIMEOUT = 10
+TABLE_NAME = "team_average"
+SCHEMA = "nba"
+KEY_COLUMNS = ["NBA Season", "Team"]
+PLAYOFF_MARK = "*"  # The site appends it to a team's name once it clinches a playoff spot
 
 
 def get_team_stats(url: str, table_id: str) -> pd.DataFrame:
@@ -11,84 +31,213 @@ def get_team_stats(url: str, table_id: str) -> pd.DataFrame:
     """
     response = requests.get(url, timeout=10)
     response.raise_for_status()  # Ensure we got a valid response
-    
-    soup = BeautifulSoup(response.text, 'html.parser')
+
+    return parse_team_stats(response.text, table_id)
+
+def parse_team_stats(html: str, table_id: str, parser: str = 'html.parser') -> pd.DataFrame:
+    """
+    Parse the specified stats table out of an already-fetched page. `parser` is the
+    BeautifulSoup tree builder ('html.parser' or 'lxml').
+    """
+    return parse_team_tables(html, [table_id], parser)[table_id]
+
+def parse_team_tables(html: str, table_ids, parser: str = 'html.parser') -> dict:
+    """
+    Parse several stats tables out of one page with a single BeautifulSoup parse.
+    Returns {table_id: DataFrame}.
+    """
+    soup = BeautifulSoup(html, parser)
+    return {table_id: _table_frame(soup, table_id) for table_id in table_ids}
+
+def _table_frame(soup: BeautifulSoup, table_id: str) -> pd.DataFrame:
     table = soup.find('table', {'id': table_id})
-    
+
     if not table:
         raise ValueError(f"Table with id '{table_id}' not found on the page.")
 
     # Extract headers: Use visible column names from <th> elements
     headers = []
     data_stat_map = {}
-    
+
     for th in table.find('thead').find_all('th'):
         data_stat = th.get('data-stat', '').strip()
         column_name = th.text.strip()  # Use the actual column name from the webpage
-        
+
         if data_stat:  # Ensure we only include columns with a valid data-stat
             headers.append(column_name)
             data_stat_map[data_stat] = column_name  # Map data-stat to column names
-    
+
     # Extract table rows using 'data-stat' mapping
     rows = []
     for row in table.find('tbody').find_all('tr'):
         row_data = {column_name: None for column_name in headers}  # Initialize with None
-        
+
         for td in row.find_all(['th', 'td']):
             data_stat = td.get('data-stat', '').strip()
             if data_stat in data_stat_map:  # Ensure only valid columns are included
                 row_data[data_stat_map[data_stat]] = td.text.strip()
-        
+
         rows.append(row_data)
 
     # Create DataFrame with corrected column names
     df = pd.DataFrame(rows, columns=headers)
-    
+
     return df
 
-def main():
-    base_url = "https://www.basketball-reference.com/leagues/NBA_2025.html"
-    
-    # Fetch per-game stats using exact column names
-    per_game_df = get_team_stats(base_url, "per_game-team")
-
-    # Fetch advanced stats using exact column names
-    advanced_df = get_team_stats(base_url, "advanced-team")
-    
+def build_team_averages(html: str, season: str) -> pd.DataFrame:
+    """
+    Merge the per-game and advanced team tables of one league page into one row per team,
+    tagged with its season ("2024-2025").
+    """
+    tables = parse_team_tables(html, TABLE_IDS)
+    per_game_df, advanced_df = tables["per_game-team"], tables["advanced-team"]
+
     # Merge both DataFrames on the 'Team' column
     merged_df = pd.merge(per_game_df, advanced_df, on='Team', how='inner', suffixes=('_PerGame', '_Advanced'))
-    
+
     # Drop unwanted columns
     columns_to_drop = ["Rk_PerGame", "Offense Four Factors", "Defense Four Factors", "Rk_Advanced", "Arena", "Attend.", "Attend./G"]
     merged_df.drop(columns=[col for col in columns_to_drop if col in merged_df.columns], inplace=True)
-    
+
     # Drop fully blank columns
     merged_df.dropna(axis=1, how='all', inplace=True)
-    
+
     # Drop columns with blank column names
     merged_df = merged_df.loc[:, merged_df.columns.notnull()]
     merged_df.columns = [col if col else f"Unnamed_{i}" for i, col in enumerate(merged_df.columns)]
     merged_df = merged_df.iloc[:, :-5]
 
-    
+    # Key on the bare name, so a team that clinches mid-season updates its row instead of adding "Boston Celtics*"
+    team = merged_df["Team"].str.strip()
+    merged_df["Team"] = team.str.rstrip(PLAYOFF_MARK).str.rstrip()
+    merged_df.insert(merged_df.columns.get_loc("Team") + 1, "Playoffs", team.str.endswith(PLAYOFF_MARK))
+
+    merged_df.insert(0, "NBA Season", season)
+    return merged_df
+
+def fetch_league_page(year: int, cache: PageCache, limiter) -> str:
+    """
+    Return the NBA_{year}.html page, from the cache when fresh enough. Network attempts take
+    a token from `limiter`; cache hits don't.
+    """
+    url = LEAGUE_URL.format(year=year)
+    finished = year < int(season_for(date.today()).split("-")[1])
+
+    def download(url):
+        for attempt in range(RETRY_LIMIT):
+            limiter.acquire()
+            try:
+                response = requests.get(url, timeout=TIMEOUT)
+                if response.status_code in (200, 404):
+                    return response.status_code, response.text
+                print(f"⚠️ Attempt {attempt+1}: {url} returned {response.status_code}")
+            except requests.RequestException as e:
+                print(f"⚠️ Attempt {attempt+1}: Network error for {url}: {e}")
+        raise RuntimeError(f"Failed to retrieve {url} after {RETRY_LIMIT} attempts.")
+
+    page = cache.fetch(url, download, max_age=None if finished else CACHE_TTL)
+    if page.status != 200:
+        raise RuntimeError(f"{url} returned {page.status}")
+    print(f"{'📦 Cached' if page.from_cache else '🌐 Fetched'} {url}")
+    return page.text
+
+def get_team_averages(years, cache_dir: str = CACHE_DIR) -> pd.DataFrame:
+    """Team averages for every season in `years` (end years, e.g. 2025 for 2024-25), one fetch per season."""
+    cache = PageCache(cache_dir)
+    limiter = per_interval(SLEEP_BETWEEN_REQUESTS)
+    frames = []
+    for year in years:
+        frames.append(build_team_averages(fetch_league_page(year, cache, limiter), f"{year - 1}-{year}"))
+    return pd.concat(frames, ignore_index=True)
+
+def upsert_team_averages(engine, df: pd.DataFrame, table: str = TABLE_NAME, schema: str = SCHEMA) -> None:
+    """
+    Write `df` into `table` keyed on (NBA Season, Team): rows for a key already there are
+    updated, new keys are inserted, and other seasons are left alone. Rows go through a
+    staging table, then one MERGE (SQL Server) or DELETE + INSERT (other databases) in a
+    single transaction. Columns a season adds (older seasons lack some) are added to the table.
+    Rows an older load keyed on a playoff-marked name ("Boston Celtics*") are removed for the
+    seasons being written.
+    """
+    preparer = engine.dialect.identifier_preparer
+    qualified = lambda name: f"{preparer.quote(schema)}.{preparer.quote(name)}" if schema else preparer.quote(name)
+    staging = f"{table}_staging"
+    columns = list(df.columns)
+
+    inspector = inspect(engine)
+    if inspector.has_table(table, schema=schema):
+        existing = {column["name"]: column["type"] for column in inspector.get_columns(table, schema=schema)}
+        if not set(KEY_COLUMNS) <= set(existing):
+            # Written by the old replace-everything load, with no season to key on
+            print(f"⚠️ {qualified(table)} has no {KEY_COLUMNS} key; recreating it once")
+            df.head(0).to_sql(table, engine, schema=schema, if_exists="replace", index=False)
+        else:
+            text_type = engine.dialect.type_compiler.process(existing["Team"])  # Every scraped column is text but the flag
+            flag_type = engine.dialect.type_compiler.process(Boolean())
+            with engine.begin() as conn:
+                for column in columns:
+                    if column not in existing:
+                        column_type = flag_type if df[column].dtype == bool else text_type
+                        conn.execute(text(f"ALTER TABLE {qualified(table)} ADD {preparer.quote(column)} {column_type}"))
+    else:
+        df.head(0).to_sql(table, engine, schema=schema, index=False)
+
+    quoted = [preparer.quote(column) for column in columns]
+    key_match = " AND ".join(f"t.{preparer.quote(key)} = s.{preparer.quote(key)}" for key in KEY_COLUMNS)
+    with engine.begin() as conn:
+        df.to_sql(staging, conn, schema=schema, if_exists="replace", index=False)
+        if engine.dialect.name == "mssql":
+            updates = ", ".join(f"t.{column} = s.{column}" for column, name in zip(quoted, columns) if name not in KEY_COLUMNS)
+            conn.execute(text(
+                f"MERGE {qualified(table)} AS t USING {qualified(staging)} AS s ON {key_match} "
+                f"WHEN MATCHED THEN UPDATE SET {updates} "
+                f"WHEN NOT MATCHED THEN INSERT ({', '.join(quoted)}) VALUES ({', '.join('s.' + column for column in quoted)});"
+            ))
+        else:
+            conn.execute(text(
+                f"DELETE FROM {qualified(table)} WHERE EXISTS "
+                f"(SELECT 1 FROM {qualified(staging)} AS s WHERE "
+                + " AND ".join(f"{qualified(table)}.{preparer.quote(key)} = s.{preparer.quote(key)}" for key in KEY_COLUMNS) + ")"
+            ))
+            conn.execute(text(f"INSERT INTO {qualified(table)} ({', '.join(quoted)}) SELECT {', '.join(quoted)} FROM {qualified(staging)}"))
+        season, team = preparer.quote("NBA Season"), preparer.quote("Team")
+        conn.execute(text(
+            f"DELETE FROM {qualified(table)} WHERE {team} LIKE :marked "
+            f"AND {season} IN (SELECT DISTINCT {season} FROM {qualified(staging)})"
+        ), {"marked": f"%{PLAYOFF_MARK}"})
+        conn.execute(text(f"DROP TABLE {qualified(staging)}"))
+
+def main():
+    current = int(season_for(date.today()).split("-")[1])
+    parser = argparse.ArgumentParser(description="Scrape league team averages and upsert them into nba.team_average.")
+    parser.add_argument("--seasons", type=int, nargs="+", default=[current],
+                        help="Season end years, e.g. 2024 2025 (default: the current season)")
+    parser.add_argument("--cache-dir", default=CACHE_DIR)
+    parser.add_argument("--database-url", default=None, help="SQLAlchemy URL (default: the RDS instance)")
+    args = parser.parse_args()
+
+    start_time = time.time()
+    merged_df = get_team_averages(args.seasons, args.cache_dir)
+
     # Save merged DataFrame to a single CSV
     csv_filename = "nba_team_stats.csv"
     merged_df.to_csv(csv_filename, index=False)
     print(f"NBA team stats saved to {csv_filename}")
-    
+
     # Database connection using SQLAlchemy for SQL Server with environment variables
     db_user = "admin"
-    db_password = "db-nbaData" 
+    db_password = "db-nbaData"
     db_server = "db-nbadata.croa2u08kkti.us-east-1.rds.amazonaws.com"
     db_name = "nba_data"
-    
-    database_url = f"mssql+pymssql://{db_user}:{db_password}@{db_server}/{db_name}"
+
+    database_url = args.database_url or f"mssql+pymssql://{db_user}:{db_password}@{db_server}/{db_name}"
     engine = create_engine(database_url)
-    
-    # Insert data into the database (schema: nba, table: team_average, replace if exists)
-    merged_df.to_sql("team_average", engine, schema="nba", if_exists="replace", index=False)
-    print("Data successfully inserted into the nba.team_average table.")
+
+    # Upsert into nba.team_average keyed on (season, team); other seasons are untouched
+    schema = SCHEMA if engine.dialect.name != "sqlite" else None
+    upsert_team_averages(engine, merged_df, schema=schema)
+    print(f"Data for {len(args.seasons)} season(s) upserted into the {SCHEMA}.{TABLE_NAME} table "
+          f"in {round(time.time() - start_time, 2)} seconds.")
 
 if __name__ == "__main__":
     main()
@@ -10,58 +10,98 @@ driver = "{ODBC Driver 17 for SQL Server}"  # Ensure this matches your system
 # ✅ File Path for URLs
 file_path = "boxscore_urls.txt"  # Ensure this file is in the correct directory
 
-print("🚀 Starting the URL insertion process...")
-
-# ✅ Read URLs from File
-try:
-    with open(file_path, "r") as file:
-        urls = [line.strip() for line in file if line.strip()]
-    print(f"✅ Loaded {len(urls)} URLs from the file.")
-except FileNotFoundError:
-    print("❌ Error: The file nba_urls.txt was not found.")
-    exit()
-
-
-# ✅ Initialize connection variables
-conn = None
-cursor = None
-
-# ✅ Connect to RDS
-try:
-    print("🔗 Connecting to AWS RDS...")
-    conn = pyodbc.connect(
-        f"DRIVER={driver};SERVER={server};DATABASE={database};UID={username};PWD={password}"
-    )
+# ✅ Batch Settings
+CHUNK_SIZE = 5000  # URLs per staged batch; each batch is its own transaction
+
+# ✅ One-off: makes the NOT EXISTS check an index seek and stops concurrent runs from duplicating URLs
+UNIQUE_URL_DDL = "CREATE UNIQUE INDEX ux_game_urls_game_url ON nba.game_urls (game_url);"
+
+STAGING_DDL = "CREATE TABLE #game_urls_staging (game_url NVARCHAR(450) NOT NULL PRIMARY KEY);"
+MERGE_SQL = """
+INSERT INTO nba.game_urls (game_url)
+SELECT s.game_url
+FROM #game_urls_staging AS s
+WHERE NOT EXISTS (SELECT 1 FROM nba.game_urls AS g WHERE g.game_url = s.game_url);
+"""
+
+
+def load_urls(path):
+    """Read URLs, dropping blanks and repeats (the spider appends to the file across runs)."""
+    with open(path, "r") as file:
+        lines = [line.strip() for line in file if line.strip()]
+    urls = list(dict.fromkeys(lines))  # De-duplicate, keeping first-seen order
+    print(f"✅ Loaded {len(lines)} lines, {len(urls)} unique URLs ({len(lines) - len(urls)} repeats dropped).")
+    return urls
+
+
+def insert_urls(conn, urls, chunk_size=CHUNK_SIZE):
+    """
+    Insert URLs that aren't already in nba.game_urls.
+
+    Each chunk is bulk-copied into a session temp table with fast_executemany, then moved
+    across with one INSERT ... WHERE NOT EXISTS and committed. A failing chunk is rolled
+    back on its own, so earlier chunks stay committed and re-running skips them.
+    """
     cursor = conn.cursor()
-    print("✅ Connected to RDS successfully!")
-except Exception as e:
-    print(f"❌ Connection failed: {e}")
-    exit()
+    cursor.fast_executemany = True
+    cursor.execute(STAGING_DDL)
+    conn.commit()
 
-# ✅ Insert URLs into RDS
-inserted_count = 0
-failed_count = 0
+    inserted_count = 0
+    failed_count = 0
+    for start in range(0, len(urls), chunk_size):
+        chunk = urls[start:start + chunk_size]
+        try:
+            cursor.execute("TRUNCATE TABLE #game_urls_staging;")
+            cursor.executemany("INSERT INTO #game_urls_staging (game_url) VALUES (?)", [(url,) for url in chunk])
+            cursor.execute(MERGE_SQL)
+            inserted_count += max(cursor.rowcount, 0)
+            conn.commit()
+            print(f"✅ {start + len(chunk)}/{len(urls)} URLs processed, {inserted_count} new...")
+        except Exception as e:
+            conn.rollback()
+            failed_count += len(chunk)
+            print(f"❌ Failed batch {start + 1}-{start + len(chunk)} → Error: {e}")
 
-print("📤 Inserting URLs into the database...")
+    cursor.execute("DROP TABLE #game_urls_staging;")
+    conn.commit()
+    cursor.close()
+    return inserted_count, failed_count
 
-for index, url in enumerate(urls, start=1):
+
+def main():
+    print("🚀 Starting the URL insertion process...")
+
+    # ✅ Read URLs from File
+    try:
+        urls = load_urls(file_path)
+    except FileNotFoundError:
+        print(f"❌ Error: The file {file_path} was not found.")
+        return
+
+    # ✅ Connect to RDS
     try:
-        cursor.execute(
-            "INSERT INTO nba.game_urls (game_url) VALUES (?)",
-            (url,),
+        print("🔗 Connecting to AWS RDS...")
+        conn = pyodbc.connect(
+            f"DRIVER={driver};SERVER={server};DATABASE={database};UID={username};PWD={password}"
         )
-        inserted_count += 1
-        if index % 1000 == 0:  # Print progress every 1000 rows
-            print(f"✅ {index}/{len(urls)} URLs inserted...")
+        print("✅ Connected to RDS successfully!")
     except Exception as e:
-        failed_count += 1
-        print(f"❌ Failed to insert URL {index}: {url} → Error: {e}")
+        print(f"❌ Connection failed: {e}")
+        return
+
+    # ✅ Insert URLs into RDS
+    print("📤 Inserting URLs into the database...")
+    try:
+        inserted_count, failed_count = insert_urls(conn, urls)
+    finally:
+        conn.close()
+
+    print(f"\n🎯 Process Completed!")
+    print(f"✅ Newly inserted: {inserted_count} URLs")
+    print(f"⏭️ Already present: {len(urls) - inserted_count - failed_count} URLs")
+    print(f"❌ Failed inserts: {failed_count}")
 
-# ✅ Commit and Close Connection
-conn.commit()
-cursor.close()
-conn.close()
 
-print(f"\n🎯 Process Completed!")
-print(f"✅ Successfully inserted: {inserted_count} URLs")
-print(f"❌ Failed inserts: {failed_count}")
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+import argparse
+import logging
+import time
+
+import numpy as np
+import pandas as pd
+
+from feature_store import (EWM_HALFLIFE, FEATURE_COLUMNS, GAME_ROW_COLUMNS, GAMES_DIR, MAX_REST_DAYS, STATS, WINDOWS,
+                           game_stats)
+from game_schema import concat, csv_options, to_typed_frame
+from parquet_sink import read_season, seasons
+from predict import MATCHUP_COLUMNS, TARGET, home_team
+from train_incremental import MATCHUPS_FILE
+
+# ✅ Builder Settings
+KEY_COLUMNS = ["Game URL", "Game Date", "NBA Season"]
+SEASON_COLUMNS = [f"{stat}_season" for stat in STATS] + ["games_season"]
+
+
+def load_games(source: str = GAMES_DIR) -> pd.DataFrame:
+    """Every game row needed for features, from a ParquetSink dataset or a game-row CSV."""
+    if source.endswith(".csv"):
+        return to_typed_frame(pd.read_csv(source, usecols=GAME_ROW_COLUMNS, **csv_options()))
+    return concat(read_season(source, season, GAME_ROW_COLUMNS) for season in seasons(source))
+
+
+def _team_games(rows) -> pd.DataFrame:
+    """Dated, de-duplicated team rows in (Team, Game Date, Game URL) order, with plain string keys."""
+    df = to_typed_frame(rows if isinstance(rows, pd.DataFrame) else pd.DataFrame(rows))
+    df = df[df["Game Date"].notna()].drop_duplicates(["Game URL", "Team"], keep="last")
+    games = pd.DataFrame({name: df[name].astype(str).to_numpy() for name in ["Game URL", "NBA Season", "Team"]})
+    games["Game Date"] = df["Game Date"].to_numpy()
+    games = pd.concat([games, game_stats(df).reset_index(drop=True)], axis=1)
+    return games.sort_values(["Team", "Game Date", "Game URL"], kind="stable", ignore_index=True)
+
+
+def _mean(sums: pd.DataFrame, counts: pd.DataFrame) -> pd.DataFrame:
+    return (sums / counts.to_numpy()).where(counts.to_numpy() > 0)
+
+
+def _pregame(games: pd.DataFrame) -> pd.DataFrame:
+    """
+    FEATURE_COLUMNS going into each row of _team_games(), with whole-column groupby operations:
+    window sums are differences of per-team cumulative sums, the EWM is pandas' grouped ewm
+    (adjust=True, ignore_na=True is the store's running num/den), and everything is shifted
+    one game so a row never sees its own game.
+    """
+    team, team_season = games["Team"], [games["Team"], games["NBA Season"]]
+    stats = games[STATS]
+    filled, valid = stats.fillna(0.0), stats.notna().astype("float64")
+
+    sums, counts = filled.groupby(team).cumsum(), valid.groupby(team).cumsum()
+    blocks = []
+    for n in WINDOWS:
+        window_sums = sums - sums.groupby(team).shift(n, fill_value=0.0)
+        window_counts = counts - counts.groupby(team).shift(n, fill_value=0.0)
+        blocks.append(_mean(window_sums, window_counts).add_suffix(f"_last{n}"))
+    ewm = stats.groupby(team).ewm(halflife=EWM_HALFLIFE, ignore_na=True).mean()
+    blocks.append(ewm.reset_index(level=0, drop=True).sort_index().add_suffix("_ewm"))
+    season = _mean(filled.groupby(team_season).cumsum(), valid.groupby(team_season).cumsum())
+    blocks.append(season.add_suffix("_season"))
+    after = pd.concat(blocks, axis=1)
+    after["games_season"] = games.groupby(team_season).cumcount() + 1.0
+
+    before = after.groupby(team).shift(1)
+    first_of_season = games.groupby(team_season).cumcount().to_numpy() == 0
+    before.loc[first_of_season, SEASON_COLUMNS] = np.nan
+    before.loc[first_of_season, "games_season"] = 0.0
+    before["rest_days"] = games["Game Date"].groupby(team).diff().dt.days.clip(upper=MAX_REST_DAYS)
+    return before[FEATURE_COLUMNS].astype(np.float32)
+
+
+def pregame_features(rows) -> pd.DataFrame:
+    """
+    Every team game with its pre-game features: the same frame as FeatureStore.pregame_frame()
+    for the same rows, built in one vectorized pass instead of game by game.
+    """
+    games = _team_games(rows)
+    features = pd.concat([games[["Game URL", "Game Date", "NBA Season", "Team"]], _pregame(games)], axis=1)
+    return features.sort_values(["Game Date", "Game URL", "Team"], kind="stable", ignore_index=True)
+
+
+def matchup_rows(rows) -> pd.DataFrame:
+    """
+    One row per game with both teams' pre-game features (MATCHUP_COLUMNS) and the home margin.
+    The home team comes from the box score URL (/boxscores/202401150BOS.html); games without
+    both team rows or a final score are dropped. Output order is (Game Date, Game URL).
+    """
+    games = _team_games(rows)
+    features = pd.concat([games[KEY_COLUMNS + ["Team", "PTS"]], _pregame(games)], axis=1)
+    is_home = features["Team"] == features["Game URL"].map(home_team)  # Same rule as train_incremental
+    home = features[is_home].rename(columns={"Team": "Home Team"} | {name: f"home_{name}" for name in FEATURE_COLUMNS})
+    away = features[~is_home].drop(columns=["Game Date", "NBA Season"]).drop_duplicates("Game URL")
+    away = away.rename(columns={"Team": "Away Team"} | {name: f"away_{name}" for name in FEATURE_COLUMNS})
+    matchups = home.merge(away, on="Game URL", suffixes=("_home", "_away"), validate="one_to_one")
+    target = (matchups["PTS_home"] - matchups["PTS_away"]).astype(np.float32).rename(TARGET)
+    matchups = pd.concat([matchups[KEY_COLUMNS + ["Home Team", "Away Team"] + MATCHUP_COLUMNS], target], axis=1)
+    matchups = matchups[target.notna()]
+    return matchups.sort_values(["Game Date", "Game URL"], kind="stable", ignore_index=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the full home-vs-away training matrix from the per-team game rows.")
+    parser.add_argument("--games", default=GAMES_DIR, help="ParquetSink game dataset, or a CSV of game rows")
+    parser.add_argument("--output", default=MATCHUPS_FILE, help="Parquet file, same layout train_incremental.py and sweep.py read")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+    start = time.perf_counter()
+    games = load_games(args.games)
+    loaded = time.perf_counter()
+    matchups = matchup_rows(games)
+    built = time.perf_counter()
+    matchups.to_parquet(args.output, index=False, compression="zstd")
+    logging.info(f"✅ {len(games)} team rows -> {len(matchups)} matchups in {args.output}: "
+                 f"load {loaded - start:.2f}s, build {built - loaded:.2f}s, write {time.perf_counter() - built:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
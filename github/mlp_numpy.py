@@ -0,0 +1,275 @@
+import argparse
+import hashlib
+import json
+import os
+import subprocess
+import sys
+import time
+from datetime import datetime
+from typing import List, Sequence
+
+import numpy as np
+
+# ✅ Engine Settings
+WEIGHTS_FILE = "model.json"  # JSON header; the float32 weight blob sits next to it
+FORMAT = "mlp-float32"
+FORMAT_VERSION = 1
+ALIGN = 16  # float32 elements, so every array in the blob starts on a 64-byte boundary
+TOLERANCE = 1e-3  # Max difference from sklearn, relative to the spread of its predictions
+BENCH_BATCH = 1000
+BENCH_SECONDS = 1.0  # Time spent on each latency measurement
+
+
+def _activate(h: np.ndarray, activation: str) -> np.ndarray:
+    if activation == "relu":
+        return np.maximum(h, 0, out=h)
+    if activation == "tanh":
+        return np.tanh(h, out=h)
+    if activation == "logistic":
+        return np.reciprocal(1 + np.exp(-h, out=h), out=h)
+    return h
+
+
+def fold_scaler(mean: np.ndarray, scale: np.ndarray, weights: np.ndarray, bias: np.ndarray):
+    """
+    Fold StandardScaler into the first layer: ((x - mean) / scale) @ W + b == x @ (W / scale) + (b - (mean / scale) @ W).
+    Computed in float64 before the cast, so folding adds no rounding of its own.
+    """
+    weights, mean, scale = weights.astype(np.float64), mean.astype(np.float64), scale.astype(np.float64)
+    return weights / scale[:, None], bias.astype(np.float64) - (mean / scale) @ weights
+
+
+class MLPFloat32:
+    """
+    Forward pass of a trained MLPRegressor in float32 NumPy, with the StandardScaler folded into the
+    first layer. `fill` replaces NaN inputs before scaling (the scaler mean, so a missing feature
+    scores like predict.predict_matrix scores it). Columns are in the artifact's feature_columns order.
+    """
+
+    def __init__(self, weights: List[np.ndarray], biases: List[np.ndarray], fill: np.ndarray, activation: str = "relu"):
+        self.weights = [np.ascontiguousarray(w, dtype=np.float32) for w in weights]
+        self.biases = [np.ascontiguousarray(b, dtype=np.float32) for b in biases]
+        self.fill = np.ascontiguousarray(fill, dtype=np.float32)
+        self.activation = activation
+        self.feature_columns: List[str] = []
+
+    @classmethod
+    def from_sklearn(cls, scaler, model) -> "MLPFloat32":
+        if model.out_activation_ != "identity":
+            raise ValueError(f"Only regressors (identity output) are supported, not {model.out_activation_}")
+        first_weights, first_bias = fold_scaler(scaler.mean_, scaler.scale_, model.coefs_[0], model.intercepts_[0])
+        return cls([first_weights] + list(model.coefs_[1:]), [first_bias] + list(model.intercepts_[1:]),
+                   scaler.mean_, model.activation)
+
+    @property
+    def n_features(self) -> int:
+        return self.weights[0].shape[0]
+
+    def predict(self, X: np.ndarray) -> np.ndarray:
+        """Predictions for a (rows, features) array, or a single (features,) row."""
+        X = np.asarray(X, dtype=np.float32)
+        single = X.ndim == 1
+        X = X.reshape(1, -1) if single else X
+        missing = np.isnan(X)
+        if missing.any():
+            X = np.where(missing, self.fill, X)
+        h = X
+        last = len(self.weights) - 1
+        for i, (weights, bias) in enumerate(zip(self.weights, self.biases)):
+            h = h @ weights
+            h += bias
+            if i < last:
+                h = _activate(h, self.activation)
+        out = h.ravel() if h.shape[1] == 1 else h
+        return out[0] if single else out
+
+    def save(self, path: str = WEIGHTS_FILE, feature_columns: Sequence[str] = (), **metadata) -> None:
+        """
+        Write the memory-mappable artifact: a JSON header at `path` and one contiguous float32 blob
+        beside it, named after its digest. A new export never rewrites a blob another process
+        has mapped; the header is swapped in atomically and the previous blob unlinked (processes
+        still mapping it keep their pages).
+        """
+        layers, parts, offset = [], [], 0
+        for weights, bias in zip(self.weights, self.biases):
+            weights_offset, offset = offset, _aligned(offset + weights.size)
+            bias_offset, offset = offset, _aligned(offset + bias.size)
+            layers.append({"shape": list(weights.shape), "weights": weights_offset, "bias": bias_offset})
+            parts += [(weights_offset, weights.ravel()), (bias_offset, bias)]
+        blob = np.zeros(offset, dtype="<f4")
+        for start, values in parts:
+            blob[start:start + values.size] = values
+        data = blob.tobytes()
+        digest = hashlib.sha256(data).hexdigest()
+
+        directory = os.path.dirname(os.path.abspath(path))
+        blob_name = f"{os.path.splitext(os.path.basename(path))[0]}.{digest[:12]}.f32"
+        header = {
+            "format": FORMAT,
+            "version": FORMAT_VERSION,
+            "created": datetime.now().isoformat(timespec="seconds"),
+            "feature_columns": list(feature_columns),
+            "activation": self.activation,
+            "fill": self.fill.tolist(),
+            "layers": layers,
+            "blob": blob_name,
+            "blob_bytes": len(data),
+            "blob_sha256": digest,
+            **metadata,
+        }
+        previous = _read_header(path).get("blob") if os.path.exists(path) else None
+        blob_path = os.path.join(directory, blob_name)
+        if not os.path.exists(blob_path):
+            _write_atomic(blob_path, data)
+        _write_atomic(path, json.dumps(header, indent=1).encode("utf-8"))
+        if previous and previous != blob_name and os.path.exists(os.path.join(directory, previous)):
+            os.remove(os.path.join(directory, previous))
+
+    @classmethod
+    def open(cls, path: str = WEIGHTS_FILE, verify: bool = False) -> "MLPFloat32":
+        """
+        Map an artifact written by save(). Only the header is read; the weights are views into a
+        read-only np.memmap of the blob, so processes opening the same artifact share one copy in
+        the page cache. `verify` re-hashes the blob against the header.
+        """
+        header = _read_header(path)
+        if header.get("format") != FORMAT or header.get("version") != FORMAT_VERSION:
+            raise ValueError(f"{path} is not a {FORMAT} v{FORMAT_VERSION} artifact")
+        blob_path = os.path.join(os.path.dirname(os.path.abspath(path)), header["blob"])
+        if os.path.getsize(blob_path) != header["blob_bytes"]:
+            raise ValueError(f"{blob_path} is {os.path.getsize(blob_path)} bytes, header says {header['blob_bytes']}")
+        blob = np.memmap(blob_path, dtype="<f4", mode="r")
+        if verify and hashlib.sha256(blob.tobytes()).hexdigest() != header["blob_sha256"]:
+            raise ValueError(f"{blob_path} does not match its header's digest")
+        weights, biases = [], []
+        for layer in header["layers"]:
+            n_in, n_out = layer["shape"]
+            weights.append(blob[layer["weights"]:layer["weights"] + n_in * n_out].reshape(n_in, n_out))
+            biases.append(blob[layer["bias"]:layer["bias"] + n_out])
+        engine = cls(weights, biases, np.asarray(header["fill"], dtype=np.float32), header["activation"])
+        engine.feature_columns = header["feature_columns"]
+        engine.header = header
+        return engine
+
+
+def _aligned(offset: int) -> int:
+    """Round an offset (in float32 elements) up to the next 64-byte boundary."""
+    return -(-offset // ALIGN) * ALIGN
+
+
+def _read_header(path: str) -> dict:
+    with open(path, "r", encoding="utf-8") as file:
+        return json.load(file)
+
+
+def _write_atomic(path: str, data: bytes) -> None:
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as file:
+        file.write(data)
+    os.replace(tmp_path, path)
+
+
+def export(artifact: dict, path: str = WEIGHTS_FILE) -> MLPFloat32:
+    """Write the memory-mapped artifact for a predict.py (pickled sklearn) artifact."""
+    engine = MLPFloat32.from_sklearn(artifact["scaler"], artifact["model"])
+    engine.save(path, artifact["feature_columns"], target=artifact["target"],
+                scaler={"mean": artifact["scaler"].mean_.tolist(), "scale": artifact["scaler"].scale_.tolist(),
+                        "folded_into_first_layer": True},
+                metrics=artifact.get("metrics", {}))
+    return engine
+
+
+def check(artifact: dict, engine: MLPFloat32, X: np.ndarray, tolerance: float = TOLERANCE) -> float:
+    """Largest difference from the sklearn pipeline on X, relative to the spread of its predictions; raises past `tolerance`."""
+    from predict import predict_matrix
+
+    expected = predict_matrix(artifact, X, artifact["feature_columns"])
+    spread = max(float(np.std(expected)), 1.0)
+    error = float(np.max(np.abs(engine.predict(X) - expected))) / spread
+    if error > tolerance:
+        raise AssertionError(f"float32 engine differs from sklearn by {error:.2e} (relative), above {tolerance:.0e}")
+    return error
+
+
+def _latency(function, seconds: float = BENCH_SECONDS) -> float:
+    """Mean seconds per call over roughly `seconds` of calls."""
+    function()  # Warm up
+    calls, start = 0, time.perf_counter()
+    while True:
+        function()
+        calls += 1
+        elapsed = time.perf_counter() - start
+        if elapsed >= seconds:
+            return elapsed / calls
+
+
+def benchmark(artifact: dict, engine: MLPFloat32, X: np.ndarray) -> dict:
+    """Single-row and batch latency of sklearn (scaler.transform + model.predict) against the NumPy engine."""
+    scaler, model = artifact["scaler"], artifact["model"]
+    row, batch = X[:1].astype(np.float64), X.astype(np.float64)
+    row32, batch32 = X[0].astype(np.float32), X.astype(np.float32)
+    results = {
+        "sklearn_row_us": _latency(lambda: model.predict(scaler.transform(row))) * 1e6,
+        "numpy_row_us": _latency(lambda: engine.predict(row32)) * 1e6,
+        "sklearn_batch_us": _latency(lambda: model.predict(scaler.transform(batch))) * 1e6,
+        "numpy_batch_us": _latency(lambda: engine.predict(batch32)) * 1e6,
+        "batch_rows": len(X),
+    }
+    print(f"{'':<10}{'sklearn µs':>14}{'numpy µs':>12}{'speedup':>10}")
+    for kind in ("row", "batch"):
+        sk, np_ = results[f"sklearn_{kind}_us"], results[f"numpy_{kind}_us"]
+        label = "1 row" if kind == "row" else f"{len(X)} rows"
+        print(f"{label:<10}{sk:>14.1f}{np_:>12.1f}{sk / np_:>9.1f}x")
+    return results
+
+
+def cold_start(model_path: str, engine_path: str, runs: int = 3) -> dict:
+    """
+    Seconds from interpreter start to a loaded model, best of `runs` fresh processes: unpickling the
+    sklearn artifact (imports sklearn) against opening the memory-mapped one (imports only NumPy).
+    """
+    here = os.path.dirname(os.path.abspath(__file__))
+    loads = {
+        "pickle": f"from predict import load_artifact; load_artifact({model_path!r})",
+        "memmap": f"from mlp_numpy import MLPFloat32; MLPFloat32.open({engine_path!r})",
+    }
+    results = {}
+    for name, code in loads.items():
+        times = []
+        for _ in range(runs):
+            start = time.perf_counter()
+            subprocess.run([sys.executable, "-c", f"import sys; sys.path.insert(0, {here!r}); {code}"], check=True)
+            times.append(time.perf_counter() - start)
+        results[name] = min(times)
+    print(f"Cold start: pickle + sklearn {results['pickle'] * 1000:.0f} ms, memmap {results['memmap'] * 1000:.0f} ms")
+    return results
+
+
+def main():
+    from predict import MODEL_FILE, load_artifact
+
+    parser = argparse.ArgumentParser(description="Export the trained MLP to a flat float32 file and check/time the NumPy engine.")
+    parser.add_argument("--model", default=MODEL_FILE, help="Artifact written by predict.py train")
+    parser.add_argument("--output", default=WEIGHTS_FILE)
+    parser.add_argument("--rows", type=int, default=BENCH_BATCH, help="Rows in the batch benchmark")
+    parser.add_argument("--no-bench", action="store_true", help="Export and check only")
+    args = parser.parse_args()
+
+    artifact = load_artifact(args.model)
+    engine = export(artifact, args.output)
+    engine = MLPFloat32.open(args.output, verify=True)  # Check what was written, not what is in memory
+
+    # Inputs drawn around the training distribution the scaler saw; a few features knocked out as missing
+    scaler = artifact["scaler"]
+    rng = np.random.default_rng(0)
+    X = (scaler.mean_ + scaler.scale_ * rng.standard_normal((args.rows, len(scaler.mean_)))).astype(np.float32)
+    X[rng.random(X.shape) < 0.01] = np.nan
+    error = check(artifact, engine, X)
+    print(f"✅ Wrote {args.output}; max difference from sklearn {error:.2e} (relative)")
+    if not args.no_bench:
+        cold_start(args.model, args.output)
+        benchmark(artifact, engine, np.where(np.isnan(X), scaler.mean_, X).astype(np.float32))  # sklearn refuses NaN
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,197 @@
+import gzip
+import hashlib
+import logging
+import os
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from typing import Callable, Iterator, List, Optional, Tuple
+
+# ✅ Cache Settings
+CACHE_DIR = "page_cache"
+MAX_CACHE_BYTES = 8 * 1024 ** 3  # ~8 GB of compressed pages; a box score is ~60 KB gzipped
+CACHEABLE_STATUSES = {200, 404, 410}  # Responses that won't change if we ask again
+COMPRESS_LEVEL = 6
+
+
+@dataclass
+class CachedPage:
+    url: str
+    status: int
+    text: str
+    fetched_at: float
+    from_cache: bool
+
+
+class PageCache:
+    """
+    On-disk cache of raw HTML keyed by URL.
+
+    Bodies are gzip-compressed and stored content-addressed (by SHA-256 of the body)
+    under `directory/blobs`, so identical pages are stored once. A small SQLite index
+    maps each URL to its blob, HTTP status and fetch time, and tracks last access so the
+    cache can be held under `max_bytes` by evicting the least recently used URLs.
+    """
+
+    def __init__(self, directory: str = CACHE_DIR, max_bytes: int = MAX_CACHE_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        os.makedirs(os.path.join(directory, "blobs"), exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(os.path.join(directory, "index.sqlite"), check_same_thread=False)
+        self._db.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS pages (
+                url TEXT PRIMARY KEY,
+                digest TEXT,
+                status INTEGER NOT NULL,
+                fetched_at REAL NOT NULL,
+                last_access REAL NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS blobs (
+                digest TEXT PRIMARY KEY,
+                size INTEGER NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS pages_last_access ON pages (last_access);
+            """
+        )
+        self._total_bytes = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM blobs").fetchone()[0]
+
+    def _blob_path(self, digest: str) -> str:
+        return os.path.join(self.directory, "blobs", digest[:2], f"{digest}.html.gz")
+
+    def get(self, url: str, max_age: Optional[float] = None) -> Optional[CachedPage]:
+        """Return the cached page for `url`, or None if missing or older than `max_age` seconds."""
+        with self._lock:
+            row = self._db.execute(
+                "SELECT digest, status, fetched_at FROM pages WHERE url = ?", (url,)
+            ).fetchone()
+            if row is None:
+                return None
+            digest, status, fetched_at = row
+            if max_age is not None and time.time() - fetched_at > max_age:
+                return None
+            text = ""
+            if digest is not None:
+                try:
+                    with open(self._blob_path(digest), "rb") as file:
+                        text = gzip.decompress(file.read()).decode("utf-8")
+                except (OSError, EOFError) as e:
+                    logging.warning(f"⚠️ Dropping unreadable cache entry for {url}: {e}")
+                    self._delete_url(url)
+                    self._db.commit()
+                    return None
+            self._db.execute("UPDATE pages SET last_access = ? WHERE url = ?", (time.time(), url))
+            self._db.commit()
+        return CachedPage(url, status, text, fetched_at, from_cache=True)
+
+    def put(self, url: str, status: int, text: str) -> None:
+        """Store a response. Only statuses in CACHEABLE_STATUSES are kept; 404s are stored without a body."""
+        if status not in CACHEABLE_STATUSES:
+            return
+        digest = None
+        blob = None
+        if status == 200:
+            body = text.encode("utf-8")
+            digest = hashlib.sha256(body).hexdigest()
+            blob = gzip.compress(body, compresslevel=COMPRESS_LEVEL)
+
+        now = time.time()
+        with self._lock:
+            if digest is not None and self._db.execute(
+                "SELECT 1 FROM blobs WHERE digest = ?", (digest,)
+            ).fetchone() is None:
+                path = self._blob_path(digest)
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+                with open(tmp_path, "wb") as file:
+                    file.write(blob)
+                os.replace(tmp_path, path)
+                self._db.execute("INSERT INTO blobs (digest, size) VALUES (?, ?)", (digest, len(blob)))
+                self._total_bytes += len(blob)
+
+            old = self._db.execute("SELECT digest FROM pages WHERE url = ?", (url,)).fetchone()
+            self._db.execute(
+                "INSERT OR REPLACE INTO pages (url, digest, status, fetched_at, last_access) VALUES (?, ?, ?, ?, ?)",
+                (url, digest, status, now, now),
+            )
+            if old is not None and old[0] != digest:
+                self._release_blob(old[0])
+            self._evict()
+            self._db.commit()
+
+    def fetch(self, url: str, download: Callable[[str], Tuple[int, str]], max_age: Optional[float] = None) -> CachedPage:
+        """
+        Return the page from the cache, or call `download(url) -> (status, text)` and cache the result.
+
+        Rate limiting and retries belong inside `download`, so cache hits never spend a request.
+        """
+        page = self.get(url, max_age=max_age)
+        if page is not None:
+            return page
+        status, text = download(url)
+        self.put(url, status, text)
+        return CachedPage(url, status, text, time.time(), from_cache=False)
+
+    def urls(self, status: int = 200) -> List[str]:
+        """Every cached URL with the given status, in URL order, without reading any bodies."""
+        with self._lock:
+            return [row[0] for row in self._db.execute(
+                "SELECT url FROM pages WHERE status = ? ORDER BY url", (status,)
+            )]
+
+    def iter_pages(self, status: int = 200) -> Iterator[CachedPage]:
+        """Yield every cached page with the given status, in URL order, without touching the network."""
+        for url in self.urls(status):
+            page = self.get(url)
+            if page is not None:
+                yield page
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM pages").fetchone()[0]
+
+    @property
+    def total_bytes(self) -> int:
+        return self._total_bytes
+
+    def _delete_url(self, url: str) -> None:
+        row = self._db.execute("SELECT digest FROM pages WHERE url = ?", (url,)).fetchone()
+        self._db.execute("DELETE FROM pages WHERE url = ?", (url,))
+        if row is not None:
+            self._release_blob(row[0])
+
+    def _release_blob(self, digest: Optional[str]) -> None:
+        """Delete a blob once no URL points at it any more."""
+        if digest is None:
+            return
+        if self._db.execute("SELECT 1 FROM pages WHERE digest = ? LIMIT 1", (digest,)).fetchone():
+            return
+        row = self._db.execute("SELECT size FROM blobs WHERE digest = ?", (digest,)).fetchone()
+        self._db.execute("DELETE FROM blobs WHERE digest = ?", (digest,))
+        if row is not None:
+            self._total_bytes -= row[0]
+        try:
+            os.remove(self._blob_path(digest))
+        except FileNotFoundError:
+            pass
+
+    def _evict(self) -> None:
+        """Drop least recently used URLs until the cache is back under 90% of max_bytes."""
+        if self._total_bytes <= self.max_bytes:
+            return
+        target = int(self.max_bytes * 0.9)
+        evicted = 0
+        while self._total_bytes > target:
+            rows = self._db.execute(
+                "SELECT url FROM pages ORDER BY last_access LIMIT 100"
+            ).fetchall()
+            if not rows:
+                break
+            for (url,) in rows:
+                self._delete_url(url)
+                evicted += 1
+                if self._total_bytes <= target:
+                    break
+        logging.info(f"Evicted {evicted} pages from cache; {self._total_bytes} bytes remain.")
@@ -0,0 +1,168 @@
+import glob
+import logging
+import os
+import threading
+import time
+import uuid
+from datetime import datetime
+from typing import Callable, Dict, Iterable, List, Optional, Sequence
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from game_schema import DTYPES, PLAYER_DTYPES, SCHEMA_VERSION, concat, empty_frame, to_typed_frame
+
+# ✅ Sink Settings
+PARTITION_COLUMN = "NBA Season"
+BUFFER_ROWS = 5000  # Rows held in memory before a part file is written
+FLUSH_SECONDS = 300  # ...or once the oldest buffered row is this old
+COMPRESSION = "zstd"
+UNKNOWN_SEASON = "unknown"  # Partition for rows whose game date couldn't be read
+SCHEMA_KEY = b"game_schema"
+GAME_KEY = ["Game URL", "Team"]  # One row per team per game
+PLAYER_KEY = ["Game URL", "Player ID"]  # One row per player per game
+
+
+def partition_dir(root: str, season: str) -> str:
+    return os.path.join(root, f"season={season}")
+
+
+class ParquetSink:
+    """
+    Buffers game rows and writes them as compressed Parquet, one directory per season.
+    `dtypes` is the declared schema of the rows (game_schema.DTYPES, or PLAYER_DTYPES for player lines).
+
+    Every flush appends a new part file per season touched (root/season=2023-2024/part-*.parquet),
+    so concurrent writers never clash; compact() later folds a season's parts into one file.
+    `on_flush` receives the refs passed to write() once their rows are durably on disk,
+    which is the point at which it is safe to mark those games as scraped.
+    """
+
+    def __init__(self, root: str, on_flush: Optional[Callable[[List], None]] = None,
+                 buffer_rows: int = BUFFER_ROWS, flush_seconds: float = FLUSH_SECONDS,
+                 dtypes: Dict[str, str] = DTYPES):
+        self.root = root
+        self.dtypes = dtypes
+        self.on_flush = on_flush
+        self.buffer_rows = buffer_rows
+        self.flush_seconds = flush_seconds
+        self._frames = []
+        self._refs = []
+        self._rows = 0
+        self._oldest = None
+        self._lock = threading.Lock()
+        os.makedirs(root, exist_ok=True)
+
+    def write(self, rows, refs: Iterable = ()) -> None:
+        """Buffer a DataFrame, list of row dicts or dict of columns laid out as `dtypes`."""
+        df = rows if isinstance(rows, pd.DataFrame) else pd.DataFrame(rows, columns=list(self.dtypes))
+        with self._lock:
+            self._frames.append(df)
+            self._refs.extend(refs)
+            self._rows += len(df)
+            if self._oldest is None:
+                self._oldest = time.monotonic()
+            due = self._rows >= self.buffer_rows or time.monotonic() - self._oldest >= self.flush_seconds
+        if due:
+            self.flush()
+
+    def flush(self) -> None:
+        with self._lock:
+            frames, refs = self._frames, self._refs
+            self._frames, self._refs, self._rows, self._oldest = [], [], 0, None
+            if frames:
+                df = to_typed_frame(pd.concat(frames, ignore_index=True), self.dtypes)  # Typed once per batch
+                stamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+                for season, part in df.groupby(PARTITION_COLUMN, sort=True, observed=True, dropna=False):
+                    directory = partition_dir(self.root, season if pd.notna(season) else UNKNOWN_SEASON)
+                    os.makedirs(directory, exist_ok=True)
+                    path = os.path.join(directory, f"part-{stamp}-{uuid.uuid4().hex[:8]}.parquet")
+                    _write_atomic(part, path)
+                logging.info(f"Wrote {len(df)} rows to {self.root}")
+        if refs and self.on_flush:
+            self.on_flush(refs)
+
+    def close(self) -> None:
+        self.flush()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def _write_atomic(df: pd.DataFrame, path: str) -> None:
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    table = table.replace_schema_metadata({**(table.schema.metadata or {}), SCHEMA_KEY: SCHEMA_VERSION.encode()})
+    tmp_path = f"{path}.tmp"
+    pq.write_table(table, tmp_path, compression=COMPRESSION)
+    os.replace(tmp_path, path)
+
+
+def season_parts(root: str, season: str) -> List[str]:
+    return sorted(glob.glob(os.path.join(partition_dir(root, season), "*.parquet")))
+
+
+def seasons(root: str) -> List[str]:
+    return sorted(
+        os.path.basename(path).split("=", 1)[1]
+        for path in glob.glob(os.path.join(root, "season=*"))
+        if os.path.isdir(path)
+    )
+
+
+def _is_current(path: str) -> bool:
+    metadata = pq.read_schema(path).metadata or {}
+    return metadata.get(SCHEMA_KEY) == SCHEMA_VERSION.encode()
+
+
+def read_season(root: str, season: str, columns: Optional[List[str]] = None,
+                dtypes: Dict[str, str] = DTYPES) -> pd.DataFrame:
+    """
+    Load one season in the declared schema (`dtypes`). Parts written under the current schema are
+    read in a single columnar read; older parts are converted on the way in (compact() rewrites them).
+    """
+    parts = season_parts(root, season)
+    if not parts:
+        return empty_frame(columns, dtypes)
+    current = [part for part in parts if _is_current(part)]
+    frames = [pq.ParquetDataset(current, partitioning=None).read(columns=columns).to_pandas()] if current else []
+    frames += [to_typed_frame(pq.read_table(part, columns=columns).to_pandas(), dtypes) for part in parts if part not in current]
+    return frames[0] if len(frames) == 1 else concat(frames)
+
+
+def compact(root: str, season: Optional[str] = None, dtypes: Dict[str, str] = DTYPES,
+            key: Sequence[str] = GAME_KEY) -> None:
+    """
+    Rewrite each season's part files as one file in the current schema, dropping rows duplicated
+    on `key` (a game re-scraped after a lost lease keeps its latest copy).
+    """
+    for name in [season] if season else seasons(root):
+        parts = season_parts(root, name)
+        if len(parts) <= 1 and all(_is_current(part) for part in parts):
+            continue
+        df = read_season(root, name, dtypes=dtypes)
+        df = df.drop_duplicates(subset=list(key), keep="last")
+        df = df.sort_values(["Game Date", *key], kind="stable").reset_index(drop=True)
+        stamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        path = os.path.join(partition_dir(root, name), f"compacted-{stamp}-{uuid.uuid4().hex[:8]}.parquet")
+        _write_atomic(df, path)
+        for part in parts:
+            os.remove(part)
+        logging.info(f"Compacted {len(parts)} parts of season {name} into {path}")
+
+
+if __name__ == "__main__":
+    # Usage: python parquet_sink.py /mnt/efs/games [season]
+    #        python parquet_sink.py --players /mnt/efs/players [season]
+    import sys
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+    args = sys.argv[1:]
+    if args and args[0] == "--players":
+        args = args[1:]
+        compact(args[0], args[1] if len(args) > 1 else None, PLAYER_DTYPES, PLAYER_KEY)
+    else:
+        compact(args[0], args[1] if len(args) > 1 else None)
@@ -0,0 +1,230 @@
+import argparse
+import glob
+import json
+import os
+import platform
+import re
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+import lxml.html
+from bs4 import BeautifulSoup
+from lxml import etree
+
+from boxscore_parser import extract_nba_stats, extract_nba_stats_soup
+from get_team_avgs import parse_team_stats
+
+# ✅ Bench Settings
+PAGES_DIR = "bench_pages"  # Fixed set of saved pages; see freeze()
+REPEAT = 5  # Timed runs per page and backend; the fastest is kept
+THRESHOLD = 0.10  # Flag a slowdown of more than 10% against the baseline
+BOXSCORE_FILE = re.compile(r"^(\d{4})\d{5}[A-Z]{3}\.html$")
+LEAGUE_FILE = re.compile(r"^NBA_\d{4}\.html$")
+TEAM_TABLES = ["per_game-team", "advanced-team"]
+ERAS = ["no-advanced", "overtime", "modern"]
+ADVANCED_TABLE = re.compile(r'id="box-[^"]+-game-advanced"')
+
+
+def _etl_dchv2():
+    """Import nbaData_etl_dchv2 from the repo root; importing it opens a page cache and log file, so do it in a scratch directory."""
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    cwd = os.getcwd()
+    scratch = tempfile.mkdtemp(prefix="parser-bench-")
+    os.chdir(scratch)
+    try:
+        import nbaData_etl_dchv2
+    finally:
+        os.chdir(cwd)
+        shutil.rmtree(scratch, ignore_errors=True)
+    return nbaData_etl_dchv2
+
+
+def page_era(html):
+    """
+    Bucket a box score page: 'no-advanced' when it has no advanced box score tables (most
+    pre-2000 games), 'overtime' when its line score has periods beyond the fourth, else 'modern'.
+    """
+    if not ADVANCED_TABLE.search(html):
+        return "no-advanced"
+    root = lxml.html.fromstring(html)
+    for comment in root.iter(etree.Comment):
+        if 'id="line_score"' in (comment.text or ""):
+            fragment = lxml.html.fragment_fromstring(comment.text, create_parent="div")
+            for row in fragment.iter("tr"):
+                if any(th.get("data-stat") == "team" for th in row.iter("th")) and len(list(row.iter("td"))) > 5:
+                    return "overtime"
+            break
+    return "modern"
+
+
+def load_pages(directory):
+    """Return ([(name, html, era)] box score pages, [(name, html)] league pages) from `directory`."""
+    boxscores, leagues = [], []
+    for path in sorted(glob.glob(os.path.join(directory, "*.html"))):
+        name = os.path.basename(path)
+        with open(path, "r", encoding="utf-8") as file:
+            html = file.read()
+        if BOXSCORE_FILE.match(name):
+            boxscores.append((name, html, page_era(html)))
+        elif LEAGUE_FILE.match(name):
+            leagues.append((name, html))
+    return boxscores, leagues
+
+
+def benchmarks():
+    """Map 'function[backend]' to a callable taking (html, name); every backend of a function does the same work."""
+    etl = _etl_dchv2()
+    return {
+        "extract_nba_stats[lxml]": lambda html, name: extract_nba_stats(html, name),
+        "extract_nba_stats[bs4-html.parser]": lambda html, name: extract_nba_stats_soup(BeautifulSoup(html, "html.parser"), name),
+        "extract_nba_stats[bs4-lxml]": lambda html, name: extract_nba_stats_soup(BeautifulSoup(html, "lxml"), name),
+        "get_team_stats[bs4-html.parser]": lambda html, name: [parse_team_stats(html, table, "html.parser") for table in TEAM_TABLES],
+        "get_team_stats[bs4-lxml]": lambda html, name: [parse_team_stats(html, table, "lxml") for table in TEAM_TABLES],
+        "process_url_td_scan[bs4-html.parser]": lambda html, name: etl.extract_team_totals(html, "html.parser"),
+        "process_url_td_scan[bs4-lxml]": lambda html, name: etl.extract_team_totals(html, "lxml"),
+    }
+
+
+def time_call(function, html, name, repeat):
+    """Fastest of `repeat` calls in CPU milliseconds; slower runs only measure interference."""
+    samples = []
+    for _ in range(repeat):
+        start = time.process_time()
+        function(html, name)
+        samples.append((time.process_time() - start) * 1000)
+    return min(samples)
+
+
+def run(directory=PAGES_DIR, repeat=REPEAT, only=None):
+    boxscores, leagues = load_pages(directory)
+    results = {}
+    for key, function in benchmarks().items():
+        if only and not any(pattern in key for pattern in only):
+            continue
+        pages = [(name, html, "league") for name, html in leagues] if key.startswith("get_team_stats") else boxscores
+        if not pages:
+            continue
+        per_page = {}
+        by_era = {}
+        for name, html, era in pages:
+            try:
+                per_page[name] = round(time_call(function, html, name, repeat), 3)
+            except Exception as e:
+                print(f"❌ {key} failed on {name}: {e}")
+                continue
+            by_era.setdefault(era, []).append(per_page[name])
+        if not per_page:
+            continue
+        results[key] = {
+            "mean_ms": round(statistics.mean(per_page.values()), 3),
+            "by_era": {era: round(statistics.mean(times), 3) for era, times in sorted(by_era.items())},
+            "pages": per_page,
+        }
+    return {
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "machine": platform.node(),
+        "repeat": repeat,
+        "eras": {name: era for name, _, era in boxscores},
+        "results": results,
+    }
+
+
+def compare(current, baseline, threshold=THRESHOLD):
+    """Return the (key, scope, old_ms, new_ms) entries that got more than `threshold` slower."""
+    slowdowns = []
+    for key, result in current["results"].items():
+        old = baseline.get("results", {}).get(key)
+        if not old:
+            continue
+        scopes = [("all", old["mean_ms"], result["mean_ms"])]
+        scopes += [(era, old["by_era"][era], ms) for era, ms in result["by_era"].items() if era in old.get("by_era", {})]
+        for scope, old_ms, new_ms in scopes:
+            if old_ms and new_ms > old_ms * (1 + threshold):
+                slowdowns.append((key, scope, old_ms, new_ms))
+    return slowdowns
+
+
+def report(current, baseline=None):
+    print(f"{'function[backend]':<40}{'mean ms':>10}" + "".join(f"{era:>13}" for era in ERAS + ["league"])
+          + (f"{'vs base':>10}" if baseline else ""))
+    for key, result in current["results"].items():
+        line = f"{key:<40}{result['mean_ms']:>10.2f}"
+        line += "".join(f"{result['by_era'][era]:>13.2f}" if era in result["by_era"] else f"{'-':>13}" for era in ERAS + ["league"])
+        old = (baseline or {}).get("results", {}).get(key)
+        if old:
+            line += f"{(result['mean_ms'] / old['mean_ms'] - 1) * 100:>+9.1f}%"
+        print(line)
+
+
+def freeze(cache_dir, directory=PAGES_DIR, per_era=5, leagues=2):
+    """
+    Copy a fixed sample out of the page cache into `directory`: up to `per_era` box score pages
+    from each era (oldest first) plus the `leagues` most recent league season pages.
+    """
+    from page_cache import PageCache
+
+    cache = PageCache(cache_dir)
+    os.makedirs(directory, exist_ok=True)
+    picked = {era: 0 for era in ERAS}
+    league_urls = []
+    for url in cache.urls():
+        name = url.rsplit("/", 1)[-1]
+        if LEAGUE_FILE.match(name):
+            league_urls.append(url)
+            continue
+        if not BOXSCORE_FILE.match(name):
+            continue
+        html = cache.get(url).text
+        era = page_era(html)
+        if picked[era] < per_era:
+            picked[era] += 1
+            with open(os.path.join(directory, name), "w", encoding="utf-8") as file:
+                file.write(html)
+    for url in league_urls[-leagues:]:
+        with open(os.path.join(directory, url.rsplit("/", 1)[-1]), "w", encoding="utf-8") as file:
+            file.write(cache.get(url).text)
+    print(f"Saved {picked} box score pages and {len(league_urls[-leagues:])} league pages to {directory}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Time the page parsers on a fixed set of saved pages.")
+    parser.add_argument("--pages", default=PAGES_DIR, help="Directory of saved box score (and NBA_YYYY.html league) pages")
+    parser.add_argument("--repeat", type=int, default=REPEAT)
+    parser.add_argument("--only", nargs="+", help="Run only benchmarks whose name contains one of these")
+    parser.add_argument("--output", help="Write the results as JSON here (e.g. to use as the next baseline)")
+    parser.add_argument("--baseline", help="Earlier results JSON to compare against")
+    parser.add_argument("--threshold", type=float, default=THRESHOLD, help="Relative slowdown that counts as a regression")
+    parser.add_argument("--freeze-from", metavar="CACHE_DIR", help="Populate --pages from a page cache and exit")
+    args = parser.parse_args()
+
+    if args.freeze_from:
+        freeze(args.freeze_from, args.pages)
+        return
+
+    current = run(args.pages, args.repeat, args.only)
+    baseline = None
+    if args.baseline:
+        with open(args.baseline) as file:
+            baseline = json.load(file)
+    report(current, baseline)
+
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(current, file, indent=2)
+
+    if baseline:
+        slowdowns = compare(current, baseline, args.threshold)
+        for key, scope, old_ms, new_ms in slowdowns:
+            print(f"⚠️ {key} ({scope}): {old_ms:.2f} ms -> {new_ms:.2f} ms (+{(new_ms / old_ms - 1) * 100:.0f}%)")
+        if slowdowns:
+            sys.exit(1)
+        print(f"✅ No slowdowns beyond {args.threshold:.0%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,203 @@
+import argparse
+import logging
+import os
+import pickle
+import time
+from datetime import date, datetime
+from typing import Dict, List, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from feature_store import FEATURE_COLUMNS, GAMES_DIR, STATE_FILE, FeatureStore
+from parquet_sink import read_season, seasons
+
+# ✅ Model Settings
+MODEL_FILE = "model.pkl"  # Pickled scaler + MLPRegressor, for retraining and checks
+ENGINE_FILE = "model.json"  # Memory-mapped float32 export of MODEL_FILE, what slate scoring loads
+ARTIFACT_VERSION = 1  # Bump when the artifact layout changes; old artifacts are refused
+TARGET = "home_margin"  # Home points minus away points
+HIDDEN_LAYERS = (100, 50)  # Same network as the notebook
+MAX_ITER = 500
+MATCHUP_COLUMNS = [f"home_{name}" for name in FEATURE_COLUMNS] + [f"away_{name}" for name in FEATURE_COLUMNS]
+
+
+# ✅ Artifact: everything needed to score a feature row, in one file
+def save_artifact(path: str, scaler, model, feature_columns: Sequence[str], **metadata) -> None:
+    import sklearn
+
+    artifact = {
+        "version": ARTIFACT_VERSION,
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "sklearn": sklearn.__version__,
+        "feature_columns": list(feature_columns),
+        "target": TARGET,
+        "scaler": scaler,
+        "model": model,
+        **metadata,
+    }
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as file:
+        pickle.dump(artifact, file, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp_path, path)
+
+
+def load_artifact(path: str = MODEL_FILE) -> dict:
+    import sklearn
+
+    with open(path, "rb") as file:
+        artifact = pickle.load(file)
+    if artifact.get("version") != ARTIFACT_VERSION:
+        raise ValueError(f"{path} is artifact version {artifact.get('version')}, expected {ARTIFACT_VERSION}; retrain it")
+    if artifact["sklearn"] != sklearn.__version__:
+        logging.warning(f"⚠️ {path} was saved with scikit-learn {artifact['sklearn']}, running {sklearn.__version__}")
+    return artifact
+
+
+# ✅ Features
+def matchup_matrix(store: FeatureStore, games: Sequence[Tuple[str, str]], day) -> np.ndarray:
+    """One MATCHUP_COLUMNS row per (home, away) game on `day`, from each team's features going into that day."""
+    X = np.empty((len(games), len(MATCHUP_COLUMNS)), dtype=np.float32)
+    width = len(FEATURE_COLUMNS)
+    for i, (home, away) in enumerate(games):
+        X[i, :width] = store.as_of_vector(home, day)
+        X[i, width:] = store.as_of_vector(away, day)
+    return X
+
+
+def predict_matrix(artifact: dict, X: np.ndarray, columns: Sequence[str] = MATCHUP_COLUMNS) -> np.ndarray:
+    """
+    Score every row of X in one call. Columns are put in the artifact's order first; features a
+    team doesn't have yet (NaN, e.g. season averages before its first game) are scored at the
+    training mean.
+    """
+    order = [list(columns).index(name) for name in artifact["feature_columns"]]
+    scaled = artifact["scaler"].transform(X[:, order])  # StandardScaler passes NaN through
+    scaled[np.isnan(scaled)] = 0.0
+    return artifact["model"].predict(scaled)
+
+
+def load_model(path: str = ENGINE_FILE):
+    """
+    A scorer with .feature_columns and .predict(X): the memory-mapped float32 engine for a .json
+    header (no sklearn import, near-instant), otherwise the pickled sklearn artifact.
+    """
+    if path.endswith(".json"):
+        from mlp_numpy import MLPFloat32
+
+        return MLPFloat32.open(path)
+    return _SklearnModel(load_artifact(path))
+
+
+class _SklearnModel:
+    def __init__(self, artifact: dict):
+        self.artifact = artifact
+        self.feature_columns = artifact["feature_columns"]
+
+    def predict(self, X: np.ndarray) -> np.ndarray:
+        return predict_matrix(self.artifact, X, self.feature_columns)
+
+
+def home_team(url: str) -> str:
+    """Home team abbreviation from a box score URL: /boxscores/202401150BOS.html -> BOS."""
+    return os.path.basename(url)[9:12]
+
+
+def training_frame(store: FeatureStore, games_dir: str = GAMES_DIR) -> Tuple[pd.DataFrame, pd.Series]:
+    """Pre-game matchup features for every finished game the store has seen, and each game's home margin."""
+    pregame = store.pregame_frame()
+    is_home = pregame["Team"] == pregame["Game URL"].map(home_team)
+    features = pregame[["Game URL", "Team"] + FEATURE_COLUMNS]
+    matchups = features[is_home].merge(features[~is_home], on="Game URL", suffixes=("_home", "_away"))
+    matchups = matchups.rename(columns={f"{name}_home": f"home_{name}" for name in FEATURE_COLUMNS}
+                               | {f"{name}_away": f"away_{name}" for name in FEATURE_COLUMNS})
+
+    points = pd.concat([read_season(games_dir, season, ["Game URL", "Team", "PTS"]) for season in seasons(games_dir)],
+                       ignore_index=True)
+    points["Game URL"], points["Team"] = points["Game URL"].astype(str), points["Team"].astype(str)
+    points = points.set_index(["Game URL", "Team"])["PTS"].astype("float64")
+    home_points = points.reindex(pd.MultiIndex.from_arrays([matchups["Game URL"], matchups["Team_home"]])).to_numpy()
+    away_points = points.reindex(pd.MultiIndex.from_arrays([matchups["Game URL"], matchups["Team_away"]])).to_numpy()
+    target = pd.Series(home_points - away_points, name=TARGET)
+    known = target.notna().to_numpy()
+    return matchups.loc[known, MATCHUP_COLUMNS].reset_index(drop=True), target[known].reset_index(drop=True)
+
+
+def train(store: FeatureStore, games_dir: str = GAMES_DIR, output: str = MODEL_FILE, test_size: float = 0.2,
+          engine_output: str = ENGINE_FILE) -> Dict:
+    """
+    Fit the notebook's StandardScaler + MLPRegressor on the store's matchups, save the artifact
+    and its memory-mapped export.
+    """
+    from mlp_numpy import export
+
+    from sklearn.metrics import mean_squared_error
+    from sklearn.model_selection import train_test_split
+    from sklearn.neural_network import MLPRegressor
+    from sklearn.preprocessing import StandardScaler
+
+    X, y = training_frame(store, games_dir)
+    X_train, X_test, y_train, y_test = train_test_split(X.to_numpy(), y.to_numpy(), test_size=test_size, random_state=42)
+    scaler = StandardScaler().fit(X_train)
+    scaled_train = scaler.transform(X_train)
+    scaled_train[np.isnan(scaled_train)] = 0.0
+    model = MLPRegressor(hidden_layer_sizes=HIDDEN_LAYERS, activation="relu", solver="adam", max_iter=MAX_ITER, random_state=42)
+    model.fit(scaled_train, y_train)
+
+    artifact = {"scaler": scaler, "model": model, "feature_columns": MATCHUP_COLUMNS}
+    mse = float(mean_squared_error(y_test, predict_matrix(artifact, X_test))) if len(y_test) else None
+    metrics = {"games": len(X), "test_mse": mse, "last_game": str(store.last_date)}
+    save_artifact(output, scaler, model, MATCHUP_COLUMNS, metrics=metrics)
+    if engine_output:
+        export(load_artifact(output), engine_output)
+    logging.info(f"✅ Trained on {len(X_train)} games, test MSE {mse}; saved {output} and {engine_output}")
+    return metrics
+
+
+def predict_slate(model, store: FeatureStore, games: List[dict], day) -> pd.DataFrame:
+    """Predicted home margin for every game on a slate (dicts with 'home' and 'visitor' abbreviations), from load_model()."""
+    X = matchup_matrix(store, [(game["home"], game["visitor"]) for game in games], day)
+    order = [MATCHUP_COLUMNS.index(name) for name in model.feature_columns]
+    slate = pd.DataFrame(games)
+    slate[TARGET] = model.predict(X[:, order]) if len(X) else []
+    return slate
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Score a night of games with the saved model, or train that model.")
+    parser.add_argument("--model", default=None,
+                        help=f"Artifact to score with (default {ENGINE_FILE}) or to train into (default {MODEL_FILE})")
+    parser.add_argument("--engine", default=ENGINE_FILE, help="Where train writes the memory-mapped export")
+    parser.add_argument("--store", default=STATE_FILE, help="Feature store state built by feature_store.py")
+    commands = parser.add_subparsers(dest="command")
+    slate_parser = commands.add_parser("slate", help="Predict every game on a date (the default)")
+    slate_parser.add_argument("--date", default=date.today().isoformat())
+    slate_parser.add_argument("--output", help="Also write the predictions to this CSV")
+    train_parser = commands.add_parser("train", help="Fit the model on the store's games and save the artifact")
+    train_parser.add_argument("--games", default=GAMES_DIR, help="Parquet game dataset the store was built from")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+    store = FeatureStore.load(args.store)
+    if args.command == "train":
+        train(store, args.games, args.model or MODEL_FILE, engine_output=args.engine)
+        return
+
+    from todays_games import get_games
+
+    day = datetime.strptime(getattr(args, "date", None) or date.today().isoformat(), "%Y-%m-%d")
+    start = time.perf_counter()
+    model = load_model(args.model or ENGINE_FILE)
+    logging.info(f"Loaded {args.model or ENGINE_FILE} in {(time.perf_counter() - start) * 1000:.1f} ms")
+    games = get_games(day)
+    start = time.perf_counter()
+    slate = predict_slate(model, store, games, day)
+    logging.info(f"Scored {len(slate)} games in {(time.perf_counter() - start) * 1000:.1f} ms")
+    for game in slate.itertuples():
+        print(f"{game.visitor_team} @ {game.home_team}: home by {getattr(game, TARGET):+.1f}")
+    if getattr(args, "output", None):
+        slate.to_csv(args.output, index=False)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+import threading
+import time
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket shared by every fetcher that talks to the same domain.
+
+    Tokens refill continuously at `rate` per second up to `capacity`. A capacity of 1
+    means no bursting: requests are spaced exactly 1/rate seconds apart on average.
+    """
+
+    def __init__(self, rate: float, capacity: float = 1.0):
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float) -> None:
+        self._tokens = min(self.capacity, self._tokens + (now - self._last) * self.rate)
+        self._last = now
+
+    def acquire(self, tokens: float = 1.0) -> float:
+        """Block until `tokens` are available, consume them, and return the time spent waiting."""
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._refill(now)
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return waited
+                wait = (tokens - self._tokens) / self.rate
+            time.sleep(wait)
+            waited += wait
+
+    def try_acquire(self, tokens: float = 1.0) -> bool:
+        """Consume `tokens` if they are available right now, without blocking."""
+        with self._lock:
+            self._refill(time.monotonic())
+            if self._tokens >= tokens:
+                self._tokens -= tokens
+                return True
+            return False
+
+
+def per_interval(seconds: float) -> TokenBucket:
+    """Build a non-bursting bucket that allows one request every `seconds`."""
+    return TokenBucket(rate=1.0 / seconds, capacity=1.0)
@@ -0,0 +1,219 @@
+import argparse
+import json
+import logging
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+from replay_server import Corpus, add_server_arguments, server_options, start_server
+
+# ✅ Bench Settings
+SCRAPERS = ["scrape57k", "pipeline", "etl_dchv2", "spiders"]
+HERE = os.path.dirname(os.path.abspath(__file__))
+REPO_ROOT = os.path.dirname(HERE)
+
+
+# ✅ Workers: each runs one scraper against the replay server inside its own process
+def _queue_urls(base_url, workdir, paths):
+    from work_queue import SqliteWorkQueue
+
+    work_queue = SqliteWorkQueue(os.path.join(workdir, "queue.db"))
+    work_queue.add(base_url + path for path in paths)
+    return work_queue
+
+
+def _scraped(work_queue):
+    with work_queue.pool.connection() as conn:
+        return conn.execute(f"SELECT COUNT(*) FROM {work_queue.table} WHERE scraped_status = 1").fetchone()[0]
+
+
+def run_scrape57k(base_url, workdir, paths, delay):
+    import scrape57k_urls
+    from page_cache import PageCache
+    from parquet_sink import ParquetSink
+
+    scrape57k_urls.page_cache = PageCache(os.path.join(workdir, "page_cache"))  # Start cold
+    scrape57k_urls.SLEEP_BETWEEN_REQUESTS = max(delay, 1e-6)  # The token bucket needs a positive interval
+    work_queue = _queue_urls(base_url, workdir, paths)
+    with scrape57k_urls.open_tracker(work_queue) as tracker, \
+            ParquetSink(os.path.join(workdir, "games"), on_flush=tracker.done_many) as sink:
+        scrape57k_urls.run_concurrent(work_queue, sink, tracker)
+    return _scraped(work_queue)
+
+
+def run_pipeline(base_url, workdir, paths, delay):
+    import scrape57k_urls
+    import scrape_pipeline
+    from page_cache import PageCache
+    from rate_limiter import per_interval
+
+    scrape57k_urls.page_cache = PageCache(os.path.join(workdir, "page_cache"))
+    work_queue = _queue_urls(base_url, workdir, paths)
+    with scrape57k_urls.open_tracker(work_queue) as tracker:
+        source = scrape_pipeline.db_source(work_queue, tracker, per_interval(max(delay, 1e-6)), scrape57k_urls.BATCH_SIZE)
+        scrape_pipeline.run_pipeline(source, os.path.join(workdir, "games"),
+                                     on_written=tracker.done_many, on_failed=tracker.failed)
+    return _scraped(work_queue)
+
+
+def run_etl_dchv2(base_url, workdir, paths, delay):
+    sys.path.insert(0, REPO_ROOT)
+    import nbaData_etl_dchv2
+    from page_cache import PageCache
+
+    nbaData_etl_dchv2.page_cache = PageCache(os.path.join(workdir, "page_cache"))
+    url_file = os.path.join(workdir, "urls.txt")
+    with open(url_file, "w") as file:
+        file.writelines(base_url + path + "\n" for path in paths)
+    nbaData_etl_dchv2.main(url_file, delay)
+    with open(os.path.join(workdir, "success_log.txt")) as file:
+        return sum(1 for _ in file)
+
+
+def run_spiders(base_url, workdir, paths, delay):
+    import boxscore_url_extraction as spiders
+
+    spiders.BASE_URL = base_url
+    spiders.LinksSpider.start_urls = [f"{base_url}/leagues/"]
+    pace = {"DOWNLOAD_DELAY": delay, "AIMD_START_DELAY": max(delay, 0.01), "AIMD_MIN_DELAY": max(delay, 0.01)}
+    for spider in (spiders.LinksSpider, spiders.BoxscoreSpider):
+        spider.custom_settings = {**spider.custom_settings, **pace}
+    spiders.start_scraping()
+    with open(spiders.BOXSCORE_FILE) as file:
+        return sum(1 for _ in file)
+
+
+WORKERS = {
+    "scrape57k": run_scrape57k,
+    "pipeline": run_pipeline,
+    "etl_dchv2": run_etl_dchv2,
+    "spiders": run_spiders,
+}
+
+
+def worker_main(argv):
+    """Child side: run one scraper in `--workdir` and print how many items it produced."""
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--worker", choices=SCRAPERS, required=True)
+    parser.add_argument("--base-url", required=True)
+    parser.add_argument("--workdir", required=True)
+    parser.add_argument("--paths-file", required=True)
+    parser.add_argument("--delay", type=float, default=0.0)
+    args = parser.parse_args(argv)
+
+    os.chdir(args.workdir)  # Scrapers write logs, state and CSVs relative to the working directory
+    logging.basicConfig(level=logging.WARNING, format="%(asctime)s - %(levelname)s - %(message)s")
+    with open(args.paths_file) as file:
+        paths = [line.strip() for line in file if line.strip()]
+    produced = WORKERS[args.worker](args.base_url, args.workdir, paths, args.delay)
+    print(json.dumps({"produced": produced}))
+
+
+# ✅ Runner
+def bench_one(name, server, paths, delay, timeout):
+    """Run one scraper in a child process; CPU time and peak RSS come from that child's rusage."""
+    with tempfile.TemporaryDirectory(prefix=f"bench-{name}-") as workdir:
+        paths_file = os.path.join(workdir, "paths.txt")
+        with open(paths_file, "w") as file:
+            file.writelines(path + "\n" for path in paths)
+        command = [sys.executable, os.path.abspath(__file__), "--worker", name, "--base-url", server.base_url,
+                   "--workdir", workdir, "--paths-file", paths_file, "--delay", str(delay)]
+
+        # Output goes to files: a chatty child (Scrapy logs every request) would fill a pipe and stall
+        stdout_path, stderr_path = os.path.join(workdir, "stdout.log"), os.path.join(workdir, "stderr.log")
+        before = server.snapshot()
+        start = time.perf_counter()
+        with open(stdout_path, "w") as stdout_file, open(stderr_path, "w") as stderr_file:
+            child = subprocess.Popen(command, cwd=HERE, stdout=stdout_file, stderr=stderr_file)
+        deadline = start + timeout
+        while True:
+            pid, status, usage = os.wait4(child.pid, os.WNOHANG)
+            if pid:
+                break
+            if time.perf_counter() > deadline:
+                child.kill()
+                _, status, usage = os.wait4(child.pid, 0)
+                break
+            time.sleep(0.05)
+        wall = time.perf_counter() - start
+        after = server.snapshot()
+        with open(stdout_path) as file:
+            stdout = file.read()
+        with open(stderr_path) as file:
+            stderr = file.read()
+        child.returncode = os.waitstatus_to_exitcode(status)
+
+    served = {code: after["status"].get(code, 0) - before["status"].get(code, 0) for code in after["status"]}
+    pages = served.get("200", 0) + served.get("304", 0)
+    cpu = usage.ru_utime + usage.ru_stime  # Includes parse processes the child reaped
+    result = {
+        "scraper": name,
+        "exit_code": child.returncode,
+        "wall_seconds": round(wall, 3),
+        "pages": pages,
+        "requests": after["requests"] - before["requests"],
+        "responses": {code: count for code, count in sorted(served.items()) if count},
+        "pages_per_sec": round(pages / wall, 3) if wall else None,
+        "cpu_seconds": round(cpu, 3),
+        "cpu_ms_per_page": round(1000 * cpu / pages, 2) if pages else None,
+        "peak_rss_mb": round(usage.ru_maxrss / 1024, 1),  # ru_maxrss is in KB on Linux
+        "produced": None,
+    }
+    for line in reversed(stdout.splitlines()):
+        if line.startswith("{"):
+            result["produced"] = json.loads(line)["produced"]
+            break
+    if child.returncode != 0:
+        result["error"] = stderr.strip().splitlines()[-1] if stderr.strip() else "killed"
+        logging.error(f"❌ {name} exited with {child.returncode}:\n{stderr[-2000:]}")
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the scrapers end to end against the local replay server.")
+    add_server_arguments(parser)
+    parser.add_argument("--scrapers", nargs="+", choices=SCRAPERS, default=SCRAPERS)
+    parser.add_argument("--limit", type=int, default=None, help="Box score pages fed to the queue-driven scrapers")
+    parser.add_argument("--delay", type=float, default=0.0,
+                        help="Override each scraper's own delay between requests (0 measures raw throughput)")
+    parser.add_argument("--timeout", type=float, default=3600, help="Seconds before a scraper run is killed")
+    parser.add_argument("--output", help="Write the results as JSON here")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+    corpus = Corpus(args.corpus)
+    paths = corpus.boxscore_paths()[:args.limit]
+    server = start_server(corpus, **server_options(args))
+    logging.info(f"Replay server at {server.base_url} with {len(paths)} box score pages")
+
+    results = []
+    try:
+        for name in args.scrapers:
+            logging.info(f"Running {name}...")
+            result = bench_one(name, server, paths, args.delay, args.timeout)
+            results.append(result)
+            logging.info(f"{name}: {result['pages']} pages in {result['wall_seconds']}s, "
+                         f"{result['pages_per_sec']} pages/s, {result['cpu_ms_per_page']} CPU ms/page, "
+                         f"peak RSS {result['peak_rss_mb']} MB")
+    finally:
+        server.shutdown()
+        server.server_close()
+
+    print(f"{'scraper':<12}{'pages':>8}{'pages/s':>10}{'CPU ms/page':>13}{'peak RSS MB':>13}")
+    for result in results:
+        print(f"{result['scraper']:<12}{result['pages']:>8}{result['pages_per_sec'] or 0:>10.2f}"
+              f"{result['cpu_ms_per_page'] or 0:>13.2f}{result['peak_rss_mb']:>13.1f}")
+    if args.output:
+        report = {"corpus": args.corpus, "server": {k: v for k, v in server_options(args).items()},
+                  "delay": args.delay, "results": results}
+        with open(args.output, "w") as file:
+            json.dump(report, file, indent=2)
+
+
+if __name__ == "__main__":
+    if "--worker" in sys.argv[1:]:
+        worker_main(sys.argv[1:])
+    else:
+        main()
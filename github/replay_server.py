@@ -0,0 +1,254 @@
+import argparse
+import hashlib
+import json
+import logging
+import os
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+from page_cache import PageCache
+from rate_limiter import TokenBucket
+
+# ✅ Replay Settings
+ORIGIN = "https://www.basketball-reference.com"  # Cached URLs are looked up as ORIGIN + request path
+HANG_SECONDS = 30  # How long a "timeout" fault holds the connection before dropping it
+BOXSCORE_PATH = re.compile(r"^/boxscores/\d{9}[A-Z]{3}\.html$")
+FAULT_STATUSES = {"429": 429, "500": 500, "502": 502, "503": 503, "timeout": None}
+
+
+class Corpus:
+    """
+    Recorded pages to replay, addressed by request path.
+
+    Either a PageCache directory (pages cached by the scrapers, keyed by full URL) or a plain
+    directory laid out like the site: boxscores/202310240DEN.html, leagues/index.html,
+    leagues/NBA_2024_games-october.html... Box score files may also sit at the top level,
+    as saved by scrape_pipeline's directory source.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.cache = PageCache(path) if os.path.exists(os.path.join(path, "index.sqlite")) else None
+
+    def lookup(self, path: str) -> Optional[Tuple[int, bytes]]:
+        """Return (status, body) for a request path, or None when the page was never recorded."""
+        if self.cache is not None:
+            page = self.cache.get(ORIGIN + path)
+            return None if page is None else (page.status, page.text.encode("utf-8"))
+        relative = path.lstrip("/")
+        candidates = [os.path.join(self.path, relative + "index.html" if relative.endswith("/") or not relative else relative)]
+        if BOXSCORE_PATH.match(path):
+            candidates.append(os.path.join(self.path, os.path.basename(path)))
+        for candidate in candidates:
+            candidate = os.path.normpath(candidate)
+            if candidate.startswith(os.path.normpath(self.path)) and os.path.isfile(candidate):
+                with open(candidate, "rb") as file:
+                    return 200, file.read()
+        return None
+
+    def paths(self) -> List[str]:
+        """Every replayable 200 path, sorted."""
+        if self.cache is not None:
+            return sorted(urlsplit(url).path for url in self.cache.urls(status=200) if url.startswith(ORIGIN))
+        paths = []
+        for directory, _, files in os.walk(self.path):
+            for name in files:
+                if not name.endswith(".html"):
+                    continue
+                relative = os.path.relpath(os.path.join(directory, name), self.path).replace(os.sep, "/")
+                if relative.endswith("index.html"):
+                    paths.append("/" + relative[:-len("index.html")])
+                elif "/" not in relative and BOXSCORE_PATH.match("/boxscores/" + relative):
+                    paths.append("/boxscores/" + relative)
+                else:
+                    paths.append("/" + relative)
+        return sorted(paths)
+
+    def boxscore_paths(self) -> List[str]:
+        return [path for path in self.paths() if BOXSCORE_PATH.match(path)]
+
+
+class ReplayServer(ThreadingHTTPServer):
+    """
+    Threaded HTTP stand-in for basketball-reference.com.
+
+    Every request waits `latency` ± `jitter` seconds, may be turned into an injected fault
+    (`faults` maps "429"/"500"/"502"/"503"/"timeout" to a probability), and when `rate_limit`
+    is set must take a token from a shared bucket or get a 429 with Retry-After, like the
+    real site. 200s carry an ETag and honour If-None-Match with a 304. Counters are served
+    as JSON at /_stats.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, address, corpus: Corpus, latency: float = 0.0, jitter: float = 0.0,
+                 faults: Optional[Dict[str, float]] = None, rate_limit: Optional[float] = None,
+                 burst: float = 1.0, hang_seconds: float = HANG_SECONDS, seed: int = 0):
+        super().__init__(address, ReplayHandler)
+        self.corpus = corpus
+        self.latency = latency
+        self.jitter = jitter
+        self.faults = faults or {}
+        self.limiter = TokenBucket(rate_limit, burst) if rate_limit else None
+        self.hang_seconds = hang_seconds
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self.stats = {"requests": 0, "bytes": 0, "status": {}}
+
+    def pick_fault(self) -> Optional[str]:
+        with self._lock:
+            roll = self._random.random()
+        for name, probability in self.faults.items():
+            if roll < probability:
+                return name
+            roll -= probability
+        return None
+
+    def delay(self) -> float:
+        with self._lock:
+            return max(0.0, self.latency + self._random.uniform(-self.jitter, self.jitter))
+
+    def count(self, status, size: int = 0) -> None:
+        with self._lock:
+            self.stats["requests"] += 1
+            self.stats["bytes"] += size
+            key = str(status)
+            self.stats["status"][key] = self.stats["status"].get(key, 0) + 1
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return json.loads(json.dumps(self.stats))
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+
+class ReplayHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # Keep-alive, so clients that reuse connections get to
+
+    def do_GET(self):
+        server = self.server
+        path = urlsplit(self.path).path
+        if path == "/_stats":
+            self._send(200, json.dumps(server.snapshot()).encode("utf-8"), "application/json", counted=False)
+            return
+
+        if server.limiter is not None and not server.limiter.try_acquire():
+            retry_after = max(1, round(1.0 / server.limiter.rate))
+            self._send(429, b"Too Many Requests", headers={"Retry-After": str(retry_after)})
+            return
+
+        fault = server.pick_fault()
+        time.sleep(server.delay())
+        if fault == "timeout":
+            time.sleep(server.hang_seconds)
+            server.count("timeout")
+            self.close_connection = True  # Drop the connection without a response
+            return
+        if fault is not None:
+            self._send(FAULT_STATUSES[fault], f"Injected {fault}".encode("utf-8"),
+                       headers={"Retry-After": "1"} if fault == "429" else None)
+            return
+
+        page = server.corpus.lookup(path)
+        if page is None:
+            self._send(404, b"Not Found")
+            return
+        status, body = page
+        if status != 200:
+            self._send(status, body)
+            return
+        etag = '"' + hashlib.sha256(body).hexdigest()[:16] + '"'
+        if self.headers.get("If-None-Match") == etag:
+            self._send(304, b"", headers={"ETag": etag})
+            return
+        self._send(200, body, headers={"ETag": etag})
+
+    def _send(self, status, body, content_type="text/html; charset=utf-8", headers=None, counted=True):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        if body:
+            self.wfile.write(body)
+        if counted:
+            self.server.count(status, len(body))
+
+    def log_message(self, format, *args):
+        logging.debug(f"{self.address_string()} - {format % args}")
+
+
+def parse_faults(specs: List[str]) -> Dict[str, float]:
+    """Turn ["429=0.02", "timeout=0.001"] into {"429": 0.02, "timeout": 0.001}."""
+    faults = {}
+    for spec in specs:
+        name, _, probability = spec.partition("=")
+        if name not in FAULT_STATUSES:
+            raise ValueError(f"Unknown fault {name!r}; expected one of {', '.join(FAULT_STATUSES)}")
+        faults[name] = float(probability)
+    if sum(faults.values()) > 1:
+        raise ValueError("Fault probabilities add up to more than 1")
+    return faults
+
+
+def start_server(corpus: Corpus, host: str = "127.0.0.1", port: int = 0, **options) -> ReplayServer:
+    """Start a ReplayServer on a background thread (port 0 picks a free port); stop it with shutdown()."""
+    server = ReplayServer((host, port), corpus, **options)
+    threading.Thread(target=server.serve_forever, name="replay-server", daemon=True).start()
+    return server
+
+
+def add_server_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument("corpus", help="PageCache directory, or a directory of pages laid out by site path")
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds added to every response")
+    parser.add_argument("--jitter", type=float, default=0.0, help="± seconds of uniform noise on the latency")
+    parser.add_argument("--fault", action="append", default=[], metavar="KIND=P",
+                        help="Inject a fault with probability P; KIND is 429, 500, 502, 503 or timeout (repeatable)")
+    parser.add_argument("--rate-limit", type=float, default=None, help="Requests/second allowed before 429s")
+    parser.add_argument("--burst", type=float, default=1.0, help="Token bucket capacity for --rate-limit")
+    parser.add_argument("--hang-seconds", type=float, default=HANG_SECONDS)
+    parser.add_argument("--seed", type=int, default=0)
+
+
+def server_options(args) -> dict:
+    return {
+        "latency": args.latency,
+        "jitter": args.jitter,
+        "faults": parse_faults(args.fault),
+        "rate_limit": args.rate_limit,
+        "burst": args.burst,
+        "hang_seconds": args.hang_seconds,
+        "seed": args.seed,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay recorded basketball-reference pages over local HTTP.")
+    add_server_arguments(parser)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+    corpus = Corpus(args.corpus)
+    server = ReplayServer((args.host, args.port), corpus, **server_options(args))
+    logging.info(f"Replaying {len(corpus.paths())} pages from {args.corpus} at {server.base_url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,213 @@
+import argparse
+import glob
+import logging
+import os
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from boxscore_parser import parse_game, parse_game_with_players
+from game_schema import PLAYER_DTYPES
+from page_cache import PageCache
+from parquet_sink import ParquetSink
+from work_queue import drain
+
+# ✅ Pipeline Settings
+FETCH_QUEUE_SIZE = 32  # Pages waiting to be parsed
+WRITE_QUEUE_SIZE = 256  # Parsed games waiting to be written
+PARSE_IN_FLIGHT = 2  # Parse tasks submitted per worker process before the dispatcher blocks
+WRITE_BATCH = 500  # Games per Parquet flush / status update batch
+FLUSH_SECONDS = 60  # Write a partial batch once its oldest game is this old (must stay well under the lease)
+OUTPUT_DIR = "/mnt/efs/games"
+
+_DONE = object()
+
+
+# ✅ Sources: each yields (ref, url, html); refs of written games are handed to on_written
+def db_source(work_queue, tracker, limiter, batch_size, cache=None):
+    """Claim leased URLs and fetch them under the shared rate limit, through `cache` (default: scrape57k_urls' page cache)."""
+    import scrape57k_urls
+
+    for items in drain(work_queue, batch_size):
+        for item in items:
+            html = scrape57k_urls.fetch_nba_game(item.url, limiter, cache)
+            if html:
+                yield item.id, item.url, html
+            else:
+                tracker.retry(item.id)
+
+
+def cache_source(cache_dir):
+    """Replay every cached 200 page; no network and no rate limit."""
+    for page in PageCache(cache_dir).iter_pages():
+        yield None, page.url, page.text
+
+
+def directory_source(directory):
+    """Replay saved .html files in name order; the file path stands in for the game URL."""
+    for path in sorted(glob.glob(os.path.join(directory, "*.html"))):
+        with open(path, "r", encoding="utf-8") as file:
+            yield None, path, file.read()
+
+
+# ✅ Stages
+def fetch_stage(source, fetched):
+    try:
+        for item in source:
+            fetched.put(item)  # Blocks when parsing falls behind
+    except Exception as e:
+        logging.error(f"❌ Fetch stage failed: {e}")
+    finally:
+        fetched.put(_DONE)
+
+
+def parse_stage(fetched, parsed, workers, with_players=False):
+    """
+    Fan pages out to a process pool, keeping at most workers * PARSE_IN_FLIGHT tasks outstanding.
+    With `with_players` each result is (rows, player columns) rather than just rows.
+    """
+    parse = parse_game_with_players if with_players else parse_game
+    pending = deque()
+
+    def drain_one():
+        ref, url, future = pending.popleft()
+        try:
+            parsed.put((ref, future.result()))
+        except Exception as e:
+            logging.error(f"❌ Failed to parse {url}: {e}")
+            parsed.put((ref, None))
+
+    try:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            while True:
+                item = fetched.get()
+                if item is _DONE:
+                    break
+                ref, url, html = item
+                pending.append((ref, url, executor.submit(parse, html, url)))
+                if len(pending) >= workers * PARSE_IN_FLIGHT:
+                    drain_one()
+            while pending:
+                drain_one()
+    finally:
+        parsed.put(_DONE)  # Even if the pool breaks, so the write stage flushes what it has and exits
+
+
+def write_stage(parsed, output_dir, on_written, on_failed, stats, players_dir=None):
+    """
+    Collect parsed games into batches; flush each batch to the Parquet sink (player lines to
+    their own sink under `players_dir` first), then report its refs.
+    """
+    rows = []
+    refs = []
+    batch_started = None
+    sink = ParquetSink(output_dir, buffer_rows=float("inf"), flush_seconds=float("inf"))
+    players = None
+    if players_dir:
+        players = ParquetSink(players_dir, buffer_rows=float("inf"), flush_seconds=float("inf"), dtypes=PLAYER_DTYPES)
+
+    def flush():
+        nonlocal rows, refs, batch_started
+        if players is not None:
+            players.flush()
+        if rows:
+            sink.write(rows)
+            sink.flush()
+        if on_written and refs:
+            on_written(refs)
+        stats["games"] += len(refs)
+        rows, refs, batch_started = [], [], None
+
+    while True:
+        timeout = None if batch_started is None else max(0.0, batch_started + FLUSH_SECONDS - time.monotonic())
+        try:
+            item = parsed.get(timeout=timeout)
+        except queue.Empty:
+            flush()
+            continue
+        if item is _DONE:
+            break
+        ref, result = item
+        if result is None:
+            stats["failed"] += 1
+            if on_failed:
+                on_failed(ref)
+            continue
+        if batch_started is None:
+            batch_started = time.monotonic()
+        if players is not None:
+            result, player_columns = result
+            players.write(player_columns)
+        rows.extend(result)
+        refs.append(ref)
+        if len(refs) >= WRITE_BATCH:
+            flush()
+    flush()
+
+
+def run_pipeline(source, output_dir=OUTPUT_DIR, workers=None, on_written=None, on_failed=None, players_dir=None):
+    """
+    Run fetch -> parse -> write with bounded queues between the stages. When `players_dir` is
+    set, player lines from the same parse are written there too.
+
+    Fetching happens on one thread, extract work on a ProcessPoolExecutor using all
+    cores, and writing/status updates on a third stage, so the slowest stage sets the
+    pace and the others block instead of buffering without limit.
+    """
+    workers = workers or os.cpu_count()
+    fetched = queue.Queue(maxsize=FETCH_QUEUE_SIZE)
+    parsed = queue.Queue(maxsize=WRITE_QUEUE_SIZE)
+    stats = {"games": 0, "failed": 0}
+    os.makedirs(output_dir, exist_ok=True)
+
+    start = time.time()
+    threads = [
+        # Daemon: if parsing dies, nothing drains `fetched` and this thread would block the exit forever
+        threading.Thread(target=fetch_stage, args=(source, fetched), name="fetch", daemon=True),
+        threading.Thread(target=write_stage, args=(parsed, output_dir, on_written, on_failed, stats, players_dir),
+                         name="write"),
+    ]
+    for thread in threads:
+        thread.start()
+    parse_stage(fetched, parsed, workers, with_players=bool(players_dir))
+    for thread in threads:
+        thread.join()
+
+    elapsed = time.time() - start
+    logging.info(f"✅ Pipeline processed {stats['games']} games ({stats['failed']} failed) "
+                 f"in {elapsed:.1f}s, {stats['games'] / max(elapsed, 1e-9):.1f} games/s")
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Staged fetch/parse/write pipeline for box score pages.")
+    parser.add_argument("--source", default="db",
+                        help="'db' to crawl pending URLs, 'cache' to re-extract the page cache, or a directory of saved .html files")
+    parser.add_argument("--cache-dir", default="page_cache")
+    parser.add_argument("--output-dir", default=OUTPUT_DIR)
+    parser.add_argument("--players-dir", default=None, help="Also write every player line, as Parquet, here")
+    parser.add_argument("--workers", type=int, default=None, help="Parse processes (default: all cores)")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+
+    if args.source == "db":
+        import scrape57k_urls
+        from rate_limiter import per_interval
+
+        work_queue = scrape57k_urls.open_work_queue()
+        limiter = per_interval(scrape57k_urls.SLEEP_BETWEEN_REQUESTS)
+        with scrape57k_urls.open_tracker(work_queue) as tracker:
+            source = db_source(work_queue, tracker, limiter, scrape57k_urls.BATCH_SIZE, PageCache(args.cache_dir))
+            run_pipeline(source, args.output_dir, args.workers,
+                         on_written=tracker.done_many, on_failed=tracker.failed, players_dir=args.players_dir)
+    elif args.source == "cache":
+        run_pipeline(cache_source(args.cache_dir), args.output_dir, args.workers, players_dir=args.players_dir)
+    else:
+        run_pipeline(directory_source(args.source), args.output_dir, args.workers, players_dir=args.players_dir)
+
+
+if __name__ == "__main__":
+    main()
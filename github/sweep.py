@@ -0,0 +1,175 @@
+import argparse
+import hashlib
+import itertools
+import json
+import logging
+import os
+import time
+import warnings
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Dict, List, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+import pyarrow.parquet as pq
+
+from feature_store import GAMES_DIR
+from matchup_builder import load_games, matchup_rows
+from predict import HIDDEN_LAYERS, MATCHUP_COLUMNS, MAX_ITER, TARGET
+from train_incremental import MATCHUPS_FILE
+
+# ✅ Sweep Settings
+CACHE_DIR = "sweep_cache"  # Standardized fold matrices (.npy), shared by every configuration and worker
+LEADERBOARD_FILE = "leaderboard.csv"
+FOLDS = 3  # Walk-forward folds: each validates on one season, training on every season before it
+MIN_TRAIN_SEASONS = 1
+LAYER_GRID = [HIDDEN_LAYERS, (64,), (128, 64), (64, 32, 16)]
+ALPHA_GRID = [1e-4, 1e-3, 1e-2]
+LEARNING_RATE_GRID = [1e-3, 3e-3]
+MAX_WORKERS = os.cpu_count()
+
+
+# ✅ Folds: built once per matchups file, then only memory-mapped
+def walk_forward(seasons_seen: Sequence[str], folds: int = FOLDS, min_train: int = MIN_TRAIN_SEASONS
+                 ) -> List[Tuple[List[str], str]]:
+    """(training seasons, validation season) for the last `folds` seasons, oldest first. Never trains on the future."""
+    ordered = sorted(seasons_seen)
+    start = max(min_train, len(ordered) - folds)
+    return [(ordered[:k], ordered[k]) for k in range(start, len(ordered))]
+
+
+def _cache_key(path: str, folds: List[Tuple[List[str], str]]) -> str:
+    stat = os.stat(path)
+    spec = json.dumps([os.path.abspath(path), stat.st_size, stat.st_mtime_ns, folds, MATCHUP_COLUMNS])
+    return hashlib.sha1(spec.encode()).hexdigest()[:12]
+
+
+def _season_matrix(path: str, season_filter: Sequence[str]) -> Tuple[np.ndarray, np.ndarray]:
+    table = pq.read_table(path, columns=MATCHUP_COLUMNS + [TARGET], filters=[("NBA Season", "in", list(season_filter))])
+    X = np.column_stack([table.column(name).to_numpy(zero_copy_only=False) for name in MATCHUP_COLUMNS])
+    return X.astype(np.float32), table.column(TARGET).to_numpy(zero_copy_only=False).astype(np.float32)
+
+
+def cache_folds(path: str, folds: List[Tuple[List[str], str]], cache_dir: str = CACHE_DIR) -> List[Dict[str, str]]:
+    """
+    Standardize each fold with a scaler fit on its training seasons only and save X/y as .npy,
+    keyed on the matchups file and fold layout so a rerun on the same data skips this step.
+    Returns one {name: .npy path} dict per fold.
+    """
+    from sklearn.preprocessing import StandardScaler
+
+    fold_dir = os.path.join(cache_dir, _cache_key(path, folds))
+    os.makedirs(fold_dir, exist_ok=True)
+    cached = []
+    for i, (training, validation) in enumerate(folds):
+        files = {name: os.path.join(fold_dir, f"fold{i}_{name}.npy") for name in ("X_train", "y_train", "X_val", "y_val")}
+        cached.append(files)
+        if all(os.path.exists(file) for file in files.values()):
+            continue
+        X_train, y_train = _season_matrix(path, training)
+        X_val, y_val = _season_matrix(path, [validation])
+        scaler = StandardScaler().fit(X_train)
+        for name, X in (("X_train", X_train), ("X_val", X_val)):
+            scaled = scaler.transform(X).astype(np.float32)
+            scaled[np.isnan(scaled)] = 0.0  # Missing features at the training mean, as predict.predict_matrix does
+            np.save(f"{files[name]}.tmp.npy", scaled)
+            os.replace(f"{files[name]}.tmp.npy", files[name])
+        for name, y in (("y_train", y_train), ("y_val", y_val)):
+            np.save(f"{files[name]}.tmp.npy", y)
+            os.replace(f"{files[name]}.tmp.npy", files[name])
+        logging.info(f"Fold {i}: {len(y_train)} training games ({training[0]}..{training[-1]}), "
+                     f"{len(y_val)} validation games ({validation})")
+    return cached
+
+
+# ✅ Worker: one (configuration, fold) fit
+def _init_worker():
+    # One BLAS thread per process, since the pool already uses every core. Hitting max_iter is
+    # expected in a sweep and shows up as the leaderboard's iteration count instead.
+    from sklearn.exceptions import ConvergenceWarning
+    from threadpoolctl import threadpool_limits
+
+    threadpool_limits(1)
+    warnings.filterwarnings("ignore", category=ConvergenceWarning)
+
+
+def fit_fold(config: Dict, fold: int, files: Dict[str, str]) -> Dict:
+    from sklearn.neural_network import MLPRegressor
+
+    X_train, y_train, X_val, y_val = (np.load(files[name], mmap_mode="r") for name in ("X_train", "y_train", "X_val", "y_val"))
+    model = MLPRegressor(hidden_layer_sizes=config["hidden_layers"], alpha=config["alpha"],
+                         learning_rate_init=config["learning_rate"], activation="relu", solver="adam",
+                         max_iter=config["max_iter"], random_state=42)
+    start = time.perf_counter()
+    model.fit(X_train, y_train)
+    fit_seconds = time.perf_counter() - start
+    mse = float(np.mean((model.predict(X_val) - y_val) ** 2))
+    return {**config, "fold": fold, "val_mse": mse, "iterations": model.n_iter_, "fit_seconds": fit_seconds}
+
+
+def grid(layers=LAYER_GRID, alphas=ALPHA_GRID, learning_rates=LEARNING_RATE_GRID, max_iter: int = MAX_ITER) -> List[Dict]:
+    return [{"hidden_layers": tuple(hidden), "alpha": alpha, "learning_rate": rate, "max_iter": max_iter}
+            for hidden, alpha, rate in itertools.product(layers, alphas, learning_rates)]
+
+
+def sweep(configs: List[Dict], fold_files: List[Dict[str, str]], max_workers: int = MAX_WORKERS) -> pd.DataFrame:
+    """Fit every configuration on every fold across a process pool. Returns one row per (configuration, fold)."""
+    results = []
+    with ProcessPoolExecutor(max_workers=max_workers, initializer=_init_worker) as pool:
+        futures = [pool.submit(fit_fold, config, fold, files)
+                   for config in configs for fold, files in enumerate(fold_files)]
+        for done, future in enumerate(as_completed(futures), 1):
+            result = future.result()
+            results.append(result)
+            logging.info(f"[{done}/{len(futures)}] {result['hidden_layers']} alpha={result['alpha']} "
+                         f"lr={result['learning_rate']} fold {result['fold']}: MSE {result['val_mse']:.2f} "
+                         f"in {result['fit_seconds']:.1f}s")
+    return pd.DataFrame(results)
+
+
+def leaderboard(results: pd.DataFrame) -> pd.DataFrame:
+    """One row per configuration, best mean validation MSE first, with its fit time across folds."""
+    results = results.assign(hidden_layers=results["hidden_layers"].map(lambda hidden: "-".join(map(str, hidden))))
+    board = results.groupby(["hidden_layers", "alpha", "learning_rate"], as_index=False).agg(
+        mean_mse=("val_mse", "mean"), std_mse=("val_mse", "std"), worst_mse=("val_mse", "max"),
+        mean_iterations=("iterations", "mean"), mean_fit_seconds=("fit_seconds", "mean"),
+        total_fit_seconds=("fit_seconds", "sum"), folds=("fold", "count"))
+    return board.sort_values("mean_mse", ignore_index=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Walk-forward cross-validated hyperparameter sweep of the MLP, one process per core.")
+    parser.add_argument("--matchups", default=MATCHUPS_FILE, help="Matchup features from matchup_builder.py or train_incremental.py (built from --games if missing)")
+    parser.add_argument("--games", default=GAMES_DIR, help="ParquetSink game dataset, or a CSV of game rows")
+    parser.add_argument("--folds", type=int, default=FOLDS)
+    parser.add_argument("--layers", nargs="+", default=["-".join(map(str, hidden)) for hidden in LAYER_GRID],
+                        help="Hidden layer sizes, e.g. 100-50 64")
+    parser.add_argument("--alphas", type=float, nargs="+", default=ALPHA_GRID)
+    parser.add_argument("--learning-rates", type=float, nargs="+", default=LEARNING_RATE_GRID)
+    parser.add_argument("--max-iter", type=int, default=MAX_ITER)
+    parser.add_argument("--workers", type=int, default=MAX_WORKERS)
+    parser.add_argument("--cache-dir", default=CACHE_DIR)
+    parser.add_argument("--output", default=LEADERBOARD_FILE)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+    start = time.time()
+    if not os.path.exists(args.matchups):
+        matchup_rows(load_games(args.games)).to_parquet(args.matchups, index=False, compression="zstd")
+    seasons_seen = set(pq.read_table(args.matchups, columns=["NBA Season"]).column("NBA Season").to_pylist())
+    folds = walk_forward(seasons_seen, args.folds)
+    if not folds:
+        raise SystemExit(f"❌ {args.matchups} has {len(seasons_seen)} season(s); need at least {MIN_TRAIN_SEASONS + 1} for a fold")
+    fold_files = cache_folds(args.matchups, folds, args.cache_dir)
+
+    configs = grid([tuple(int(size) for size in hidden.split("-")) for hidden in args.layers],
+                   args.alphas, args.learning_rates, args.max_iter)
+    logging.info(f"Sweeping {len(configs)} configurations x {len(folds)} folds on {args.workers} workers")
+    board = leaderboard(sweep(configs, fold_files, args.workers))
+    board.to_csv(args.output, index=False)
+    print(board.to_string(index=False, float_format=lambda value: f"{value:.4g}"))
+    logging.info(f"✅ Leaderboard saved to {args.output} in {time.time() - start:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,41 @@
+from types import SimpleNamespace
+
+from scrapy.downloadermiddlewares.retry import RetryMiddleware
+from scrapy.http import Request, Response
+from scrapy.utils.test import get_crawler
+
+from adaptive_throttle import AIMDThrottleMiddleware
+
+URL = "https://www.basketball-reference.com/boxscores/202401150BOS.html"
+
+
+def middlewares(max_retries):
+    crawler = get_crawler(settings_dict={"AIMD_MAX_RETRIES": max_retries, "RETRY_TIMES": 2})
+    crawler.stats.open_spider()
+    crawler.engine = SimpleNamespace(downloader=SimpleNamespace(slots={}))  # No slots yet: rates only
+    return crawler, AIMDThrottleMiddleware(crawler), RetryMiddleware.from_crawler(crawler)
+
+
+def throttled(request):
+    return Response(URL, status=429, request=request)
+
+
+def test_throttled_request_is_requeued_with_a_lower_rate():
+    crawler, throttle, _ = middlewares(max_retries=1)
+    request = Request(URL, meta={"download_slot": "site"})
+    start = throttle.effective_rate("site")
+
+    retry = throttle.process_response(request, throttled(request))
+    assert isinstance(retry, Request) and retry.meta["aimd_retries"] == 1
+    assert throttle.effective_rate("site") < start
+    assert crawler.stats.get_value("aimd/throttled") == 1
+
+
+def test_giving_up_is_not_retried_again_by_retry_middleware():
+    crawler, throttle, retry_middleware = middlewares(max_retries=1)
+    request = Request(URL, meta={"download_slot": "site", "aimd_retries": 1})
+
+    response = throttle.process_response(request, throttled(request))
+    assert isinstance(response, Response) and response.status == 429
+    assert retry_middleware.process_response(request, response) is response
+    assert crawler.stats.get_value("aimd/gave_up") == 1
@@ -0,0 +1,59 @@
+from datetime import date
+
+from scrapy.http import HtmlResponse, Request
+
+import boxscore_url_extraction
+from boxscore_url_extraction import CrawlState, LinksSpider, last_game_date
+
+MONTH_URL = "https://www.basketball-reference.com/leagues/NBA_2027_games-march.html"
+SEASON_URL = "https://www.basketball-reference.com/leagues/NBA_2027_games.html"
+LEAGUES_PAGE = b"""<table><tr><th scope="row" class="left" data-stat="season"><a href="/leagues/NBA_2027.html">2026-27</a></th></tr></table>"""
+MARCH_PAGE = b"""<table id="schedule"><tbody>
+<tr><th data-stat="date_game"><a href="/boxscores/index.fcgi?month=3&day=1&year=2027">Mon, Mar 1, 2027</a></th></tr>
+<tr><th data-stat="date_game"><a href="/boxscores/index.fcgi?month=3&day=31&year=2027">Wed, Mar 31, 2027</a></th></tr>
+</tbody></table>"""
+
+
+def response(status, body=b""):
+    return HtmlResponse(MONTH_URL, status=status, body=body, headers={"ETag": '"v1"'}, request=Request(MONTH_URL))
+
+
+def test_last_game_date_reads_the_schedule_rows():
+    assert last_game_date(response(200, MARCH_PAGE)) == date(2027, 3, 31)
+
+
+def test_month_page_fetched_mid_month_is_not_final(tmp_path):
+    state = CrawlState(str(tmp_path / "state.json"))
+    page = response(200, MARCH_PAGE)
+    state.record(page, last_game_date(page), today=date(2027, 3, 20))
+    assert not state.is_final(MONTH_URL)
+    assert state.conditional_headers(MONTH_URL) == {"If-None-Match": '"v1"'}
+
+
+def test_not_modified_after_the_month_ends_makes_the_page_final(tmp_path):
+    state = CrawlState(str(tmp_path / "state.json"))
+    page = response(200, MARCH_PAGE)
+    state.record(page, last_game_date(page), today=date(2027, 3, 20))
+
+    state.record(response(304), today=date(2027, 4, 1))  # Inside the grace period
+    assert not state.is_final(MONTH_URL)
+    state.record(response(304), today=date(2027, 4, 10))
+    assert state.is_final(MONTH_URL)
+
+    state.save()
+    assert CrawlState(str(tmp_path / "state.json")).is_final(MONTH_URL)
+
+
+def test_failed_season_request_falls_back_to_saved_months(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    saved = CrawlState(boxscore_url_extraction.SEASON_STATE_FILE)
+    saved.pages[SEASON_URL] = {"final": False, "months": [MONTH_URL]}
+    saved.save()
+
+    spider = LinksSpider()
+    leagues = HtmlResponse(LinksSpider.start_urls[0], body=LEAGUES_PAGE)
+    assert [request.url for request in spider.parse(leagues)] == [SEASON_URL]
+    spider.closed("finished")  # parse_season never ran: the request failed
+
+    with open(boxscore_url_extraction.OUTPUT_FILE) as file:
+        assert file.read().split() == [MONTH_URL]
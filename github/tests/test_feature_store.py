@@ -0,0 +1,80 @@
+import logging
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from feature_store import FEATURE_COLUMNS, GAME_ROW_COLUMNS, FeatureStore, update_from_dataset
+from matchup_builder import pregame_features
+from parquet_sink import ParquetSink
+
+TEAMS = ["ATL", "BOS", "CHI", "DEN", "LAL", "MIA"]
+SEASON_STARTS = {"2022-2023": "2022-10-18", "2023-2024": "2023-10-24"}
+DAYS_PER_SEASON = 25
+
+
+def synthetic_games(seed=7) -> pd.DataFrame:
+    """Two short seasons; every team plays at most once a day, as in a real schedule."""
+    rng = np.random.default_rng(seed)
+    rows = []
+    for season, start in SEASON_STARTS.items():
+        for day in pd.date_range(start, periods=DAYS_PER_SEASON, freq="2D"):
+            order = rng.permutation(TEAMS)
+            for home, away in zip(order[::2], order[1::2]):
+                url = f"https://www.basketball-reference.com/boxscores/{day:%Y%m%d}0{home}.html"
+                for team in (home, away):
+                    row = {"Game URL": url, "Game Date": day, "NBA Season": season, "Team": team}
+                    row |= {name: float(rng.integers(80, 130)) if name == "PTS" else float(rng.uniform(0, 50))
+                            for name in GAME_ROW_COLUMNS[4:]}
+                    rows.append(row)
+    return pd.DataFrame(rows, columns=GAME_ROW_COLUMNS)
+
+
+def assert_same_features(left: pd.DataFrame, right: pd.DataFrame):
+    assert list(left.columns) == list(right.columns)
+    for name in ["Game URL", "NBA Season", "Team"]:
+        assert left[name].astype(str).tolist() == right[name].astype(str).tolist()
+    assert (pd.to_datetime(left["Game Date"]) == pd.to_datetime(right["Game Date"])).all()
+    np.testing.assert_allclose(left[FEATURE_COLUMNS].to_numpy(np.float64), right[FEATURE_COLUMNS].to_numpy(np.float64),
+                               rtol=1e-5, atol=1e-4, equal_nan=True)
+
+
+def test_store_and_vectorized_builder_agree():
+    games = synthetic_games()
+    store = FeatureStore()
+    for _, season in games.groupby("NBA Season"):
+        store.update(season)
+    assert_same_features(store.pregame_frame(), pregame_features(games))
+
+
+def test_late_game_rebuilds_its_teams(tmp_path, caplog):
+    games = synthetic_games()
+    late_url = games["Game URL"].iloc[len(games) // 4]  # A game early in the first season
+    late = games[games["Game URL"] == late_url]
+    root = str(tmp_path / "games")
+
+    with ParquetSink(root) as sink:
+        sink.write(games[games["Game URL"] != late_url])
+    store = FeatureStore()
+    update_from_dataset(store, root)
+
+    with ParquetSink(root) as sink:  # Re-scraped after the store moved past its date
+        sink.write(late)
+    with caplog.at_level(logging.WARNING):
+        assert update_from_dataset(store, root) == 2
+    assert "rebuilding 2 teams" in caplog.text and all(team in caplog.text for team in late["Team"])
+
+    assert_same_features(store.pregame_frame(), pregame_features(games))
+    scratch = FeatureStore()
+    update_from_dataset(scratch, root)
+    assert_same_features(store.pregame_frame(), scratch.pregame_frame())
+    assert update_from_dataset(store, root) == 0
+
+
+def test_update_refuses_games_older_than_the_store():
+    games = synthetic_games()
+    first_day = games["Game Date"] == games["Game Date"].min()
+    store = FeatureStore()
+    store.update(games[~first_day])
+    with pytest.raises(ValueError, match="rebuild the store"):
+        store.update(games[first_day])
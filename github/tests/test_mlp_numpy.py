@@ -0,0 +1,74 @@
+import copy
+import warnings
+
+import numpy as np
+import pytest
+
+from mlp_numpy import TOLERANCE, MLPFloat32, check, export
+from predict import load_artifact, predict_matrix, save_artifact
+
+COLUMNS = [f"feature_{i}" for i in range(8)]
+
+
+@pytest.fixture(scope="module")
+def artifact(tmp_path_factory):
+    from sklearn.exceptions import ConvergenceWarning
+    from sklearn.neural_network import MLPRegressor
+    from sklearn.preprocessing import StandardScaler
+
+    rng = np.random.default_rng(0)
+    X = rng.normal(100, 15, (500, len(COLUMNS)))
+    y = X[:, 0] - X[:, 1] + 0.5 * np.maximum(X[:, 2] - 100, 0) + rng.normal(0, 3, len(X))
+    scaler = StandardScaler().fit(X)
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", ConvergenceWarning)
+        model = MLPRegressor(hidden_layer_sizes=(16, 8), max_iter=200, random_state=0).fit(scaler.transform(X), y)
+    path = str(tmp_path_factory.mktemp("model") / "model.pkl")
+    save_artifact(path, scaler, model, COLUMNS)
+    return load_artifact(path)
+
+
+def inputs(artifact, rows=200, missing=0.0):
+    scaler = artifact["scaler"]
+    rng = np.random.default_rng(1)
+    X = (scaler.mean_ + scaler.scale_ * rng.standard_normal((rows, len(COLUMNS)))).astype(np.float32)
+    X[rng.random(X.shape) < missing] = np.nan
+    return X
+
+
+def test_memmap_engine_matches_sklearn(artifact, tmp_path):
+    path = str(tmp_path / "model.json")
+    export(artifact, path)
+    engine = MLPFloat32.open(path, verify=True)
+    assert engine.feature_columns == COLUMNS
+
+    X = inputs(artifact)
+    expected = artifact["model"].predict(artifact["scaler"].transform(X.astype(np.float64)))
+    spread = max(float(np.std(expected)), 1.0)
+    np.testing.assert_allclose(engine.predict(X), expected, rtol=0, atol=TOLERANCE * spread)
+    assert engine.predict(X[0]) == pytest.approx(expected[0], abs=TOLERANCE * spread)
+
+
+def test_missing_features_score_like_predict_matrix(artifact, tmp_path):
+    path = str(tmp_path / "model.json")
+    export(artifact, path)
+    engine = MLPFloat32.open(path)
+
+    X = inputs(artifact, missing=0.1)
+    assert np.isnan(X).any()
+    assert check(artifact, engine, X) <= TOLERANCE
+    assert np.isfinite(predict_matrix(artifact, X, COLUMNS)).all()
+
+
+def test_reexport_replaces_the_blob(artifact, tmp_path):
+    path = str(tmp_path / "model.json")
+    first = export(artifact, path)
+    old_blob = MLPFloat32.open(path).header["blob"]
+
+    shifted = copy.deepcopy(artifact["scaler"])
+    shifted.mean_ = shifted.mean_ + shifted.scale_  # Any change to the weights gives a new blob
+    artifact = {**artifact, "scaler": shifted}
+    export(artifact, path)
+    engine = MLPFloat32.open(path, verify=True)
+    assert engine.header["blob"] != old_blob and not (tmp_path / old_blob).exists()
+    assert not np.allclose(engine.predict(inputs(artifact)), first.predict(inputs(artifact)))
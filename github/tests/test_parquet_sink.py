@@ -0,0 +1,63 @@
+import os
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from game_schema import SCHEMA_VERSION
+from parquet_sink import SCHEMA_KEY, ParquetSink, compact, partition_dir, read_season, season_parts, seasons
+
+SEASON = "2023-2024"
+COLUMNS = ["Game URL", "Game Date", "NBA Season", "Team", "PTS"]
+
+
+def game(url, team, pts, day="2024-01-15", season=SEASON):
+    return {"Game URL": f"https://www.basketball-reference.com/boxscores/{url}.html", "Game Date": day,
+            "NBA Season": season, "Team": team, "PTS": str(pts)}
+
+
+def test_flush_writes_season_parts_atomically_with_the_schema_version(tmp_path):
+    root = str(tmp_path / "games")
+    flushed = []
+    with ParquetSink(root, on_flush=flushed.extend, buffer_rows=100) as sink:
+        sink.write([game("202401150BOS", "BOS", 110), game("202401150BOS", "LAL", 104)], refs=[1])
+        sink.write([game("202310240DEN", "DEN", 119, "2023-10-24", "2022-2023")], refs=[2])
+        assert season_parts(root, SEASON) == [] and flushed == []  # Still buffered
+    assert flushed == [1, 2]
+
+    assert seasons(root) == ["2022-2023", SEASON]
+    for season in seasons(root):
+        files = os.listdir(partition_dir(root, season))
+        assert len(files) == 1 and not any(name.endswith(".tmp") for name in files)
+        assert pq.read_schema(season_parts(root, season)[0]).metadata[SCHEMA_KEY] == SCHEMA_VERSION.encode()
+
+
+def test_compact_keeps_the_latest_copy_of_each_team_game(tmp_path):
+    root = str(tmp_path / "games")
+    with ParquetSink(root) as sink:
+        sink.write([game("202401150BOS", "BOS", 110), game("202401150BOS", "LAL", 104)])
+    with ParquetSink(root) as sink:  # Re-scraped after a lost lease, with a stat corrected
+        sink.write([game("202401150BOS", "BOS", 111), game("202401170BOS", "BOS", 98, "2024-01-17")])
+    assert len(season_parts(root, SEASON)) == 2
+    assert len(read_season(root, SEASON)) == 4
+
+    compact(root)
+    assert len(season_parts(root, SEASON)) == 1
+    df = read_season(root, SEASON, COLUMNS)
+    assert list(zip(df["Team"].astype(str), df["PTS"].tolist())) == [("BOS", 111), ("LAL", 104), ("BOS", 98)]
+    assert str(df["PTS"].dtype) == "Int16" and str(df["Team"].dtype) == "category"
+
+
+def test_parts_from_an_older_schema_are_converted_then_rewritten(tmp_path):
+    root = str(tmp_path / "games")
+    os.makedirs(partition_dir(root, SEASON))
+    old_part = os.path.join(partition_dir(root, SEASON), "part-old.parquet")
+    pq.write_table(pa.Table.from_pylist([game("202401150BOS", "BOS", 110)]), old_part)  # All text, no version
+
+    df = read_season(root, SEASON, COLUMNS)
+    assert df["PTS"].tolist() == [110] and str(df["Game Date"].dtype).startswith("datetime64")
+
+    compact(root)
+    [part] = season_parts(root, SEASON)
+    assert part != old_part
+    assert pq.read_schema(part).metadata[SCHEMA_KEY] == SCHEMA_VERSION.encode()
+    assert read_season(root, SEASON, COLUMNS)["PTS"].tolist() == [110]
@@ -0,0 +1,26 @@
+from datetime import datetime
+
+from todays_games import parse_games
+
+SCHEDULE_PAGE = """<table id="schedule"><tbody>
+<tr>
+  <th data-stat="date_game"><a href="/boxscores/index.fcgi?month=3&day=3&year=2025">Mon, Mar 3, 2025</a></th>
+  <td data-stat="visitor_team_name"><a href="/teams/PHO/2025.html">Phoenix Suns</a></td>
+  <td data-stat="home_team_name"><a href="/teams/BOS/2025.html">Boston Celtics</a></td>
+</tr>
+<tr>
+  <th data-stat="date_game"><a href="/boxscores/index.fcgi?month=3&day=30&year=2025">Sun, Mar 30, 2025</a></th>
+  <td data-stat="visitor_team_name"><a href="/teams/BRK/2025.html">Brooklyn Nets</a></td>
+  <td data-stat="home_team_name"><a href="/teams/NYK/2025.html">New York Knicks</a></td>
+</tr>
+</tbody></table>"""
+
+
+def test_single_digit_day_matches_the_unpadded_table_date():
+    games = parse_games(SCHEDULE_PAGE, datetime(2025, 3, 3))
+    assert games == [{"date": "2025-03-03", "visitor_team": "Phoenix Suns", "home_team": "Boston Celtics",
+                      "visitor": "PHO", "home": "BOS"}]
+
+
+def test_two_digit_day():
+    assert [game["home"] for game in parse_games(SCHEDULE_PAGE, datetime(2025, 3, 30))] == ["NYK"]
@@ -0,0 +1,134 @@
+import sqlite3
+import time
+
+from work_queue import (MAX_RETRIES, STATUS_DONE, STATUS_FAILED, STATUS_PENDING, CompletionTracker,
+                        SqliteWorkQueue)
+
+URLS = [f"https://www.basketball-reference.com/boxscores/2024011{i}0BOS.html" for i in range(5)]
+
+
+def open_queue(path, worker_id="worker-a", **kwargs):
+    work_queue = SqliteWorkQueue(str(path), worker_id=worker_id, **kwargs)
+    work_queue.add(URLS)
+    return work_queue
+
+
+def rows(path):
+    """{url: (scraped_status, retry_count, lease_owner)}"""
+    with sqlite3.connect(str(path)) as conn:
+        return {url: (status, retries, owner) for url, status, retries, owner in
+                conn.execute("SELECT game_url, scraped_status, retry_count, lease_owner FROM game_urls")}
+
+
+def test_claims_never_overlap_between_workers(tmp_path):
+    path = tmp_path / "queue.db"
+    first, second = open_queue(path), open_queue(path, "worker-b")
+
+    a, b = first.claim(3), second.claim(3)
+    assert [item.url for item in a] == URLS[:3]
+    assert [item.url for item in b] == URLS[3:]
+    assert first.claim(3) == []
+    assert {owner for _, _, owner in rows(path).values()} == {"worker-a", "worker-b"}
+
+
+def test_expired_lease_is_reclaimed_and_the_old_owner_can_no_longer_record(tmp_path):
+    path = tmp_path / "queue.db"
+    crashed = open_queue(path, lease_seconds=-1)  # Every lease it takes has already expired
+    survivor = open_queue(path, "worker-b")
+
+    stale = crashed.claim(2)
+    reclaimed = survivor.claim(2)
+    assert reclaimed == stale
+
+    crashed.complete(item.id for item in stale)  # Lease is gone: ignored
+    assert all(rows(path)[item.url][:2] == (STATUS_PENDING, 0) for item in stale)
+    survivor.complete(item.id for item in reclaimed)
+    assert all(rows(path)[item.url] == (STATUS_DONE, 0, None) for item in reclaimed)
+
+
+def test_release_returns_items_to_the_pool(tmp_path):
+    work_queue = open_queue(tmp_path / "queue.db")
+    items = work_queue.claim(2)
+    work_queue.release(item.id for item in items)
+    assert work_queue.claim(2) == items
+
+
+def test_tracker_records_done_failed_and_retry_outcomes(tmp_path):
+    path = tmp_path / "queue.db"
+    work_queue = open_queue(path)
+    items = work_queue.claim(len(URLS))
+    with CompletionTracker(work_queue, batch_size=len(URLS), flush_seconds=60) as tracker:
+        tracker.done_many([items[0].id, items[1].id])
+        tracker.failed(items[2].id)
+        tracker.retry(items[3].id)
+        assert all(status == STATUS_PENDING for status, _, _ in rows(path).values())  # Still buffered
+    state = rows(path)
+    assert state[URLS[0]] == state[URLS[1]] == (STATUS_DONE, 0, None)
+    assert state[URLS[2]] == (STATUS_FAILED, 0, None)
+    assert state[URLS[3]] == (STATUS_PENDING, 1, None)
+    assert state[URLS[4]] == (STATUS_PENDING, 0, "worker-a")  # Never reported: still leased
+
+
+def test_retry_marks_failed_once_retries_run_out(tmp_path):
+    path = tmp_path / "queue.db"
+    work_queue = open_queue(path)
+    for attempt in range(1, MAX_RETRIES + 1):
+        item = work_queue.claim(1)[0]
+        assert item.url == URLS[0]
+        with CompletionTracker(work_queue) as tracker:
+            tracker.retry(item.id)
+        status, retries, _ = rows(path)[URLS[0]]
+        assert retries == attempt
+        assert status == (STATUS_FAILED if attempt == MAX_RETRIES else STATUS_PENDING)
+    assert work_queue.claim(1)[0].url == URLS[1]
+
+
+def test_full_batch_flushes_immediately(tmp_path):
+    path = tmp_path / "queue.db"
+    work_queue = open_queue(path)
+    items = work_queue.claim(2)
+    tracker = CompletionTracker(work_queue, batch_size=2, flush_seconds=60)
+    try:
+        tracker.done(items[0].id)
+        assert rows(path)[items[0].url][0] == STATUS_PENDING
+        tracker.done(items[1].id)
+        assert all(rows(path)[item.url][0] == STATUS_DONE for item in items)
+    finally:
+        tracker.close()
+
+
+def test_timer_flushes_a_partial_batch(tmp_path):
+    path = tmp_path / "queue.db"
+    work_queue = open_queue(path)
+    item = work_queue.claim(1)[0]
+    tracker = CompletionTracker(work_queue, batch_size=100, flush_seconds=0.05)
+    try:
+        tracker.done(item.id)
+        deadline = time.monotonic() + 5
+        while rows(path)[item.url][0] != STATUS_DONE and time.monotonic() < deadline:
+            time.sleep(0.02)
+        assert rows(path)[item.url][0] == STATUS_DONE
+    finally:
+        tracker.close()
+
+
+def test_failed_flush_keeps_the_outcomes_for_the_next_one(tmp_path):
+    path = tmp_path / "queue.db"
+    work_queue = open_queue(path)
+    item = work_queue.claim(1)[0]
+
+    class FlakyQueue:
+        calls = 0
+
+        def record(self, outcomes):
+            FlakyQueue.calls += 1
+            if FlakyQueue.calls == 1:
+                raise sqlite3.OperationalError("database is locked")
+            work_queue.record(outcomes)
+
+    tracker = CompletionTracker(FlakyQueue(), flush_seconds=60)
+    tracker.done(item.id)
+    tracker.flush()
+    assert rows(path)[item.url][0] == STATUS_PENDING
+    tracker.close()
+    assert rows(path)[item.url][0] == STATUS_DONE
@@ -1,38 +1,65 @@
-import requests
-from bs4 import BeautifulSoup
-from datetime import datetime
-
-# Get today's date in the format used in the table (e.g., 'Mon, Mar 10, 2025')
-today = datetime.today().strftime('%a, %b %d, %Y')
-
-# Define the URL for the current month
-url = "https://www.basketball-reference.com/leagues/NBA_2025_games-march.html"
-
-# Request the webpage
-response = requests.get(url)
-response.raise_for_status()  # Ensure we got a successful response
-
-# Parse the HTML
-soup = BeautifulSoup(response.text, 'html.parser')
-
-# Find all rows in the table
-rows = soup.find_all('tr')
-
-# Extract today's games
-games_today = []
-for row in rows:
-    date_cell = row.find('th', {'data-stat': 'date_game'})
-    if date_cell:
-        game_date = date_cell.text.strip()
-        if game_date == today:
-            visitor_team = row.find('td', {'data-stat': 'visitor_team_name'}).text.strip()
-            home_team = row.find('td', {'data-stat': 'home_team_name'}).text.strip()
-            games_today.append((visitor_team, home_team))
-
-# Output results
-if games_today:
-    print("Today's NBA Games:")
-    for game in games_today:
-        print(f"{game[0]} vs. {game[1]}")
-else:
-    print("No games found for today.")
\ No newline at end of file
+import re
+import requests
+from bs4 import BeautifulSoup
+from datetime import datetime
+
+from boxscore_parser import season_for
+
+# Month schedule page for the season a date falls in, e.g. NBA_2025_games-march.html
+SCHEDULE_URL = "https://www.basketball-reference.com/leagues/NBA_{year}_games-{month}.html"
+TEAM_HREF = re.compile(r"/teams/([A-Z0-9]{3})/")  # Same codes as the box score tables (BOS, PHO, BRK...)
+
+
+def schedule_url(day):
+    year = season_for(day).split("-")[1]
+    return SCHEDULE_URL.format(year=year, month=day.strftime("%B").lower())
+
+def parse_games(html, day):
+    """
+    Every game scheduled on `day` in a month schedule page, as dicts with the visitor and
+    home team names and their abbreviations (taken from the team links).
+    """
+    # Dates in the table look like 'Mon, Mar 10, 2025' and 'Mon, Mar 3, 2025': the day isn't zero-padded
+    wanted = f"{day:%a, %b} {day.day}, {day.year}"
+
+    # Parse the HTML
+    soup = BeautifulSoup(html, 'html.parser')
+
+    games = []
+    for row in soup.find_all('tr'):
+        date_cell = row.find('th', {'data-stat': 'date_game'})
+        if date_cell and date_cell.text.strip() == wanted:
+            visitor_cell = row.find('td', {'data-stat': 'visitor_team_name'})
+            home_cell = row.find('td', {'data-stat': 'home_team_name'})
+            games.append({
+                "date": day.strftime("%Y-%m-%d"),
+                "visitor_team": visitor_cell.text.strip(),
+                "home_team": home_cell.text.strip(),
+                "visitor": _team_abbreviation(visitor_cell),
+                "home": _team_abbreviation(home_cell),
+            })
+    return games
+
+def _team_abbreviation(cell):
+    link = cell.find('a')
+    match = TEAM_HREF.search(link.get('href', '')) if link else None
+    return match.group(1) if match else None
+
+def get_games(day=None):
+    """Fetch the schedule page for `day` (default: today) and return that day's games."""
+    day = day or datetime.today()
+    response = requests.get(schedule_url(day), timeout=10)
+    response.raise_for_status()  # Ensure we got a successful response
+    return parse_games(response.text, day)
+
+
+if __name__ == "__main__":
+    games_today = get_games()
+
+    # Output results
+    if games_today:
+        print("Today's NBA Games:")
+        for game in games_today:
+            print(f"{game['visitor_team']} vs. {game['home_team']}")
+    else:
+        print("No games found for today.")
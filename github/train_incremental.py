@@ -0,0 +1,204 @@
+import argparse
+import copy
+import logging
+import os
+import resource
+import tempfile
+import time
+from typing import Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from feature_store import FEATURE_COLUMNS, GAME_ROW_COLUMNS, GAMES_DIR, FeatureStore
+from game_schema import csv_options, to_typed_frame
+from parquet_sink import ParquetSink, read_season, seasons
+from predict import ENGINE_FILE, HIDDEN_LAYERS, MATCHUP_COLUMNS, MODEL_FILE, TARGET, home_team, save_artifact
+
+# ✅ Training Settings
+MATCHUPS_FILE = "matchups.parquet"  # Pre-game features + target per game, spilled to disk once per run
+BATCH_ROWS = 4096  # Rows per row group and per partial_fit call; this, not the dataset, bounds memory
+CSV_CHUNK_ROWS = 20000
+EPOCHS = 20
+HOLDOUT_SEASONS = 1  # Most recent seasons kept out of training and scored after every epoch
+LEARNING_RATE = 1e-3
+MATCHUP_SCHEMA = pa.schema(
+    [("Game URL", pa.string()), ("Game Date", pa.timestamp("us")), ("NBA Season", pa.string())]
+    + [(name, pa.float32()) for name in MATCHUP_COLUMNS + [TARGET]]
+)
+
+
+# ✅ Pass 1: game rows -> pre-game matchups on disk, one season in memory at a time
+def iter_seasons(source: str, spool_dir: str) -> Iterator[Tuple[str, pd.DataFrame]]:
+    """
+    Yield (season, game rows) in season order from a ParquetSink dataset or a game-row CSV. A CSV
+    can be in any order, so it is first spooled chunk by chunk into a season-partitioned dataset.
+    """
+    if source.endswith(".csv"):
+        with ParquetSink(spool_dir, buffer_rows=CSV_CHUNK_ROWS) as sink:
+            for chunk in pd.read_csv(source, chunksize=CSV_CHUNK_ROWS, **csv_options()):
+                sink.write(to_typed_frame(chunk))
+        source = spool_dir
+    for season in seasons(source):
+        yield season, read_season(source, season, GAME_ROW_COLUMNS)
+
+
+def season_matchups(store: FeatureStore, df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Add one season of game rows to the store, then return each game's pre-game matchup features
+    and home margin. as_of looks strictly before the game date, so adding the season first doesn't leak.
+    """
+    store.update(df)
+    df = df[df["Game Date"].notna()].drop_duplicates(["Game URL", "Team"], keep="last")
+    urls = df["Game URL"].astype(str)
+    is_home = (df["Team"].astype(str) == urls.map(home_team)).to_numpy()
+    home = df[is_home].set_index(urls[is_home])
+    away = df[~is_home].set_index(urls[~is_home])
+    away = away[~away.index.duplicated()]
+    home = home[home.index.isin(away.index)]
+    away = away.loc[home.index]
+
+    width = len(FEATURE_COLUMNS)
+    X = np.empty((len(home), 2 * width), dtype=np.float32)
+    for i, (day, home_abbr, away_abbr) in enumerate(zip(home["Game Date"], home["Team"].astype(str), away["Team"].astype(str))):
+        X[i, :width] = store.as_of_vector(home_abbr, day)
+        X[i, width:] = store.as_of_vector(away_abbr, day)
+    matchups = pd.DataFrame(X, columns=MATCHUP_COLUMNS)
+    matchups.insert(0, "Game URL", home.index.to_numpy())
+    matchups.insert(1, "Game Date", home["Game Date"].to_numpy())
+    matchups.insert(2, "NBA Season", home["NBA Season"].astype(str).to_numpy())
+    margin = home["PTS"].astype("float64").to_numpy() - away["PTS"].astype("float64").to_numpy()
+    matchups[TARGET] = margin.astype(np.float32)
+    return matchups[matchups[TARGET].notna()]
+
+
+def build_matchups(source: str, path: str = MATCHUPS_FILE) -> List[str]:
+    """Stream the game rows into a Parquet file of matchups, BATCH_ROWS per row group. Returns the seasons written."""
+    store = FeatureStore()
+    written = []
+    tmp_path = f"{path}.tmp"
+    with tempfile.TemporaryDirectory(prefix="train-spool-") as spool_dir, \
+            pq.ParquetWriter(tmp_path, MATCHUP_SCHEMA, compression="zstd") as writer:
+        for season, df in iter_seasons(source, spool_dir):
+            matchups = season_matchups(store, df)
+            for start in range(0, len(matchups), BATCH_ROWS):
+                writer.write_table(pa.Table.from_pandas(matchups.iloc[start:start + BATCH_ROWS],
+                                                        schema=MATCHUP_SCHEMA, preserve_index=False))
+            written.append(season)
+            logging.info(f"Season {season}: {len(matchups)} games")
+    os.replace(tmp_path, path)
+    return written
+
+
+# ✅ Pass 2+: stream batches back out of the matchups file
+def iter_batches(path: str, season_filter: Sequence[str], shuffle: Optional[np.random.Generator] = None
+                 ) -> Iterator[Tuple[np.ndarray, np.ndarray]]:
+    """
+    Yield (X, y) float32 batches of the games in `season_filter`, one row group at a time. With
+    `shuffle`, row groups are visited in random order and rows shuffled within each.
+    """
+    file = pq.ParquetFile(path)
+    wanted = set(season_filter)
+    groups = np.arange(file.num_row_groups)
+    if shuffle is not None:
+        shuffle.shuffle(groups)
+    for group in groups:
+        table = file.read_row_group(int(group), columns=["NBA Season"] + MATCHUP_COLUMNS + [TARGET])
+        keep = np.isin(table.column("NBA Season").to_numpy(zero_copy_only=False), list(wanted))
+        if not keep.any():
+            continue
+        X = np.column_stack([table.column(name).to_numpy(zero_copy_only=False) for name in MATCHUP_COLUMNS])[keep]
+        y = table.column(TARGET).to_numpy(zero_copy_only=False)[keep]
+        if shuffle is not None:
+            order = shuffle.permutation(len(y))
+            X, y = X[order], y[order]
+        yield X, y
+
+
+def _scaled(scaler, X: np.ndarray) -> np.ndarray:
+    scaled = scaler.transform(X)
+    scaled[np.isnan(scaled)] = 0.0  # Missing features at the training mean, as predict.predict_matrix does
+    return scaled
+
+
+def evaluate(scaler, model, path: str, season_filter: Sequence[str]) -> Optional[float]:
+    """Mean squared error over the games in `season_filter`, streamed."""
+    total, rows = 0.0, 0
+    for X, y in iter_batches(path, season_filter):
+        total += float(np.sum((model.predict(_scaled(scaler, X)) - y) ** 2))
+        rows += len(y)
+    return total / rows if rows else None
+
+
+def train(path: str = MATCHUPS_FILE, training: Sequence[str] = (), holdout: Sequence[str] = (),
+          epochs: int = EPOCHS, seed: int = 42):
+    """
+    Fit StandardScaler (partial_fit, one streamed pass) and MLPRegressor (partial_fit, `epochs`
+    shuffled passes) on the training seasons. Returns (scaler, best model by holdout MSE, history).
+    """
+    from sklearn.neural_network import MLPRegressor
+    from sklearn.preprocessing import StandardScaler
+
+    scaler = StandardScaler()
+    for X, _ in iter_batches(path, training):
+        scaler.partial_fit(X)  # NaN features are ignored
+
+    rng = np.random.default_rng(seed)
+    model = MLPRegressor(hidden_layer_sizes=HIDDEN_LAYERS, activation="relu", solver="adam",
+                         learning_rate_init=LEARNING_RATE, random_state=seed)
+    best, best_mse, history = None, None, []
+    for epoch in range(1, epochs + 1):
+        start, total, rows = time.perf_counter(), 0.0, 0
+        for X, y in iter_batches(path, training, shuffle=rng):
+            model.partial_fit(_scaled(scaler, X), y)
+            total += model.loss_ * 2 * len(y)  # loss_ is half the batch MSE (plus the L2 term)
+            rows += len(y)
+        holdout_mse = evaluate(scaler, model, path, holdout)
+        train_mse = float(total / max(rows, 1))
+        history.append({"epoch": epoch, "train_mse": train_mse, "holdout_mse": holdout_mse})
+        logging.info(f"Epoch {epoch}: train MSE {train_mse:.2f}, holdout MSE "
+                     f"{'n/a' if holdout_mse is None else f'{holdout_mse:.2f}'}, "
+                     f"{time.perf_counter() - start:.1f}s")
+        if holdout_mse is None or best_mse is None or holdout_mse < best_mse:
+            best, best_mse = copy.deepcopy(model), holdout_mse
+    return scaler, best, history
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Train the MLP out of core: stream per-game rows into matchups, then partial_fit over epochs.")
+    parser.add_argument("--games", default=GAMES_DIR, help="ParquetSink game dataset, or a CSV of game rows")
+    parser.add_argument("--matchups", default=MATCHUPS_FILE, help="Where the pre-game matchup features are spilled")
+    parser.add_argument("--reuse-matchups", action="store_true", help="Skip pass 1 and train on an existing --matchups file")
+    parser.add_argument("--epochs", type=int, default=EPOCHS)
+    parser.add_argument("--holdout-seasons", type=int, default=HOLDOUT_SEASONS)
+    parser.add_argument("--model", default=MODEL_FILE)
+    parser.add_argument("--engine", default=ENGINE_FILE, help="Memory-mapped export of the model")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+    start = time.time()
+    if args.reuse_matchups:
+        written = sorted(set(pq.read_table(args.matchups, columns=["NBA Season"]).column("NBA Season").to_pylist()))
+    else:
+        written = build_matchups(args.games, args.matchups)
+    holdout = written[-args.holdout_seasons:] if args.holdout_seasons else []
+    training = [season for season in written if season not in holdout]
+    if not training:
+        raise SystemExit(f"❌ {args.matchups} has {len(written)} season(s) and --holdout-seasons is "
+                         f"{args.holdout_seasons}; no season is left to train on")
+    scaler, model, history = train(args.matchups, training, holdout, args.epochs)
+
+    from mlp_numpy import export
+    from predict import load_artifact
+
+    save_artifact(args.model, scaler, model, MATCHUP_COLUMNS,
+                  metrics={"training_seasons": training, "holdout_seasons": holdout, "history": history})
+    export(load_artifact(args.model), args.engine)
+    peak_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024  # KB on Linux
+    logging.info(f"✅ Saved {args.model} and {args.engine} in {time.time() - start:.1f}s; peak RSS {peak_mb:.0f} MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,364 @@
+import logging
+import os
+import queue
+import socket
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Callable, Dict, Iterable, List
+
+# ✅ Queue Settings
+LEASE_SECONDS = 15 * 60  # A claimed URL returns to the pool if its worker hasn't finished it by then
+POOL_SIZE = 4
+IN_CHUNK = 1000  # Max ids per IN (...) list; SQL Server caps a statement at 2100 parameters
+MAX_RETRIES = 3  # A URL that needed this many retries is marked failed instead of pending
+
+# ✅ scraped_status codes
+STATUS_PENDING = 0
+STATUS_DONE = 1
+STATUS_FAILED = 2
+_RETRY = -1  # Tracker-only outcome: back to pending with retry_count + 1, or failed once retries run out
+
+# ✅ One-off migration for the RDS table (SQL Server)
+MSSQL_LEASE_DDL = """
+ALTER TABLE nba.game_urls ADD lease_owner VARCHAR(128) NULL, lease_expires DATETIME2 NULL;
+CREATE INDEX ix_game_urls_pending ON nba.game_urls (scraped_status, lease_expires) INCLUDE (game_url);
+"""
+
+MSSQL_RETRY_DDL = """
+ALTER TABLE nba.game_urls ADD retry_count INT NOT NULL DEFAULT 0;
+"""
+
+
+@dataclass(frozen=True)
+class WorkItem:
+    id: int
+    url: str
+
+
+def default_worker_id() -> str:
+    return f"{socket.gethostname()}-{os.getpid()}"
+
+
+def _chunks(ids: List[int], size: int = IN_CHUNK):
+    for i in range(0, len(ids), size):
+        yield ids[i:i + size]
+
+
+def _id_list(ids: Iterable[int]) -> str:
+    """Render integer ids for an IN (...) list; int() guards against anything that isn't an id."""
+    return ", ".join(str(int(i)) for i in ids) or "NULL"
+
+
+def _record_statement(table: str, outcomes: Dict[int, int], placeholder: str) -> str:
+    """
+    One set-based UPDATE that applies done / failed / retry outcomes to a chunk of ids.
+
+    Keyed on the integer primary key, so each chunk is a clustered-index seek rather
+    than a scan over the game_url strings.
+    """
+    done = [i for i, o in outcomes.items() if o == STATUS_DONE]
+    failed = [i for i, o in outcomes.items() if o == STATUS_FAILED]
+    retry = [i for i, o in outcomes.items() if o == _RETRY]
+    return f"""
+        UPDATE {table} SET
+            scraped_status = CASE
+                WHEN id IN ({_id_list(done)}) THEN {STATUS_DONE}
+                WHEN id IN ({_id_list(failed)}) THEN {STATUS_FAILED}
+                WHEN retry_count + 1 >= {MAX_RETRIES} THEN {STATUS_FAILED}
+                ELSE {STATUS_PENDING}
+            END,
+            retry_count = CASE WHEN id IN ({_id_list(retry)}) THEN retry_count + 1 ELSE retry_count END,
+            lease_owner = NULL,
+            lease_expires = NULL
+        WHERE id IN ({_id_list(outcomes)}) AND lease_owner = {placeholder}
+    """
+
+
+def _outcome_chunks(outcomes: Dict[int, int]):
+    items = list(outcomes.items())
+    for i in range(0, len(items), IN_CHUNK):
+        yield dict(items[i:i + IN_CHUNK])
+
+
+class ConnectionPool:
+    """Small thread-safe pool; connections are created lazily and dropped if they error."""
+
+    def __init__(self, connect: Callable, size: int = POOL_SIZE):
+        self._connect = connect
+        self._idle = queue.LifoQueue(maxsize=size)
+        self._slots = queue.Queue(maxsize=size)
+        for _ in range(size):
+            self._slots.put(None)
+
+    @contextmanager
+    def connection(self):
+        self._slots.get()
+        try:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                conn = self._connect()
+            try:
+                yield conn
+            except Exception:
+                try:
+                    conn.close()
+                except Exception:
+                    pass
+                raise
+            self._idle.put(conn)
+        finally:
+            self._slots.put(None)
+
+    def close(self):
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                return
+
+
+class MssqlWorkQueue:
+    """
+    Work queue over nba.game_urls on SQL Server.
+
+    claim() leases a batch atomically: rows are locked with UPDLOCK/READPAST, so two
+    workers claiming at the same time skip each other's rows instead of blocking or
+    double-claiming. A lease that expires (worker died) makes the row claimable again.
+    """
+
+    def __init__(self, pool: ConnectionPool, table: str, worker_id: str = None, lease_seconds: int = LEASE_SECONDS):
+        self.pool = pool
+        self.table = table
+        self.worker_id = worker_id or default_worker_id()
+        self.lease_seconds = lease_seconds
+
+    def claim(self, limit: int) -> List[WorkItem]:
+        query = f"""
+            WITH batch AS (
+                SELECT TOP ({int(limit)}) id, game_url, lease_owner, lease_expires
+                FROM {self.table} WITH (ROWLOCK, UPDLOCK, READPAST)
+                WHERE scraped_status = 0
+                  AND (lease_expires IS NULL OR lease_expires < SYSUTCDATETIME())
+                ORDER BY id
+            )
+            UPDATE batch
+            SET lease_owner = %s, lease_expires = DATEADD(second, {int(self.lease_seconds)}, SYSUTCDATETIME())
+            OUTPUT inserted.id, inserted.game_url
+        """
+        with self.pool.connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(query, (self.worker_id,))
+            items = [WorkItem(row[0], row[1]) for row in cursor.fetchall()]
+            conn.commit()
+        return sorted(items, key=lambda item: item.id)
+
+    def complete(self, ids: Iterable[int]) -> None:
+        """Mark finished ids as scraped in one UPDATE per IN_CHUNK ids."""
+        self.record({i: STATUS_DONE for i in ids})
+
+    def release(self, ids: Iterable[int]) -> None:
+        """Give leased ids back to the queue without completing them."""
+        self._update(ids, "lease_owner = NULL, lease_expires = NULL")
+
+    def record(self, outcomes: Dict[int, int]) -> None:
+        """Apply {id: STATUS_DONE | STATUS_FAILED | _RETRY} in one statement per IN_CHUNK ids."""
+        if not outcomes:
+            return
+        with self.pool.connection() as conn:
+            cursor = conn.cursor()
+            for chunk in _outcome_chunks(outcomes):
+                cursor.execute(_record_statement(self.table, chunk, "%s"), (self.worker_id,))
+            conn.commit()
+
+    def _update(self, ids: Iterable[int], assignments: str) -> None:
+        ids = list(ids)
+        if not ids:
+            return
+        with self.pool.connection() as conn:
+            cursor = conn.cursor()
+            for chunk in _chunks(ids):
+                cursor.execute(
+                    f"UPDATE {self.table} SET {assignments} WHERE id IN ({_id_list(chunk)}) AND lease_owner = %s",
+                    (self.worker_id,),
+                )
+            conn.commit()
+
+
+class SqliteWorkQueue:
+    """
+    Local stand-in for MssqlWorkQueue with the same API and lease semantics.
+
+    BEGIN IMMEDIATE takes SQLite's write lock for the claim, which gives the same
+    "no two workers get the same URL" guarantee across threads and processes.
+    """
+
+    def __init__(self, path: str, table: str = "game_urls", worker_id: str = None, lease_seconds: int = LEASE_SECONDS):
+        self.path = path
+        self.table = table
+        self.worker_id = worker_id or default_worker_id()
+        self.lease_seconds = lease_seconds
+        self.pool = ConnectionPool(self._connect, size=1)
+        with self.pool.connection() as conn:
+            conn.execute(
+                f"""CREATE TABLE IF NOT EXISTS {self.table} (
+                    id INTEGER PRIMARY KEY,
+                    game_url TEXT NOT NULL UNIQUE,
+                    scraped_status INTEGER NOT NULL DEFAULT 0,
+                    retry_count INTEGER NOT NULL DEFAULT 0,
+                    lease_owner TEXT,
+                    lease_expires REAL
+                )"""
+            )
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30, isolation_level=None, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        return conn
+
+    def add(self, urls: Iterable[str]) -> None:
+        """Seed the queue (local testing only)."""
+        with self.pool.connection() as conn:
+            conn.executemany(
+                f"INSERT OR IGNORE INTO {self.table} (game_url) VALUES (?)", ((url,) for url in urls)
+            )
+
+    def claim(self, limit: int) -> List[WorkItem]:
+        now = time.time()
+        with self.pool.connection() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                rows = conn.execute(
+                    f"""SELECT id, game_url FROM {self.table}
+                        WHERE scraped_status = 0 AND (lease_expires IS NULL OR lease_expires < ?)
+                        ORDER BY id LIMIT ?""",
+                    (now, int(limit)),
+                ).fetchall()
+                if rows:
+                    conn.execute(
+                        f"UPDATE {self.table} SET lease_owner = ?, lease_expires = ? "
+                        f"WHERE id IN ({_id_list(row[0] for row in rows)})",
+                        (self.worker_id, now + self.lease_seconds),
+                    )
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+        return [WorkItem(row[0], row[1]) for row in rows]
+
+    def complete(self, ids: Iterable[int]) -> None:
+        self.record({i: STATUS_DONE for i in ids})
+
+    def release(self, ids: Iterable[int]) -> None:
+        self._update(ids, "lease_owner = NULL, lease_expires = NULL")
+
+    def record(self, outcomes: Dict[int, int]) -> None:
+        if not outcomes:
+            return
+        with self.pool.connection() as conn:
+            conn.execute("BEGIN")
+            for chunk in _outcome_chunks(outcomes):
+                conn.execute(_record_statement(self.table, chunk, "?"), (self.worker_id,))
+            conn.execute("COMMIT")
+
+    def _update(self, ids: Iterable[int], assignments: str) -> None:
+        ids = list(ids)
+        if not ids:
+            return
+        with self.pool.connection() as conn:
+            conn.execute("BEGIN")
+            for chunk in _chunks(ids):
+                conn.execute(
+                    f"UPDATE {self.table} SET {assignments} WHERE id IN ({_id_list(chunk)}) AND lease_owner = ?",
+                    (self.worker_id,),
+                )
+            conn.execute("COMMIT")
+
+
+def drain(work_queue, batch_size: int):
+    """Yield claimed items batch by batch until nothing is claimable."""
+    while True:
+        items = work_queue.claim(batch_size)
+        if not items:
+            logging.info("✅ No claimable URLs left.")
+            return
+        yield items
+
+
+class CompletionTracker:
+    """
+    Buffers per-URL outcomes and writes them back in bulk.
+
+    Workers call done() / failed() / retry() per game; the buffer is flushed as one
+    set-based UPDATE when it reaches `batch_size` or every `flush_seconds`, whichever
+    comes first. flush_seconds must stay well under the lease so finished work is
+    recorded before another worker could reclaim it. A failed flush keeps the buffer
+    and tries again next time.
+    """
+
+    def __init__(self, work_queue, batch_size: int = 100, flush_seconds: float = 30):
+        self.work_queue = work_queue
+        self.batch_size = batch_size
+        self.flush_seconds = flush_seconds
+        self._pending: Dict[int, int] = {}
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._timer = threading.Thread(target=self._run_timer, name="completion-flush", daemon=True)
+        self._timer.start()
+
+    def done(self, item_id: int) -> None:
+        self._add(item_id, STATUS_DONE)
+
+    def failed(self, item_id: int) -> None:
+        self._add(item_id, STATUS_FAILED)
+
+    def retry(self, item_id: int) -> None:
+        self._add(item_id, _RETRY)
+
+    def done_many(self, ids: Iterable[int]) -> None:
+        for item_id in ids:
+            self._add(item_id, STATUS_DONE, flush=False)
+        self._maybe_flush()
+
+    def _add(self, item_id: int, outcome: int, flush: bool = True) -> None:
+        with self._lock:
+            self._pending[item_id] = outcome
+        if flush:
+            self._maybe_flush()
+
+    def _maybe_flush(self) -> None:
+        if len(self._pending) >= self.batch_size:
+            self.flush()
+
+    def flush(self) -> None:
+        with self._flush_lock:
+            with self._lock:
+                outcomes, self._pending = self._pending, {}
+            if not outcomes:
+                return
+            try:
+                self.work_queue.record(outcomes)
+            except Exception as e:
+                logging.error(f"Failed to record {len(outcomes)} outcomes, will retry: {e}")
+                with self._lock:
+                    # Newer outcomes for the same id win
+                    self._pending = {**outcomes, **self._pending}
+
+    def _run_timer(self) -> None:
+        while not self._stop.wait(self.flush_seconds):
+            self.flush()
+
+    def close(self) -> None:
+        self._stop.set()
+        self._timer.join()
+        self.flush()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
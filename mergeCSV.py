@@ -1,5 +1,8 @@
+import argparse
 import csv
+import json
 import os
+from concurrent.futures import ThreadPoolExecutor
 
 # Directory containing CSV files
 directory = "NBAdata14_24"
@@ -7,24 +10,94 @@ directory = "NBAdata14_24"
 # Output CSV file name
 output_file = "output.csv"
 
-# List to store second row data from each file
-second_row_data = []
-
-# Iterate through each file in the directory
-for filename in os.listdir(directory):
-    if filename.endswith(".csv"):
-        with open(os.path.join(directory, filename), 'r', newline='') as csvfile:
-            csv_reader = csv.reader(csvfile)
-            # Skip the first row
-            next(csv_reader)
-            # Read the second row and append to second_row_data list
-            second_row = next(csv_reader, None)
-            if second_row:
-                second_row_data.append(second_row)
-
-# Write the second row data to a new CSV file
-with open(output_file, 'w', newline='') as csvfile:
-    csv_writer = csv.writer(csvfile)
-    csv_writer.writerows(second_row_data)
-
-print("Second row data from each file has been written to", output_file)
+# Manifest of files already merged into output_file: {"files": {name: mtime}, "output_bytes": n}
+manifest_file = "output.manifest.json"
+
+# Threads used to read new files (the work is I/O bound, mostly on network storage)
+read_workers = 16
+
+
+def read_second_row(path):
+    """Return the second row of a CSV (the first is the header), or None if it has none."""
+    with open(path, 'r', newline='') as csvfile:
+        csv_reader = csv.reader(csvfile)
+        # Skip the first row
+        next(csv_reader, None)
+        return next(csv_reader, None)
+
+
+def load_manifest():
+    try:
+        with open(manifest_file, 'r') as file:
+            return json.load(file)
+    except FileNotFoundError:
+        return {"files": {}, "output_bytes": 0}
+
+
+def save_manifest(manifest):
+    tmp_path = manifest_file + ".tmp"
+    with open(tmp_path, 'w') as file:
+        json.dump(manifest, file)
+    os.replace(tmp_path, manifest_file)
+
+
+def merge(full=False):
+    """
+    Append the second row of every CSV not merged yet to output_file.
+
+    New files are found from one directory scan and read in parallel, then appended in
+    file-name order so the output is the same however the directory lists. Each run only
+    appends, so a new file whose name sorts before files merged on an earlier run (csv1_*
+    after csv2_* from the same day, say) lands after them: the rows are the same as with
+    --full but their order can differ. Rebuild with --full when the order matters.
+
+    The manifest records each merged file's mtime and the output size after the append; a
+    run that died mid-append is rolled back to that size on the next start. An output
+    shorter than that was changed by something else and is rebuilt from scratch.
+    """
+    manifest = {"files": {}, "output_bytes": 0} if full else load_manifest()
+    merged = manifest["files"]
+
+    if not full and os.path.exists(output_file) and os.path.getsize(output_file) < manifest["output_bytes"]:
+        print(f"{output_file} is shorter than the manifest records; rebuilding it from scratch")
+        full = True
+    if full or not os.path.exists(output_file):
+        merged.clear()
+        manifest["output_bytes"] = 0
+        open(output_file, 'w').close()
+    elif os.path.getsize(output_file) > manifest["output_bytes"]:
+        with open(output_file, 'r+b') as file:
+            file.truncate(manifest["output_bytes"])
+
+    current = {
+        entry.name: entry.stat().st_mtime
+        for entry in os.scandir(directory)
+        if entry.is_file() and entry.name.endswith(".csv")
+    }
+    new_files = sorted(name for name in current if name not in merged)
+    changed = sorted(name for name in current if name in merged and merged[name] != current[name])
+    if changed:
+        print(f"{len(changed)} already-merged files changed since they were merged "
+              f"(e.g. {changed[0]}); run with --full to rebuild {output_file}")
+
+    with ThreadPoolExecutor(max_workers=read_workers) as executor:
+        second_row_data = list(executor.map(read_second_row, (os.path.join(directory, name) for name in new_files)))
+
+    # Append the second row data in file-name order
+    with open(output_file, 'a', newline='') as csvfile:
+        csv_writer = csv.writer(csvfile)
+        csv_writer.writerows(row for row in second_row_data if row)
+
+    for name in new_files:
+        merged[name] = current[name]
+    manifest["output_bytes"] = os.path.getsize(output_file)
+    save_manifest(manifest)
+
+    print(f"Second row data from {len(new_files)} new files has been appended to", output_file,
+          f"({len(merged)} files merged in total)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Merge the second row of each CSV in a directory into one file.")
+    parser.add_argument("--full", action="store_true", help="Ignore the manifest and rebuild the output from scratch")
+    merge(full=parser.parse_args().full)
@@ -1,11 +1,15 @@
 import requests
-from bs4 import BeautifulSoup
+from bs4 import BeautifulSoup, UnicodeDammit
 import csv
 from datetime import datetime
 import time
 import os
+import sys
 import logging
 
+# Shared modules live in github/ and import each other as top-level modules, so put it on the path
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "github"))
+from page_cache import PageCache
 
 # Set up logging
 logging.basicConfig(filename='error_log.txt', level=logging.ERROR, format='%(asctime)s - %(levelname)s - %(message)s')
@@ -48,38 +52,70 @@ labels = {
     "def_rtg": "Defensive Rating"
 }
 
+CACHE_DIR = "page_cache"
+page_cache = None  # Opened on the first fetch, so importing this module touches nothing; assign one to use another cache
+DOWNLOAD_DELAY = 60/15  # Download delay of 60/15 seconds (4 seconds)
+
+
+def get_page_cache():
+    """The module's PageCache over CACHE_DIR, opened on first use."""
+    global page_cache
+    if page_cache is None:
+        page_cache = PageCache(CACHE_DIR)
+    return page_cache
+
+
+def download(url):
+    response = requests.get(url, verify=False)
+    response.raise_for_status()
+    # The cache stores text, so decode the bytes here exactly as BeautifulSoup(response.content) would
+    # (meta charset / byte sniffing), not with requests' header-only guess behind response.text
+    return response.status_code, UnicodeDammit(response.content, is_html=True).unicode_markup
+
+
+# Function to pull both teams' totals rows (the rows whose minutes played is 240) out of a box score page
+# `parser` is the BeautifulSoup tree builder ('html.parser' or 'lxml')
+def extract_team_totals(html, parser="html.parser"):
+    soup = BeautifulSoup(html, parser)
+
+    # Find all td elements with class="right" and data-stat="mp"
+    mp_td_list = soup.find_all('td', {'class': 'right', 'data-stat': 'mp'})
+
+    # Arrays to store values
+    first_32_values = []
+    next_32_values = []
+
+    # Iterate through all td elements and filter by text value '240'
+    for td in mp_td_list:
+        if td.get_text() == '240':
+            # Get the parent tr tag
+            tr_tag = td.find_parent('tr')
+
+            # Find all td elements within the same tr tag with class="right" and data-stat attributes
+            next_10_elements = tr_tag.find_all('td', {'class': 'right', 'data-stat': True})[1:20]
+
+            # Extract and store desired data
+            for element in next_10_elements:
+                data_stat = element['data-stat']
+                if data_stat in labels:
+                    value = element.get_text()
+                    if len(first_32_values) < 32:
+                        first_32_values.append(value)
+                    else:
+                        next_32_values.append(value)
+    return first_32_values, next_32_values
+
+
 # Function to process a single URL and save CSV files
+# Returns True when the page came from the cache, so the caller can skip the download delay
 def process_url(url):
+    from_cache = False
     try: 
-        response = requests.get(url, verify=False)
-        response.raise_for_status()
-        soup = BeautifulSoup(response.content, "html.parser")
-
-        # Find all td elements with class="right" and data-stat="mp"
-        mp_td_list = soup.find_all('td', {'class': 'right', 'data-stat': 'mp'})
-
-        # Arrays to store values
-        first_32_values = []
-        next_32_values = []
-
-        # Iterate through all td elements and filter by text value '240'
-        for td in mp_td_list:
-            if td.get_text() == '240':
-                # Get the parent tr tag
-                tr_tag = td.find_parent('tr')
-
-                # Find all td elements within the same tr tag with class="right" and data-stat attributes
-                next_10_elements = tr_tag.find_all('td', {'class': 'right', 'data-stat': True})[1:20]
-
-                # Extract and store desired data
-                for element in next_10_elements:
-                    data_stat = element['data-stat']
-                    if data_stat in labels:
-                        value = element.get_text()
-                        if len(first_32_values) < 32:
-                            first_32_values.append(value)
-                        else:
-                            next_32_values.append(value)
+        page = get_page_cache().fetch(url, download)
+        from_cache = page.from_cache
+        if page.status != 200:
+            raise requests.HTTPError(f"{page.status} (cached) for url: {url}")
+        first_32_values, next_32_values = extract_team_totals(page.text)
 
         # Generate unique filenames with timestamp
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
@@ -111,16 +147,22 @@ def process_url(url):
     except Exception as e:
         logging.error(f"Unexpected error occured while accessing URL: {url} - {e}")
         print(f"Unexpected error occured while accessing URL: {url} - {e}")
+    return from_cache
+
+def main(url_file='boxscore_urlsv2.txt', delay=DOWNLOAD_DELAY):
+    # Create folder if it doesn't exist
+    os.makedirs("NBAdata14_24", exist_ok=True)
+
+    # Read URLs from file
+    with open(url_file, 'r') as file:
+        urls = file.readlines()
 
-# Create folder if it doesn't exist
-os.makedirs("NBAdata14_24", exist_ok=True)
+    # Process each URL with a download delay
+    for url in urls:
+        url = url.strip()  # Remove leading/trailing whitespace
+        if not process_url(url):
+            time.sleep(delay)
 
-# Read URLs from file
-with open('boxscore_urlsv2.txt', 'r') as file:
-    urls = file.readlines()
 
-# Process each URL with a download delay
-for url in urls:
-    url = url.strip()  # Remove leading/trailing whitespace
-    process_url(url)
-    time.sleep(60/15)  # Download delay of 60/15 seconds (4 seconds)
+if __name__ == "__main__":
+    main()